@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['standard', 'section', 'academic_year'], name='student_class_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:30
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """Fill the new counters, and attendance_percent, from the existing attendance rows."""
+    Student = apps.get_model('accounts', 'Student')
+    Attendance = apps.get_model('features', 'Attendance')
+
+    counts = Attendance.objects.filter(student_id=OuterRef('student_code')).values('student_id')
+    Student.objects.update(
+        attendance_present=Coalesce(Subquery(counts.annotate(n=Count('id', filter=Q(status='present'))).values('n')), 0),
+        attendance_total=Coalesce(Subquery(counts.annotate(n=Count('id')).values('n')), 0),
+    )
+    Student.objects.update(attendance_percent=Case(
+        When(attendance_total=0, then=Value(0)),
+        default=(F('attendance_present') * 200 + F('attendance_total')) / (F('attendance_total') * 2),
+        output_field=models.PositiveIntegerField(),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_signupimportjob'),
+        ('features', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='attendance_present',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='attendance_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
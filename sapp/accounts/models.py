@@ -1,3 +1,4 @@
+import uuid
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.conf import settings
@@ -24,15 +25,27 @@ class Student(models.Model):
     academic_year = models.CharField(max_length=20)
     subjects = models.JSONField(default=list)
     attendance_percent = models.PositiveIntegerField(default=0)
+    # Kept current on every attendance write (features/utils/attendance.py)
+    attendance_present = models.PositiveIntegerField(default=0)
+    attendance_total = models.PositiveIntegerField(default=0)
     student_code = models.CharField(max_length=100, unique=True, blank=True, null=True)
       # New field for academic year
     image = models.ImageField(upload_to='students/pics/', blank=True, null=True)
     last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['standard', 'section', 'academic_year'], name='student_class_idx'),
+        ]
     
+    @staticmethod
+    def build_student_code(email, standard, section, academic_year):
+        return f"{email}-{standard}-{section}-{academic_year}"
+
     def save(self, *args, **kwargs):
         # Automatically generate the student_code before saving
         if not self.student_code:
-            self.student_code = f"{self.user.email}-{self.standard}-{self.section}-{self.academic_year}"
+            self.student_code = self.build_student_code(self.user.email, self.standard, self.section, self.academic_year)
         super().save(*args, **kwargs)
         
     def __str__(self):
@@ -80,3 +93,28 @@ class SOAdmin(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
 
     
+
+
+class SignupImportJob(models.Model):
+    """Progress and outcome of a background Excel/CSV signup import."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('validating', 'Validating'),
+        ('hashing', 'Hashing passwords'),
+        ('writing', 'Writing records'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Signup import {self.file_name} ({self.status})"
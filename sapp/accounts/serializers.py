@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from .models import Student, Faculty, SOAdmin
+from general.utils.thumbnails import ImageDerivativeField
 from django.contrib.auth import get_user_model
 import pandas as pd
 
@@ -19,22 +20,30 @@ class AuthUserSerializer(serializers.ModelSerializer):
 # Student Serializer
 class StudentSerializer(serializers.ModelSerializer):
     user = AuthUserSerializer()
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Student
-        fields = ['user', 'enrollment_number', 'standard', 'section','academic_year', 'subjects', 'attendance_percent','image','student_code','last_updated']
+        fields = ['user', 'enrollment_number', 'standard', 'section','academic_year', 'subjects', 'attendance_percent','image','image_thumb','image_web','student_code','last_updated']
+        # Maintained from the attendance counters, never written by clients
+        read_only_fields = ['attendance_percent']
 
 # Faculty Serializer
 class FacultySerializer(serializers.ModelSerializer):
     user = AuthUserSerializer()
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Faculty
-        fields = ['user', 'faculty_id', 'department', 'specialization', 'coverage', 'class_teacher','image','last_updated']
+        fields = ['user', 'faculty_id', 'department', 'specialization', 'coverage', 'class_teacher','image','image_thumb','image_web','last_updated']
         
 class OfficeAdminSerializer(serializers.ModelSerializer):
     user = AuthUserSerializer()
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = SOAdmin
-        fields = ['user','employee_id','school_name','image','last_updated']
+        fields = ['user','employee_id','school_name','image','image_thumb','image_web','last_updated']
         
 class ExcelUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
@@ -1,3 +1,228 @@
+import contextlib
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.generics import GenericAPIView
+from rest_framework.test import APIClient
+
+from accounts.models import AuthUser, Faculty, SOAdmin, SignupImportJob, Student
+from features.models import Assignment, Submission
+from general.importers import signup_importer
+from general.importers.signup_importer import fail_stale_jobs, import_signup_file
+from general.signals import post_bulk_write
+from general.utils.pagination import CustomPagination
+
+
+def make_users(role, count, prefix):
+    # Unusable passwords keep setup fast; these users are only force-authenticated
+    return AuthUser.objects.bulk_create([
+        AuthUser(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com", role=role, password='!')
+        for i in range(count)
+    ])
+
+
+def make_students(count, prefix='student', section='A'):
+    students = Student.objects.bulk_create([
+        Student(user=user, enrollment_number=f"EN-{user.username}", standard=7, section=section,
+                academic_year='2024-2025', student_code=f"{user.email}-7-{section}-2024-2025")
+        for user in make_users('student', count, prefix)
+    ])
+    post_bulk_write.send(sender=Student, instances=students)
+    return students
+
+
+class QueryCountTestCase(TestCase):
+    """
+    Pins the number of queries per endpoint. Each endpoint is requested with a small and a
+    larger data set: the count must be the same for both, so a per-row query (N+1) fails.
+    Pagination is pinned too: the paginated count query is part of the expected numbers, and
+    DRF resolves DEFAULT_PAGINATION_CLASS at import time, so override_settings cannot pin it.
+    """
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(GenericAPIView, 'pagination_class', CustomPagination)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = make_users('so_admin', 1, 'office')[0]
+        SOAdmin.objects.create(user=self.admin, school_name='School')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.admin)
+
+    def assertQueriesPerRequest(self, expected, url, params=None):
+        with self.assertNumQueries(expected):
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+class ProfileListQueryCountTests(QueryCountTestCase):
+
+    def test_student_list(self):
+        make_students(3)
+        self.assertQueriesPerRequest(3, '/studentslist/')
+        make_students(8, prefix='more')
+        response = self.assertQueriesPerRequest(3, '/studentslist/')
+        self.assertEqual(response.data['results'][0]['user']['role'], 'student')
+
+    def test_student_detail(self):
+        student = make_students(1)[0]
+        response = self.assertQueriesPerRequest(2, f'/studentslist/{student.pk}/')
+        self.assertEqual(response.data['user']['username'], 'student0')
+
+    def test_faculty_list(self):
+        Faculty.objects.bulk_create([
+            Faculty(user=user, faculty_id=f"F{i}") for i, user in enumerate(make_users('faculty', 3, 'teacher'))
+        ])
+        self.assertQueriesPerRequest(3, '/facultylist/')
+        Faculty.objects.bulk_create([
+            Faculty(user=user, faculty_id=f"G{i}") for i, user in enumerate(make_users('faculty', 8, 'more'))
+        ])
+        self.assertQueriesPerRequest(3, '/facultylist/')
+
+    def test_office_admin_list(self):
+        self.assertQueriesPerRequest(3, '/soadminlist/')
+        SOAdmin.objects.bulk_create([
+            SOAdmin(user=user, school_name='School') for user in make_users('so_admin', 8, 'more')
+        ])
+        self.assertQueriesPerRequest(3, '/soadminlist/')
+
+
+class FacultySubmissionQueryCountTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        teacher = make_users('faculty', 1, 'teacher')[0]
+        faculty = Faculty.objects.create(user=teacher, faculty_id='F1')
+        self.assignment = Assignment.objects.create(
+            title='Essay', subject='English', faculty=faculty, standard='7', section='A', academic_year='2024-2025'
+        )
+        self.client.force_authenticate(teacher)
+
+    def test_not_submitted_students(self):
+        students = make_students(3)
+        Submission.objects.create(assignment=self.assignment, student=students[0])
+        params = {'assignment': self.assignment.pk}
+        response = self.assertQueriesPerRequest(5, '/faculty/submissions/', params)
+        self.assertEqual((response.data['total_students'], response.data['submitted_students_count']), (3, 1))
+        self.assertEqual(len(response.data['not_submitted_students']), 2)
+        more = make_students(8, prefix='more')
+        for student in more[:4]:
+            Submission.objects.create(assignment=self.assignment, student=student)
+        response = self.assertQueriesPerRequest(5, '/faculty/submissions/', params)
+        self.assertEqual((response.data['total_students'], response.data['submitted_students_count']), (11, 5))
+        self.assertEqual(len(response.data['not_submitted_students']), 6)
+        self.assertEqual(len(response.data['submissions']), 5)
+
+    def test_submission_board(self):
+        students = make_students(3)
+        other = Assignment.objects.create(
+            title='Poem', subject='English', faculty=self.assignment.faculty, standard='7', section='A',
+            academic_year='2024-2025'
+        )
+        Submission.objects.create(assignment=self.assignment, student=students[0], mark=8)
+        Submission.objects.create(assignment=other, student=students[1])
+        params = {'assignments': f'{self.assignment.pk},{other.pk}'}
+        response = self.assertQueriesPerRequest(3, '/faculty/submission-board/', params)
+        statuses = [[row['status'] for row in board['students']] for board in response.data['assignments']]
+        self.assertEqual(sorted(statuses), [['graded', 'not_submitted', 'not_submitted'],
+                                            ['not_submitted', 'submitted', 'not_submitted']])
+        make_students(8, prefix='more')
+        response = self.assertQueriesPerRequest(3, '/faculty/submission-board/', params)
+        self.assertEqual([board['total_students'] for board in response.data['assignments']], [11, 11])
+
+
+class ConditionalGetTests(QueryCountTestCase):
+
+    def test_unauthenticated_conditional_get_is_refused(self):
+        anonymous = APIClient(SERVER_NAME='localhost')
+        self.assertEqual(anonymous.get('/studentslist/', HTTP_IF_NONE_MATCH='*').status_code, 401)
+        self.assertEqual(anonymous.get('/studentslist/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT').status_code, 401)
+
+    def test_unauthorized_conditional_get_is_refused(self):
+        student = make_students(1)[0]
+        self.client.force_authenticate(student.user)
+        self.assertEqual(self.client.get('/studentslist/', HTTP_IF_NONE_MATCH='*').status_code, 403)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get('/studentslist/')['ETag']
+        response = self.client.get('/studentslist/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+
+class SignupImportJobTests(QueryCountTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.job = SignupImportJob.objects.create(file_name='signup.xlsx', status='writing',
+                                                  errors=[{"row": 2, "field": "email", "error": "a@example.com exists"}])
+
+    def test_status_is_office_admin_only(self):
+        self.assertEqual(self.client.get(f'/upload-excel-signup/{self.job.pk}/').status_code, 200)
+        self.client.force_authenticate(make_students(1)[0].user)
+        self.assertEqual(self.client.get(f'/upload-excel-signup/{self.job.pk}/').status_code, 403)
+
+    def test_stale_jobs_are_failed(self):
+        SignupImportJob.objects.filter(pk=self.job.pk).update(last_updated=self.job.last_updated - timedelta(hours=2))
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'failed')
+
+
+class SignupFileImportTests(TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write("role,username,email,password,faculty_id,department\n")
+            for i in range(3):
+                csv_file.write(f"faculty,teacher{i},teacher{i}@example.com,secret{i},F{i},Science\n")
+        self.path = csv_file.name
+        self.addCleanup(os.remove, self.path)
+
+    def test_chunks_are_written_together(self):
+        self.assertEqual(import_signup_file(self.path, 'signup.csv', chunksize=1), 3)
+        self.assertEqual(Faculty.objects.count(), 3)
+
+    def test_one_hash_pool_serves_every_chunk(self):
+        pools = []
+
+        class InlinePool(contextlib.nullcontext):
+            def map(self, function, iterable, chunksize=1):
+                return map(function, iterable)
+
+        def make_pool():
+            pools.append(InlinePool())
+            return pools[-1]
+
+        with mock.patch.object(signup_importer, 'HASH_POOL_THRESHOLD', 1), \
+                mock.patch.object(signup_importer, '_hash_workers', return_value=2), \
+                mock.patch.object(signup_importer, 'hash_pool', make_pool):
+            self.assertEqual(import_signup_file(self.path, 'signup.csv', chunksize=1), 3)
+        self.assertEqual(len(pools), 1)
+        self.assertTrue(AuthUser.objects.get(username='teacher2').check_password('secret2'))
+
+    def test_failing_chunk_rolls_back_the_whole_import(self):
+        write_rows = signup_importer.write_rows
+        calls = []
+
+        def fail_on_last_chunk(rows, hashed):
+            calls.append(rows)
+            if len(calls) == 3:
+                raise RuntimeError("database went away")
+            return write_rows(rows, hashed)
+
+        with mock.patch.object(signup_importer, 'write_rows', fail_on_last_chunk):
+            with self.assertRaises(RuntimeError):
+                import_signup_file(self.path, 'signup.csv', chunksize=1)
+        self.assertFalse(AuthUser.objects.exists())
 
-# Create your tests here.
+    def test_legacy_xls_is_rejected(self):
+        upload = SimpleUploadedFile('signup.xls', b'\xd0\xcf\x11\xe0')
+        response = APIClient(SERVER_NAME='localhost').post('/upload-excel-signup/', {'file': upload})
+        self.assertEqual(response.status_code, 400)
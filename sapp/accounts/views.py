@@ -1,4 +1,12 @@
+import logging
+import os
+import tempfile
+import threading
+
 import pandas as pd
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -14,14 +22,37 @@ from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
 
-from accounts.models import AuthUser, Student, Faculty, SOAdmin
+from accounts.models import AuthUser, Student, Faculty, SOAdmin, SignupImportJob
 from .serializers import StudentSerializer,FacultySerializer,OfficeAdminSerializer
 
 from general.utils.permissions import IsFaculty,IsOfficeAdmin,IsStudent
+from general.importers.signup_importer import (
+    SUPPORTED_EXTENSIONS, UNSUPPORTED_FILE_MESSAGE, SignupValidationError, import_signup_file, import_signup_frame,
+)
+from general.utils.versioning import ResourceVersionMixin
+
+logger = logging.getLogger(__name__)
 
 
 
 class ExcelUploadView(APIView):
+    """
+    Bulk signup from a CSV or Excel file.
+
+    The whole file is validated before anything is written; if any row is invalid the
+    response is a 400 with a per-row error report and no accounts are created. Valid files
+    are inserted in one transaction with batched bulk_create. Files with more than
+    SIGNUP_BACKGROUND_THRESHOLD rows are imported in a background job and answered with
+    202 and the job's status URL.
+
+    Uploads over SIGNUP_STREAMING_THRESHOLD bytes are never loaded whole: they are spooled
+    to disk and imported by a background job that streams them in chunks.
+
+    Background jobs run on daemon threads of the web process, so a restart or worker
+    recycle kills them mid-import; fail_stale_signup_imports marks such jobs failed.
+    Deployments importing large files regularly should move run_job to a real task
+    runner (Celery, RQ, ...) instead.
+    """
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
@@ -29,123 +60,100 @@ class ExcelUploadView(APIView):
         if not file:
             return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not file.name.endswith(SUPPORTED_EXTENSIONS):
+            return Response({"error": UNSUPPORTED_FILE_MESSAGE}, status=status.HTTP_400_BAD_REQUEST)
+
+        if file.size > settings.SIGNUP_STREAMING_THRESHOLD:
+            path = self.spool_upload(file)
+            job = SignupImportJob.objects.create(file_name=file.name)
+            threading.Thread(target=self.run_job, args=(job.pk, self.stream_import(path, file.name)), daemon=True).start()
+            return self.job_started(job)
+
         try:
             # Read the uploaded file (CSV or Excel)
             if file.name.endswith('.csv'):
                 df = pd.read_csv(file)  # Read CSV file
-            elif file.name.endswith('.xlsx') or file.name.endswith('.xls'):
-                df = pd.read_excel(file, engine='openpyxl')  # For Excel files (.xlsx)
             else:
-                return Response({"error": "Unsupported file type. Only CSV and Excel files are allowed."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Iterate through the rows and create users based on role
-            for index, row in df.iterrows():
-                role = row.get('role')
-                if not role or role not in ['student', 'faculty', 'so_admin']:
-                    return Response({"error": f"Invalid role at row {index+1}"}, status=status.HTTP_400_BAD_REQUEST)
-
-                if role == 'student':
-                    self.create_student(row, index)
-                elif role == 'faculty':
-                    self.create_faculty(row, index)
-                elif role == 'so_admin':
-                    self.create_office_admin(row, index)
+                df = pd.read_excel(file, engine='openpyxl')  # For Excel files (.xlsx)
+        except Exception as e:
+            return Response({"error": f"Could not read file: {e}"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({"message": "Data uploaded successfully"}, status=status.HTTP_201_CREATED)
+        if len(df) > settings.SIGNUP_BACKGROUND_THRESHOLD:
+            job = SignupImportJob.objects.create(file_name=file.name, total_rows=len(df))
+            threading.Thread(target=self.run_job, args=(job.pk, lambda job: import_signup_frame(df, job=job)), daemon=True).start()
+            return self.job_started(job)
 
+        try:
+            created = import_signup_frame(df)
+        except SignupValidationError as e:
+            return Response({"error": "No accounts were created.", "errors": e.errors}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def create_student(self, row, index):
+        return Response({"message": "Data uploaded successfully", "created": created}, status=status.HTTP_201_CREATED)
+
+    def job_started(self, job):
+        return Response(
+            {
+                "message": "Import started",
+                "job_id": str(job.pk),
+                "status_url": reverse('upload-excel-status', kwargs={"job_id": job.pk}),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @staticmethod
+    def spool_upload(file):
+        """Copy the upload to a temporary file that outlives the request."""
+        suffix = os.path.splitext(file.name)[1]
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spooled:
+            for chunk in file.chunks():
+                spooled.write(chunk)
+        return spooled.name
+
+    @staticmethod
+    def stream_import(path, file_name):
+        def run(job):
+            try:
+                return import_signup_file(path, file_name, job=job, chunksize=settings.SIGNUP_CHUNK_SIZE)
+            finally:
+                os.remove(path)
+        return run
+
+    @staticmethod
+    def run_job(job_id, run_import):
+        job = SignupImportJob.objects.get(pk=job_id)
         try:
-            # Create the user object with the plain password
-            user_data = {
-                'username': row['username'],
-                'email': row['email'],
-                'role': 'student',
-                'password': row['password']  # Store the plain password first
-            }
-
-            # Create the user and hash the password
-            user = get_user_model().objects.create_user(**user_data)
-
-            # Now, hash the password using set_password (this is done automatically by create_user)
-            # But you can call it manually if you want to, like this:
-            user.set_password(row['password'])
-            user.save()  # Save the user after setting the hashed password
-
-            # Generate the student_code in the format email-standard-section
-            student_code = f"{row['email']}-{row['standard']}-{row.get('section', '')}-{row['academic_year']}"
-
-            # Create the related Student model
-            student_data = {
-                'user': user,
-                'enrollment_number': row['enrollment_number'],
-                'standard': row['standard'],
-                'section': row.get('section', ''),  # Optional field
-                'subjects': row.get('subjects', []),  # Optional field
-                'attendance_percent': row.get('attendance_percent', 0),  # Optional field
-                'student_code': student_code,  # Set the generated student_code
-                'academic_year': row.get('academic_year'),
-            }
-
-            Student.objects.create(**student_data)
-
+            job.created_count = run_import(job)
+            job.status = 'completed'
+        except SignupValidationError as e:
+            job.status, job.errors = 'failed', e.errors
         except Exception as e:
-            print(f"Error creating student: {e}")
-
-    def create_faculty(self, row, index):
-        try:
-            # Hash the password before creating the user
-             # Hash the password
-            user_data = {
-                'username': row['username'],
-                'email': row['email'],
-                'role': 'faculty',
-                'password': row['password']  # Store the hashed password
-            }
-            user = get_user_model().objects.create_user(**user_data)
-            user.set_password(row['password'])
-            user.save() 
-
-            # Create the related Faculty model
-            faculty_data = {
-                'user': user,
-                'faculty_id': row.get('faculty_id', ''),  # Optional field
-                'department': row['department'],
-                'specialization': row.get('specialization', ''),  # Optional field
-                'coverage': row.get('coverage', []),  # Optional field
-                'class_teacher': row.get('class_teacher', {})  # Optional field
-            }
-            Faculty.objects.create(**faculty_data)
+            logger.exception("Signup import %s failed", job_id)
+            job.status, job.errors = 'failed', [{"row": None, "field": None, "error": str(e)}]
+        finally:
+            job.save()
+            connection.close()
 
-        except Exception as e:
-            raise Exception(f"Error creating faculty at row {index+1}: {e}")
 
-    def create_office_admin(self, row, index):
-        try:
-            # Hash the password before creating the user
-            hashed_password = make_password(row['password'])  # Hash the password
-            user_data = {
-                'username': row['username'],
-                'email': row['email'],
-                'role': 'so_admin',
-                'password': row['password']  # Store the hashed password
-            }
-            user = get_user_model().objects.create_user(**user_data)
-            user.set_password(row['password'])
-            user.save() 
-
-            # Create the related OfficeAdmin model
-            office_admin_data = {
-                'user': user,
-                'employee_id': row.get('employee_id', ''),  # Optional field
-                'school_name': row['school_name']
-            }
-            SOAdmin.objects.create(**office_admin_data)
+class SignupImportJobView(APIView):
+    """Progress of a background signup import started by ExcelUploadView. The error report
+    lists uploaded emails, so only office admins may read it."""
+    permission_classes = [IsAuthenticated, IsOfficeAdmin]
 
-        except Exception as e:
-            raise Exception(f"Error creating office admin at row {index+1}: {e}")
+    def get(self, request, job_id):
+        job = SignupImportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"error": "Import job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "job_id": str(job.pk),
+            "file_name": job.file_name,
+            "status": job.status,
+            "total_rows": job.total_rows,
+            "processed_rows": job.processed_rows,
+            "created": job.created_count,
+            "errors": job.errors,
+        })
 
 
 class LoginView(APIView):
@@ -198,21 +206,46 @@ class LoginView(APIView):
 '''
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+# Columns of the nested AuthUserSerializer, loaded in the same query as each profile
+USER_ONLY_FIELDS = ['user__username', 'user__email', 'user__role']
+
+
+class ProfileQuerysetMixin:
+    """
+    Joins the user into profile querysets. Reads are also narrowed with only() to the
+    serializer's columns; writes load full rows so saves never touch deferred fields.
+    """
+    only_fields = []
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('user')
+        if self.request.method in ('GET', 'HEAD', 'OPTIONS'):
+            queryset = queryset.only(*self.only_fields, *USER_ONLY_FIELDS)
+        return queryset
+
+
+class StudentViewSet(ResourceVersionMixin, ProfileQuerysetMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated, IsOfficeAdmin]
+    version_resources = ['accounts.student', 'accounts.authuser', 'features.attendance']  # attendance_percent
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['standard', 'section','academic_year']# Only SOAdmin can access
+    only_fields = ['enrollment_number', 'standard', 'section', 'academic_year', 'subjects', 'attendance_percent',
+                   'image', 'student_code', 'last_updated']
 
-class FacultyViewSet(viewsets.ModelViewSet):
+class FacultyViewSet(ResourceVersionMixin, ProfileQuerysetMixin, viewsets.ModelViewSet):
     queryset = Faculty.objects.all()
     serializer_class = FacultySerializer
     permission_classes = [IsAuthenticated,  IsOfficeAdmin]
+    version_resources = ['accounts.faculty', 'accounts.authuser']
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['faculty_id','department','specialization']# Only SOAdmin can access
+    only_fields = ['faculty_id', 'department', 'specialization', 'coverage', 'class_teacher', 'image', 'last_updated']
 
-class OfficeAdminViewSet(viewsets.ModelViewSet):
+class OfficeAdminViewSet(ResourceVersionMixin, ProfileQuerysetMixin, viewsets.ModelViewSet):
     queryset = SOAdmin.objects.all()
     serializer_class = OfficeAdminSerializer
-    permission_classes = [IsAuthenticated,  IsOfficeAdmin]
\ No newline at end of file
+    permission_classes = [IsAuthenticated,  IsOfficeAdmin]
+    version_resources = ['accounts.soadmin', 'accounts.authuser']
+    only_fields = ['employee_id', 'school_name', 'image', 'last_updated']
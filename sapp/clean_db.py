@@ -5,7 +5,8 @@ import subprocess
 # Define paths
 paths_to_clean = [
     "accounts/migrations",
-    "features/migrations"
+    "features/migrations",
+    "general/migrations"
 ]
 
 # Files and directories to exclude
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class FeaturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'features'
+
+    def ready(self):
+        from features.utils.assignments import connect_assignment_counter_signals
+        from features.utils.attendance import connect_attendance_aggregate_signals
+        from features.utils.roster import connect_roster_signals
+
+        connect_attendance_aggregate_signals()
+        connect_assignment_counter_signals()
+        connect_roster_signals()
@@ -0,0 +1,20 @@
+# management/commands/rebuild_assignment_counters.py
+from django.core.management.base import BaseCommand
+
+from features.models import Assignment
+from features.utils.assignments import rebuild_assignment_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute every assignment's submitted_count and class_size from the Submission and Student tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assignment', action='append', dest='assignment_ids',
+                            help='Only rebuild this assignment id (repeatable)')
+
+    def handle(self, *args, **kwargs):
+        assignments = Assignment.objects.all()
+        if kwargs['assignment_ids']:
+            assignments = assignments.filter(id__in=kwargs['assignment_ids'])
+        updated = rebuild_assignment_counters(assignments)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {updated} assignments.'))
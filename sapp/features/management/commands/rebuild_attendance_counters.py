@@ -0,0 +1,16 @@
+# management/commands/rebuild_attendance_counters.py
+from django.core.management.base import BaseCommand
+
+from features.utils.attendance import rebuild_attendance_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute every student's attendance counters and attendance_percent from the Attendance table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', action='append', dest='student_codes',
+                            help='Only rebuild this student_code (repeatable)')
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_attendance_counters(kwargs['student_codes'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt attendance counters for {updated} students.'))
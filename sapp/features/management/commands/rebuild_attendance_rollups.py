@@ -0,0 +1,12 @@
+# management/commands/rebuild_attendance_rollups.py
+from django.core.management.base import BaseCommand
+
+from features.utils.attendance import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-class daily attendance rollups from the Attendance table'
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_daily_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily attendance rollups.'))
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_student_student_class_idx'),
+        ('features', '0002_attendance_attendance_student_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['last_updated', 'id'], name='attendance_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['last_updated', 'id'], name='result_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['last_updated', 'id'], name='submission_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:32
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_rollups(apps, schema_editor):
+    """Build the daily rollups from the existing attendance rows."""
+    Attendance = apps.get_model('features', 'Attendance')
+    AttendanceDailyRollup = apps.get_model('features', 'AttendanceDailyRollup')
+
+    rows = (
+        Attendance.objects.values('student__standard', 'student__section', 'student__academic_year', 'date')
+        .annotate(present=Count('id', filter=Q(status='present')), absent=Count('id', filter=Q(status='absent')))
+        .order_by()
+    )
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(
+            standard=row['student__standard'], section=row['student__section'] or '',
+            academic_year=row['student__academic_year'], date=row['date'],
+            present_count=row['present'], absent_count=row['absent'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0003_attendance_attendance_keyset_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('standard', models.PositiveIntegerField()),
+                ('section', models.CharField(blank=True, default='', max_length=10)),
+                ('academic_year', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('standard', 'section', 'academic_year', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    """Count distinct submitting students and class sizes of the existing assignments."""
+    Assignment = apps.get_model('features', 'Assignment')
+    Student = apps.get_model('accounts', 'Student')
+
+    sizes = {}
+    for assignment in Assignment.objects.annotate(submitted=Count('submissions__student', distinct=True)):
+        key = (assignment.standard, assignment.section, assignment.academic_year)
+        if key not in sizes:
+            students = Student.objects.filter(academic_year=assignment.academic_year)
+            students = students.filter(section=assignment.section) if assignment.section else students.filter(section__in=[None, ''])
+            sizes[key] = students.filter(standard=int(assignment.standard)).count() if assignment.standard.isdigit() else 0
+        Assignment.objects.filter(id=assignment.id).update(submitted_count=assignment.submitted, class_size=sizes[key])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('features', '0004_attendancedailyrollup'),
+        ('accounts', '0005_student_attendance_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='class_size',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='submitted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -14,10 +14,32 @@ class Attendance(models.Model):
 
     class Meta:
         unique_together = ('student', 'date')
+        indexes = [
+            models.Index(fields=['student', '-date'], name='attendance_student_date_idx'),
+            models.Index(fields=['last_updated', 'id'], name='attendance_keyset_idx'),
+        ]
         
     def __str__(self):
         return f"Attendance for {self.student.username} on {self.date}: {self.status}"
     
+
+
+class AttendanceDailyRollup(models.Model):
+    """Present/absent totals of one class on one day, kept current on attendance writes."""
+    standard = models.PositiveIntegerField()
+    section = models.CharField(max_length=10, blank=True, default='')  # '' for students without a section
+    academic_year = models.CharField(max_length=20)
+    date = models.DateField()
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('standard', 'section', 'academic_year', 'date')
+
+    def __str__(self):
+        return f"{self.standard}-{self.section} ({self.academic_year}) on {self.date}: {self.present_count}/{self.present_count + self.absent_count}"
+
     
 class AttendanceLock(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -141,6 +163,7 @@ class Result(models.Model):
         indexes = [
             models.Index(fields=['student', 'result_lock']),
             models.Index(fields=['last_updated']),
+            models.Index(fields=['last_updated', 'id'], name='result_keyset_idx'),
         ]
     
     def percentage(self):
@@ -187,6 +210,10 @@ class Assignment(models.Model):
     academic_year = models.CharField(max_length=20, db_index=True)
 
     completed = models.BooleanField(default=False, db_index=True)  
+    # Kept current by features/utils/assignments.py: distinct students who submitted, and
+    # students in the class. Completion is a comparison of the two.
+    submitted_count = models.PositiveIntegerField(default=0)
+    class_size = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
@@ -216,29 +243,14 @@ class Submission(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_updated', 'id'], name='submission_keyset_idx'),
+        ]
+
     def __str__(self):
         return f"Submission by {self.student.user.username} for {self.assignment.title}"
 
-    from accounts.models import Student  # Import Student model
-
-    def save(self, *args, **kwargs):
-        is_new = self._state.adding  # Check if this is a new submission
-        super().save(*args, **kwargs)
-
-        if is_new:
-            # 🔹 Count students who belong to the same standard, section, and academic year as the assignment
-            total_students = Student.objects.filter(
-                standard=self.assignment.standard,
-                section=self.assignment.section,
-                academic_year=self.assignment.academic_year
-            ).count()
-
-            # 🔹 Count distinct students who have already submitted
-            submitted_students = self.assignment.submissions.values('student').distinct().count()
-
-            # 🔹 Mark assignment as completed if all students have submitted
-            if submitted_students >= total_students and total_students > 0:
-                Assignment.objects.filter(id=self.assignment.id).update(completed=True)
 
 
 
@@ -4,13 +4,20 @@ from rest_framework import serializers
 from accounts.models import Student, Faculty, SOAdmin
 from accounts.serializers import AuthUserSerializer
 from features.models import Announcement,Timetable,Attendance, AttendanceLock,CalendarEvent, Result, ResultLock, Assignment, Submission, Portion
+from general.models import UploadSession
+from general.utils.thumbnails import ImageDerivativeField
+from general.utils.uploads import BlobUploadMixin
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(BlobUploadMixin, serializers.ModelSerializer):
     user = AuthUserSerializer()  # Assuming this is your custom user serializer
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
 
     class Meta:
         model = Student
-        fields = ['user', 'enrollment_number', 'standard', 'section', 'subjects','academic_year', 'attendance_percent','image','last_updated','student_code']
+        fields = ['user', 'enrollment_number', 'standard', 'section', 'subjects','academic_year', 'attendance_percent','image','image_thumb','image_web','last_updated','student_code']
+        # Maintained from the attendance counters, never written by clients
+        read_only_fields = ['attendance_percent']
 
     def update(self, instance, validated_data):
         # Handle user update (username, email)
@@ -30,12 +37,14 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         model = Faculty
         fields = ['name']
 '''
-class FacultyProfileSerializer(serializers.ModelSerializer):
+class FacultyProfileSerializer(BlobUploadMixin, serializers.ModelSerializer):
     user = AuthUserSerializer()
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
 
     class Meta:
         model = Faculty
-        fields = ['user', 'faculty_id', 'department', 'specialization', 'coverage', 'class_teacher','image','last_updated']
+        fields = ['user', 'faculty_id', 'department', 'specialization', 'coverage', 'class_teacher','image','image_thumb','image_web','last_updated']
     
     def update(self, instance, validated_data):
         # Handle user update (username, email)
@@ -49,12 +58,14 @@ class FacultyProfileSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
     
     
-class SOProfileSerializer(serializers.ModelSerializer):
+class SOProfileSerializer(BlobUploadMixin, serializers.ModelSerializer):
     user = AuthUserSerializer()
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
 
     class Meta:
         model = SOAdmin
-        fields = ['user','employee_id','school_name','image','last_updated']
+        fields = ['user','employee_id','school_name','image','image_thumb','image_web','last_updated']
     
     def update(self, instance, validated_data):
         # Handle user update (username, email)
@@ -77,7 +88,7 @@ class AttendanceLockSerializer(serializers.ModelSerializer):
         fields = ['id', 'date', 'is_locked','last_updated']
         
 class AttendanceSerializer(serializers.ModelSerializer):
-    student = serializers.CharField(source='student.student_code')  # Display student_code in the response
+    student = serializers.CharField(source='student_id')  # Display student_code in the response (the FK targets student_code, so no join is needed)
 
     class Meta:
         model = Attendance
@@ -114,6 +125,19 @@ class AttendanceSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class AttendanceRecordSerializer(serializers.Serializer):
+    """One record of a bulk attendance POST or PUT. `student` is accepted as an alias of student_code."""
+    student_code = serializers.CharField(required=False)
+    student = serializers.CharField(required=False)
+    date = serializers.DateField()
+    status = serializers.ChoiceField(choices=Attendance._meta.get_field('status').choices)
+
+    def validate(self, attrs):
+        if not (attrs.get('student_code') or attrs.get('student')):
+            raise serializers.ValidationError({"student_code": "student_code is required."})
+        return attrs
+
+
 
 
 
@@ -184,25 +208,31 @@ class AssignmentMinSerializer(serializers.ModelSerializer):
         model = Assignment
         fields = ['id', 'title','subject','completed','due_date','last_updated']
         
-class AssignmentSerializer(serializers.ModelSerializer):
+class AssignmentSerializer(BlobUploadMixin, serializers.ModelSerializer):
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Assignment
         fields = '__all__'
-        read_only_fields = ['faculty']
+        read_only_fields = ['faculty', 'submitted_count', 'class_size']
         
         
 
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(BlobUploadMixin, serializers.ModelSerializer):
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Submission
-        fields = ['id','assignment','student','image','document','mark','last_updated']
+        fields = ['id','assignment','student','image','image_thumb','image_web','document','mark','last_updated']
         read_only_fields = ['student']
         
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(BlobUploadMixin, serializers.ModelSerializer):
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Submission
-        fields = ['id','assignment','student','image','document','mark','last_updated']
+        fields = ['id','assignment','student','image','image_thumb','image_web','document','mark','last_updated']
         read_only_fields = ['student']
         
 
@@ -210,7 +240,21 @@ class SubmissionSerializer(serializers.ModelSerializer):
    
    
         
-class PortionSerializer(serializers.ModelSerializer):
+class PortionSerializer(BlobUploadMixin, serializers.ModelSerializer):
+    image_thumb = ImageDerivativeField('thumb', source='image')
+    image_web = ImageDerivativeField('web', source='image')
     class Meta:
         model = Portion
-        fields = ['id','standard','academic_year','subject','unit','title','description','reference','image','document','last_updated']
\ No newline at end of file
+        fields = ['id','standard','academic_year','subject','unit','title','description','reference','image','image_thumb','image_web','document','last_updated']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True, default=None)
+    url = serializers.FileField(source='blob.file', read_only=True, default=None)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'kind', 'file_name', 'content_type', 'total_size', 'received_size', 'status', 'error',
+                  'sha256', 'url', 'created_at', 'last_updated']
+        read_only_fields = fields
+
@@ -1,3 +1,295 @@
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import AuthUser, Faculty, Student
+from accounts.tests import make_students, make_users
+from features.models import Assignment, Attendance, Submission
+from features.serializers import AttendanceSerializer
+from features.utils.assignments import class_size_of, rebuild_assignment_counters
+from features.utils.attendance import bulk_upsert_attendance, rebuild_attendance_counters
+from features.utils.dashboard import get_dashboard_snapshot
+from features.utils.roster import get_roster
+from general.utils.query_filter import make_sync_token
+from general.utils.streaming import stream_queryset
+
+
+class AttendanceParameterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        teacher = AuthUser.objects.create(username='teacher', email='teacher@example.com', role='faculty', password='!')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(teacher)
+
+    def test_non_numeric_standard_is_rejected(self):
+        response = self.client.get('/class/attendance/', {'standard': 'x', 'section': 'A', 'academic_year': '2024-2025'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_numeric_standard_is_rejected_by_analytics(self):
+        response = self.client.get('/class/attendance/analytics/', {'standard': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_class_move_changes_the_class_etag(self):
+        student = make_students(1)[0]
+        params = {'standard': '7', 'section': 'B', 'academic_year': '2024-2025'}
+        etag = self.client.get('/class/attendance/', params)['ETag']
+        student.section = 'B'
+        student.save()
+        response = self.client.get('/class/attendance/', params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_tampered_cursor_pk_is_not_found(self):
+        cursor = base64.urlsafe_b64encode(json.dumps(['2024-06-01T00:00:00+00:00', 'not-a-pk']).encode()).decode()
+        response = self.client.get('/class/attendance/', {'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+
+class AttendanceUpsertTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        teacher = AuthUser.objects.create(username='teacher', email='teacher@example.com', role='faculty', password='!')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(teacher)
+        self.students = make_students(4)
+
+    def records(self, students, day='2024-06-03', status='present'):
+        return [{'student_code': student.student_code, 'date': day, 'status': status} for student in students]
+
+    def test_put_inserts_and_returns_the_serialized_records(self):
+        response = self.client.put('/class/attendance/', self.records(self.students[:2]), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['student'], row['date'], row['status']) for row in response.data],
+            [(student.student_code, '2024-06-03', 'present') for student in self.students[:2]],
+        )
+        self.assertEqual({row['id'] for row in response.data}, set(Attendance.objects.values_list('pk', flat=True)))
+
+    def test_put_updates_an_existing_record(self):
+        attendance = Attendance.objects.create(student=self.students[0], date='2024-06-03', status='present')
+        response = self.client.put('/class/attendance/', self.records(self.students[:1], status='absent'), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['id'], attendance.pk)
+        attendance.refresh_from_db()
+        self.assertEqual(attendance.status, 'absent')
+        self.students[0].refresh_from_db()
+        self.assertEqual((self.students[0].attendance_present, self.students[0].attendance_total), (0, 1))
+
+    def test_mixed_batch_creates_and_updates(self):
+        Attendance.objects.create(student=self.students[0], date='2024-06-03', status='absent')
+        response = self.client.post('/class/attendance/', self.records(self.students[:3]), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['result'] for row in response.data['results']], ['updated', 'created', 'created'])
+        self.assertEqual(Attendance.objects.filter(status='present').count(), 3)
+
+    def test_unhashable_student_is_a_bad_request(self):
+        for student in (['a', 'b'], {'code': 'a'}):
+            records = self.records(self.students[:1]) + [{'student': student, 'date': '2024-06-03', 'status': 'present'}]
+            response = self.client.put('/class/attendance/', records, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['errors'][0]['row'], 1)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        Attendance.objects.create(student=self.students[0], date='2024-06-03', status='absent')
+        Attendance.objects.create(student=self.students[1], date='2024-06-04', status='absent')
+        counts = []
+        for day, students in (('2024-06-03', self.students[:1]), ('2024-06-04', self.students)):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.put('/class/attendance/', self.records(students, day), format='json')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class AttendanceCounterTests(TestCase):
+
+    def setUp(self):
+        self.student, self.other = make_students(2)
+
+    def counters(self, student):
+        student.refresh_from_db()
+        return student.attendance_present, student.attendance_total, student.attendance_percent
+
+    def test_saves_and_deletes_keep_the_counters_current(self):
+        first = Attendance.objects.create(student=self.student, date='2024-06-03', status='present')
+        Attendance.objects.create(student=self.student, date='2024-06-04', status='absent')
+        Attendance.objects.create(student=self.student, date='2024-06-05', status='present')
+        self.assertEqual(self.counters(self.student), (2, 3, 67))
+
+        first.status = 'absent'
+        first.save()
+        self.assertEqual(self.counters(self.student), (1, 3, 33))
+
+        first.student = self.other
+        first.save()
+        self.assertEqual(self.counters(self.student), (1, 2, 50))
+        self.assertEqual(self.counters(self.other), (0, 1, 0))
+
+        first.delete()
+        self.assertEqual(self.counters(self.other), (0, 0, 0))
+
+    def test_incremental_counters_match_a_rebuild(self):
+        bulk_upsert_attendance([
+            {'student_code': student.student_code, 'date': day, 'status': status}
+            for student in (self.student, self.other)
+            for day, status in (('2024-06-03', 'present'), ('2024-06-04', 'absent'), ('2024-06-05', 'present'))
+        ])
+        bulk_upsert_attendance([{'student_code': self.other.student_code, 'date': '2024-06-05', 'status': 'absent'}])
+        incremental = [self.counters(self.student), self.counters(self.other)]
+        Student.objects.update(attendance_present=0, attendance_total=0, attendance_percent=0)
+        rebuild_attendance_counters()
+        self.assertEqual([self.counters(self.student), self.counters(self.other)], incremental)
+        self.assertEqual(incremental, [(2, 3, 67), (1, 3, 33)])
+
+
+class StreamingListTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_students(1)[0]
+        for day in range(1, 6):
+            Attendance.objects.create(student=self.student, date=f'2024-06-0{day}', status='present')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.student.user)
+
+    def get(self, **params):
+        return self.client.get('/class/attendance/', {'email': self.student.user.email, **params})
+
+    def test_streamed_json_matches_the_regular_list(self):
+        expected = json.loads(json.dumps(self.get().data))
+        response = self.get(stream='json')
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+    def test_ndjson_has_one_record_per_line(self):
+        response = self.get(stream='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['date'] for line in lines], [f'2024-06-0{day}' for day in range(5, 0, -1)])
+
+    def test_batches_join_into_one_array(self):
+        response = stream_queryset(Attendance.objects.order_by('date'), AttendanceSerializer, chunk_size=2)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['date'] for row in rows], [f'2024-06-0{day}' for day in range(1, 6)])
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.student, other = make_students(2)
+        self.kept = Attendance.objects.create(student=self.student, date='2024-06-03', status='present')
+        Attendance.objects.create(student=self.student, date='2024-06-04', status='absent').delete()
+        Attendance.objects.create(student=other, date='2024-06-04', status='absent').delete()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.student.user)
+
+    def get(self, **params):
+        return self.client.get('/class/attendance/', {'email': self.student.user.email, **params})
+
+    def test_if_modified_since_alone_keeps_the_list_shape(self):
+        response = self.client.get('/class/attendance/', {'email': self.student.user.email},
+                                   HTTP_IF_MODIFIED_SINCE='Sat, 01 Jun 2024 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('deleted', response.data)
+
+    def test_since_reports_only_the_readers_deletions(self):
+        response = self.get(since=make_sync_token(timezone.now() - timedelta(hours=1)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.kept.pk])
+        self.assertEqual(len(response.data['deleted']), 1)
+
+    def test_full_list_hands_out_a_server_watermark(self):
+        sync_token = self.get()['X-Sync-Token']
+        # Stamped before the list was read but committed after it: the overlap still covers it
+        late = Attendance.objects.create(student=self.student, date='2024-06-05', status='absent')
+        Attendance.objects.filter(pk=late.pk).update(last_updated=timezone.now() - timedelta(seconds=30))
+
+        response = self.get(since=sync_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(late.pk, [row['id'] for row in response.data['results']])
+        self.assertTrue(response.data['sync_token'])
+
+    def test_since_before_retention_needs_full_resync(self):
+        with self.settings(TOMBSTONE_RETENTION_DAYS=1):
+            response = self.get(since=make_sync_token(timezone.now() - timedelta(days=2)))
+        self.assertEqual(response.status_code, 410)
+
+    def test_client_picked_since_is_rejected(self):
+        self.assertEqual(self.get(since='yesterday').status_code, 400)
+        self.assertEqual(self.get(since=timezone.now().isoformat()).status_code, 400)
+
+
+class AssignmentCounterTests(TestCase):
+
+    def test_students_without_a_section_count_towards_the_class(self):
+        students = make_students(1, prefix='null', section=None) + make_students(1, prefix='blank', section='')
+        teacher = make_users('faculty', 1, 'teacher')[0]
+        assignment = Assignment.objects.create(title='Essay', subject='English', faculty=Faculty.objects.create(user=teacher, faculty_id='F1'),
+                                               standard='7', section='', academic_year='2024-2025')
+        self.assertEqual(class_size_of(7, None, '2024-2025'), 2)
+        for student in students:
+            Submission.objects.create(assignment=assignment, student=student)
+
+        Assignment.objects.filter(pk=assignment.pk).update(class_size=0, submitted_count=0, completed=False)
+        rebuild_assignment_counters()
+        assignment.refresh_from_db()
+        self.assertEqual((assignment.class_size, assignment.submitted_count, assignment.completed), (2, 2, True))
+
+
+class DashboardSnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        make_students(2)
+
+    def rebuild(self, at):
+        cache.clear()
+        with mock.patch('features.utils.dashboard.timezone.now', return_value=at):
+            return get_dashboard_snapshot()
+
+    def test_rebuilding_unchanged_data_keeps_the_etag(self):
+        now = timezone.now()
+        first, first_etag = self.rebuild(now)
+        second, second_etag = self.rebuild(now + timedelta(minutes=5))
+        self.assertNotEqual(first['generated_at'], second['generated_at'])
+        self.assertEqual(first_etag, second_etag)
+
+    def test_changed_data_changes_the_etag(self):
+        _, etag = self.rebuild(timezone.now())
+        make_students(1, prefix='late')
+        self.assertNotEqual(self.rebuild(timezone.now())[1], etag)
+
+
+class RosterCacheTests(TestCase):
+
+    def test_cached_roster_is_not_served_after_a_student_write(self):
+        cache.clear()
+        make_students(1)
+        self.assertEqual(len(get_roster(7, 'A', '2024-2025')), 1)
+        # Saving a student bumps its resource version, which is part of the roster key,
+        # so even a cache this code cannot invalidate directly is bypassed.
+        user = make_users('student', 1, 'late')[0]
+        Student.objects.create(user=user, enrollment_number='EN-late', standard=7, section='A',
+                               academic_year='2024-2025', student_code='late-7-A-2024-2025')
+        self.assertEqual(len(get_roster(7, 'A', '2024-2025')), 2)
 
-# Create your tests here.
+    def test_attendance_and_other_classes_keep_the_cached_roster(self):
+        cache.clear()
+        student = make_students(1)[0]
+        get_roster(7, 'A', '2024-2025')
+        bulk_upsert_attendance([{'student_code': student.student_code, 'date': '2024-06-03', 'status': 'present'}])
+        make_students(1, prefix='other', section='B')
+        with self.assertNumQueries(1):  # the roster version; the roster itself comes from the cache
+            self.assertEqual(len(get_roster(7, 'A', '2024-2025')), 1)
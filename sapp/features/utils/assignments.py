@@ -0,0 +1,104 @@
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from accounts.models import Student
+from features.models import Assignment, Submission
+from features.utils.roster import CLASS_FIELDS, class_filter, roster_changed
+from general.utils.versioning import bump_versions
+
+
+def class_size_of(standard, section, academic_year):
+    try:
+        standard = int(standard)
+    except (TypeError, ValueError):
+        return 0
+    return Student.objects.filter(class_filter(standard, section, academic_year)).count()
+
+
+def _completed_when(submitted):
+    """`completed` once every student of the class has submitted; never unset automatically."""
+    return Case(
+        When(class_size__gt=0, class_size__lte=submitted, then=Value(True)),
+        default=F('completed'),
+    )
+
+
+def _apply_submission_delta(assignment_id, delta):
+    submitted = F('submitted_count') + delta
+    Assignment.objects.filter(id=assignment_id).update(
+        submitted_count=submitted, completed=_completed_when(submitted), last_updated=timezone.now(),
+    )
+    bump_versions(['features.assignment'])
+
+
+def refresh_class_sizes(classes):
+    """Recount class_size of the assignments given to these classes."""
+    changed = False
+    for standard, section, academic_year in classes:
+        size = class_size_of(standard, section, academic_year)
+        changed |= bool(
+            Assignment.objects.filter(standard=str(standard), section=section or '', academic_year=academic_year)
+            .exclude(class_size=size)
+            .update(class_size=size, completed=_completed_when(F('submitted_count')), last_updated=timezone.now())
+        )
+    if changed:
+        bump_versions(['features.assignment'])
+
+
+def rebuild_assignment_counters(assignments=None):
+    """Recompute submitted_count, class_size and completion from scratch."""
+    assignments = Assignment.objects.all() if assignments is None else assignments
+    assignments = list(assignments.annotate(submitted=Count('submissions__student', distinct=True)).only('id', *CLASS_FIELDS))
+    sizes = {}
+    for assignment in assignments:
+        student_class = tuple(getattr(assignment, field) for field in CLASS_FIELDS)
+        if student_class not in sizes:
+            sizes[student_class] = class_size_of(*student_class)
+        size = sizes[student_class]
+        Assignment.objects.filter(id=assignment.id).update(
+            submitted_count=assignment.submitted,
+            class_size=size,
+            # Same rule as _completed_when, on the recounted values
+            completed=True if 0 < size <= assignment.submitted else F('completed'),
+        )
+    if assignments:
+        bump_versions(['features.assignment'])
+    return len(assignments)
+
+
+def _other_submissions(instance):
+    return Submission.objects.filter(assignment_id=instance.assignment_id, student_id=instance.student_id).exclude(pk=instance.pk)
+
+
+def _submission_saved(sender, instance, created, **kwargs):
+    # A student's resubmission does not count twice
+    if created and not _other_submissions(instance).exists():
+        _apply_submission_delta(instance.assignment_id, 1)
+
+
+def _submission_deleted(sender, instance, **kwargs):
+    if not _other_submissions(instance).exists():
+        _apply_submission_delta(instance.assignment_id, -1)
+
+
+def _size_class(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not set(CLASS_FIELDS) & set(update_fields):
+        return
+    if not instance._state.adding:
+        previous = Assignment.objects.filter(pk=instance.pk).values_list(*CLASS_FIELDS).first()
+        if previous == tuple(getattr(instance, field) for field in CLASS_FIELDS):
+            return
+    instance.class_size = class_size_of(instance.standard, instance.section, instance.academic_year)
+
+
+def _roster_changed(sender, classes, **kwargs):
+    refresh_class_sizes(classes)
+
+
+def connect_assignment_counter_signals():
+    """Keep Assignment.submitted_count and class_size current."""
+    post_save.connect(_submission_saved, sender=Submission, dispatch_uid="assignment-counter-submission-save")
+    post_delete.connect(_submission_deleted, sender=Submission, dispatch_uid="assignment-counter-submission-delete")
+    pre_save.connect(_size_class, sender=Assignment, dispatch_uid="assignment-counter-class-size")
+    roster_changed.connect(_roster_changed, dispatch_uid="assignment-counter-roster")
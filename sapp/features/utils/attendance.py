@@ -0,0 +1,276 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, PositiveIntegerField, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from accounts.models import Student
+from features.models import Attendance, AttendanceDailyRollup
+from features.serializers import AttendanceRecordSerializer
+from general.signals import post_bulk_write
+from general.utils.versioning import bump_versions, class_scope, resource_key
+
+
+def bulk_upsert_attendance(records, code_keys=("student_code", "student")):
+    """
+    Validate and write a batch of attendance records in a constant number of queries.
+
+    Every student_code is resolved with a single IN query, and inside one transaction the
+    students are locked, existing (student, date) pairs are fetched once and all rows are
+    written with one upserting bulk_create. Nothing is written if any record is invalid.
+
+    Each record is checked with AttendanceRecordSerializer first. Returns (results, errors):
+    one result dict per input record, and a list of per-row error dicts (empty on success).
+    """
+    errors = []
+    parsed = []
+
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append({"row": index, "detail": "Each attendance record must be an object."})
+            continue
+
+        # Validate before anything is used as a dict or set key: a list or an object sent
+        # as the student is a 400, not an unhashable-type 500.
+        serializer = AttendanceRecordSerializer(data=record)
+        if not serializer.is_valid():
+            errors.append({"row": index, "detail": serializer.errors})
+            continue
+
+        data = serializer.validated_data
+        student_code = next(data[key] for key in code_keys if data.get(key))
+        parsed.append((index, student_code, data["date"], data["status"]))
+
+    codes = {student_code for _, student_code, _, _ in parsed}
+    student_classes = {
+        student_code: (standard, section, academic_year)
+        for student_code, standard, section, academic_year in Student.objects.filter(student_code__in=codes)
+        .values_list('student_code', 'standard', 'section', 'academic_year')
+    }
+    known_codes = set(student_classes)
+
+    for index, student_code, _, _ in parsed:
+        if student_code not in known_codes:
+            errors.append({"row": index, "student": student_code, "detail": f"Student with student_code {student_code} does not exist."})
+
+    if errors:
+        return [], sorted(errors, key=lambda error: error["row"])
+
+    # The last record wins when the same (student, date) appears twice in one payload.
+    rows = {}
+    for index, student_code, day, status_value in parsed:
+        rows[(student_code, day)] = status_value
+
+    with transaction.atomic():
+        # Lock the students first so a concurrent roll-call for the same students waits
+        # here, then read the current rows: counter deltas derived from a stale read drift.
+        list(Student.objects.select_for_update().filter(student_code__in=codes).order_by('pk').values_list('pk', flat=True))
+        existing = {
+            (student_code, day): previous_status
+            for student_code, day, previous_status in Attendance.objects.filter(student_id__in=codes, date__in={day for _, day in rows})
+            .values_list('student_id', 'date', 'status')
+        }
+
+        deltas = defaultdict(lambda: [0, 0])
+        for (student_code, day), status_value in rows.items():
+            previous_status = existing.get((student_code, day))
+            deltas[student_code][0] += (status_value == 'present') - (previous_status == 'present')
+            deltas[student_code][1] += previous_status is None
+
+        Attendance.objects.bulk_create(
+            [Attendance(student_id=student_code, date=day, status=status_value) for (student_code, day), status_value in rows.items()],
+            update_conflicts=True,
+            unique_fields=['student', 'date'],
+            update_fields=['status', 'last_updated'],
+        )
+        apply_attendance_deltas(deltas)
+        refresh_daily_rollups(rows, student_classes)
+        # bulk_create sends no post_save, so bump the resource versions explicitly
+        bump_versions(['features.attendance'] + [
+            resource_key('features.attendance', class_scope(*student_classes[student_code])) for student_code, _ in rows
+        ])
+
+    results = [
+        {
+            "student": student_code,
+            "date": day.isoformat(),
+            "status": status_value,
+            "result": "updated" if (student_code, day) in existing else "created",
+        }
+        for _, student_code, day, status_value in parsed
+    ]
+    return results, []
+
+
+def attendance_percent_expression():
+    """attendance_percent from the stored counters, rounded to the nearest integer."""
+    return Case(
+        When(attendance_total=0, then=Value(0)),
+        default=(F('attendance_present') * 200 + F('attendance_total')) / (F('attendance_total') * 2),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _delta_case(deltas, index):
+    # One WHEN per distinct delta rather than per student keeps the statement small
+    by_value = defaultdict(list)
+    for student_code, delta in deltas.items():
+        if delta[index]:
+            by_value[delta[index]].append(student_code)
+    return Case(
+        *[When(student_code__in=codes, then=Value(value)) for value, codes in by_value.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def apply_attendance_deltas(deltas):
+    """
+    Add {student_code: (present delta, total delta)} to the students' attendance counters
+    and refresh attendance_percent, in two UPDATE statements however many students changed.
+    """
+    deltas = {student_code: delta for student_code, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    students = Student.objects.filter(student_code__in=deltas)
+    students.update(
+        attendance_present=F('attendance_present') + _delta_case(deltas, 0),
+        attendance_total=F('attendance_total') + _delta_case(deltas, 1),
+    )
+    # Separate statement: within one UPDATE, F() reads the pre-update counters
+    students.update(attendance_percent=attendance_percent_expression(), last_updated=timezone.now())
+    # No accounts.student bump: every caller also writes attendance and bumps
+    # features.attendance, which the views showing attendance_percent list as well.
+
+
+def rebuild_attendance_counters(student_codes=None):
+    """
+    Recompute the attendance counters from the Attendance table, for every student or only
+    for `student_codes`. Returns the number of students updated.
+    """
+    students = Student.objects.all() if student_codes is None else Student.objects.filter(student_code__in=student_codes)
+    counts = Attendance.objects.filter(student_id=OuterRef('student_code')).values('student_id')
+    updated = students.update(
+        attendance_present=Coalesce(Subquery(counts.annotate(n=Count('id', filter=Q(status='present'))).values('n')), 0),
+        attendance_total=Coalesce(Subquery(counts.annotate(n=Count('id')).values('n')), 0),
+    )
+    students.update(attendance_percent=attendance_percent_expression(), last_updated=timezone.now())
+    bump_versions(['features.attendance'])
+    return updated
+
+
+def refresh_daily_rollups(student_dates, student_classes=None):
+    """
+    Recompute the AttendanceDailyRollup rows touched by attendance of the given
+    (student_code, date) pairs: one aggregate query over those classes and dates and one
+    upsert. `student_classes` ({student_code: (standard, section, academic_year)}) saves
+    the class lookup when the caller already has it.
+    """
+    student_dates = set(student_dates)
+    if not student_dates:
+        return
+    if student_classes is None:
+        student_classes = {
+            student_code: (standard, section, academic_year)
+            for student_code, standard, section, academic_year in Student.objects.filter(
+                student_code__in={student_code for student_code, _ in student_dates}
+            ).values_list('student_code', 'standard', 'section', 'academic_year')
+        }
+
+    dates_by_class = defaultdict(set)
+    for student_code, day in student_dates:
+        if student_code in student_classes:
+            dates_by_class[student_classes[student_code]].add(day)
+    if not dates_by_class:
+        return
+
+    condition = Q()
+    for (standard, section, academic_year), days in dates_by_class.items():
+        condition |= Q(student__standard=standard, student__section=section, student__academic_year=academic_year, date__in=days)
+    totals = {
+        (row['student__standard'], row['student__section'] or '', row['student__academic_year'], row['date']): (row['present'], row['absent'])
+        for row in Attendance.objects.filter(condition)
+        .values('student__standard', 'student__section', 'student__academic_year', 'date')
+        .annotate(present=Count('id', filter=Q(status='present')), absent=Count('id', filter=Q(status='absent')))
+    }
+
+    rollups, emptied = [], Q()
+    for (standard, section, academic_year), days in dates_by_class.items():
+        for day in days:
+            key = (standard, section or '', academic_year, day)
+            if key not in totals:  # every attendance row of that class and day was deleted
+                emptied |= Q(standard=standard, section=section or '', academic_year=academic_year, date=day)
+                continue
+            present, absent = totals[key]
+            rollups.append(AttendanceDailyRollup(
+                standard=standard, section=section or '', academic_year=academic_year, date=day,
+                present_count=present, absent_count=absent,
+            ))
+    if rollups:
+        AttendanceDailyRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['standard', 'section', 'academic_year', 'date'],
+            update_fields=['present_count', 'absent_count', 'last_updated'],
+        )
+    if emptied:
+        AttendanceDailyRollup.objects.filter(emptied).delete()
+
+
+def rebuild_daily_rollups():
+    """Rebuild every AttendanceDailyRollup row from the Attendance table. Returns the number of rows."""
+    with transaction.atomic():
+        AttendanceDailyRollup.objects.all().delete()
+        rollups = [
+            AttendanceDailyRollup(
+                standard=row['student__standard'], section=row['student__section'] or '',
+                academic_year=row['student__academic_year'], date=row['date'],
+                present_count=row['present'], absent_count=row['absent'],
+            )
+            for row in Attendance.objects.values('student__standard', 'student__section', 'student__academic_year', 'date')
+            .annotate(present=Count('id', filter=Q(status='present')), absent=Count('id', filter=Q(status='absent')))
+            .order_by()
+        ]
+        AttendanceDailyRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+def _remember_previous_attendance(sender, instance, **kwargs):
+    instance._previous_attendance = None
+    if not instance._state.adding and instance.pk:
+        instance._previous_attendance = Attendance.objects.filter(pk=instance.pk).values_list('student_id', 'date', 'status').first()
+
+
+def _attendance_saved(sender, instance, **kwargs):
+    deltas = defaultdict(lambda: [0, 0])
+    student_dates = {(instance.student_id, instance.date)}
+    previous = getattr(instance, '_previous_attendance', None)
+    if previous:
+        previous_student, previous_date, previous_status = previous
+        deltas[previous_student][0] -= previous_status == 'present'
+        deltas[previous_student][1] -= 1
+        student_dates.add((previous_student, previous_date))
+    deltas[instance.student_id][0] += instance.status == 'present'
+    deltas[instance.student_id][1] += 1
+    apply_attendance_deltas(deltas)
+    refresh_daily_rollups(student_dates)
+
+
+def _attendance_deleted(sender, instance, **kwargs):
+    apply_attendance_deltas({instance.student_id: (-(instance.status == 'present'), -1)})
+    refresh_daily_rollups({(instance.student_id, instance.date)})
+
+
+def _attendance_bulk_written(sender, instances, **kwargs):
+    rebuild_attendance_counters({instance.student_id for instance in instances})
+    refresh_daily_rollups({(instance.student_id, instance.date) for instance in instances})
+
+
+def connect_attendance_aggregate_signals():
+    """Keep attendance counters and daily rollups current on single-row saves, deletes and bulk imports."""
+    pre_save.connect(_remember_previous_attendance, sender=Attendance, dispatch_uid="attendance-aggregate-pre-save")
+    post_save.connect(_attendance_saved, sender=Attendance, dispatch_uid="attendance-aggregate-save")
+    post_delete.connect(_attendance_deleted, sender=Attendance, dispatch_uid="attendance-aggregate-delete")
+    post_bulk_write.connect(_attendance_bulk_written, sender=Attendance, dispatch_uid="attendance-aggregate-bulk")
@@ -0,0 +1,66 @@
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import AuthUser, Student
+from features.models import AttendanceDailyRollup, AttendanceLock
+
+SNAPSHOT_KEY = "dashboard:snapshot"
+
+
+def compute_dashboard_snapshot():
+    """Totals in one aggregate query, plus the per-class breakdown and today's attendance state."""
+    today = date.today()
+    totals = AuthUser.objects.aggregate(
+        total_students=Count('student_profile'),
+        total_unverified_accounts=Count('id', filter=Q(is_verified=False)),
+        total_teachers=Count('faculty_profile'),
+    )
+    attendance_today = {
+        (rollup.standard, rollup.section, rollup.academic_year): rollup
+        for rollup in AttendanceDailyRollup.objects.filter(date=today)
+    }
+    classes = []
+    for row in Student.objects.values('standard', 'section', 'academic_year').annotate(students=Count('id')).order_by(
+        'academic_year', 'standard', 'section'
+    ):
+        rollup = attendance_today.get((row['standard'], row['section'] or '', row['academic_year']))
+        classes.append({
+            **row,
+            "present_today": rollup.present_count if rollup else 0,
+            "absent_today": rollup.absent_count if rollup else 0,
+        })
+    locks = AttendanceLock.objects.filter(date=today).aggregate(
+        exists=Count('id'), locked=Count('id', filter=Q(is_locked=True))
+    )
+    return {
+        **totals,
+        "classes": classes,
+        "attendance_lock": {"date": today.isoformat(), "exists": bool(locks['exists']), "is_locked": bool(locks['locked'])},
+        "generated_at": timezone.now().isoformat(),
+    }
+
+
+def get_dashboard_snapshot():
+    """
+    The office dashboard as (data, etag), cached for DASHBOARD_CACHE_TTL seconds. The ETag
+    covers everything but generated_at, so a rebuild of unchanged data keeps it. The
+    snapshot is only ever recomputed, never patched, so with a per-process cache each
+    worker may lag the database by at most the TTL but never drifts further.
+    """
+    cached = cache.get(SNAPSHOT_KEY)
+    if cached is not None:
+        return cached
+
+    data = compute_dashboard_snapshot()
+    # generated_at changes on every rebuild; hashing it would change the ETag of unchanged data
+    payload = {key: value for key, value in data.items() if key != "generated_at"}
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    cached = (data, f'"d{digest[:32]}"')
+    cache.set(SNAPSHOT_KEY, cached, settings.DASHBOARD_CACHE_TTL)
+    return cached
@@ -0,0 +1,156 @@
+import ast
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal
+
+from accounts.models import AuthUser, Student
+from general.signals import post_bulk_write
+from general.utils.versioning import bump_versions, class_scope, get_versions, resource_key
+
+CLASS_FIELDS = ('standard', 'section', 'academic_year')
+
+# Sent when students join or leave classes, inside the writing transaction.
+# Arguments: sender (Student), classes (set of (standard, section, academic_year)).
+roster_changed = Signal()
+
+
+def parse_class(value):
+    """
+    Parse a class parameter into (standard, section, academic_year).
+
+    Accepts the list literal clients already send (`['7', 'C', '2024-2025']`) and the
+    plain form `7,C,2024-2025`. Only literals are evaluated. Raises ValueError.
+    """
+    value = (value or '').strip()
+    if value.startswith(('[', '(')):
+        try:
+            parts = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            raise ValueError(f"{value!r} is not a valid class.")
+        if not isinstance(parts, (list, tuple)):
+            raise ValueError(f"{value!r} is not a valid class.")
+    else:
+        parts = value.split(',')
+    if len(parts) != 3:
+        raise ValueError(f"{value!r} is not a valid class.")
+    standard, section, academic_year = (str(part).strip() for part in parts)
+    if not standard.isdigit() or not academic_year:
+        raise ValueError(f"{value!r} is not a valid class.")
+    return int(standard), section, academic_year
+
+
+def roster_resource(standard, section, academic_year):
+    """
+    Version key of one class's roster, bumped when students join or leave the class or a
+    member's username changes. Views serving rosters list it in their version resources.
+    """
+    return resource_key('accounts.roster', class_scope(standard, section or '', academic_year))
+
+
+def roster_key(standard, section, academic_year, version):
+    return f"roster:{version}:{standard}:{section or ''}:{academic_year}"
+
+
+def class_filter(standard, section, academic_year):
+    # Students without a section are stored as NULL or ''
+    section_filter = Q(section__isnull=True) | Q(section='') if not section else Q(section=section)
+    return Q(standard=standard, academic_year=academic_year) & section_filter
+
+
+def get_rosters(classes):
+    """
+    Rosters of several classes: {(standard, section, academic_year): [{"student_code", "user__username"}, ...]}.
+
+    Each cached roster is keyed by its class's roster version (see roster_resource), so a
+    change in any process makes every worker's cached copy unreachable even with a
+    per-process cache, while other classes keep theirs. After one version query, cached
+    rosters are read with one cache round trip; the missing ones are loaded together in
+    one query (served by the student_class_idx index) and cached for ROSTER_CACHE_TTL
+    seconds.
+    """
+    classes = list(dict.fromkeys(classes))
+    versions = get_versions([roster_resource(*student_class) for student_class in classes])
+
+    def key_of(student_class):
+        version, _ = versions.get(roster_resource(*student_class), (0, None))
+        return roster_key(*student_class, version)
+
+    keys = {key_of(student_class): student_class for student_class in classes}
+    cached = cache.get_many(list(keys))
+    rosters = {keys[key]: roster for key, roster in cached.items()}
+
+    missing = [student_class for student_class in classes if student_class not in rosters]
+    if missing:
+        loaded = {student_class: [] for student_class in missing}
+        by_class = {class_scope(standard, section or '', academic_year): (standard, section, academic_year)
+                    for standard, section, academic_year in missing}
+        students = (
+            Student.objects.filter(reduce(or_, (class_filter(*student_class) for student_class in missing)))
+            .order_by('student_code')
+            .values_list(*CLASS_FIELDS, 'student_code', 'user__username')
+        )
+        for standard, section, academic_year, student_code, username in students:
+            student_class = by_class[class_scope(standard, section or '', academic_year)]
+            loaded[student_class].append({"student_code": student_code, "user__username": username})
+        cache.set_many({key_of(student_class): roster for student_class, roster in loaded.items()},
+                       settings.ROSTER_CACHE_TTL)
+        rosters.update(loaded)
+    return rosters
+
+
+def get_roster(standard, section, academic_year):
+    """The class roster, ordered by student code."""
+    return get_rosters([(standard, section, academic_year)])[(standard, section, academic_year)]
+
+
+def _students_changed(classes):
+    """Students joined or left these classes."""
+    classes = set(classes)
+    bump_versions(roster_resource(*student_class) for student_class in classes)
+    roster_changed.send(sender=Student, classes=classes)
+
+
+def _remember_class(sender, instance, update_fields=None, **kwargs):
+    instance._previous_class = None
+    if instance._state.adding or (update_fields is not None and not set(CLASS_FIELDS) & set(update_fields)):
+        return
+    instance._previous_class = Student.objects.filter(pk=instance.pk).values_list(*CLASS_FIELDS).first()
+
+
+def _student_saved(sender, instance, created, **kwargs):
+    current = tuple(getattr(instance, field) for field in CLASS_FIELDS)
+    previous = getattr(instance, '_previous_class', None)
+    # Saves that leave the class as it was (counters, image, subjects) are not roster changes
+    if created:
+        _students_changed([current])
+    elif previous is not None and previous != current:
+        _students_changed([current, previous])
+
+
+def _student_deleted(sender, instance, **kwargs):
+    _students_changed([tuple(getattr(instance, field) for field in CLASS_FIELDS)])
+
+
+def _students_bulk_written(sender, instances, **kwargs):
+    _students_changed(tuple(getattr(instance, field) for field in CLASS_FIELDS) for instance in instances)
+
+
+def _user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Rosters carry the username
+    if created or instance.role != 'student' or (update_fields is not None and 'username' not in update_fields):
+        return
+    bump_versions(roster_resource(*student_class)
+                  for student_class in Student.objects.filter(user_id=instance.pk).values_list(*CLASS_FIELDS))
+
+
+def connect_roster_signals():
+    pre_save.connect(_remember_class, sender=Student, dispatch_uid="roster-student-pre-save")
+    post_save.connect(_student_saved, sender=Student, dispatch_uid="roster-student-save")
+    post_delete.connect(_student_deleted, sender=Student, dispatch_uid="roster-student-delete")
+    post_bulk_write.connect(_students_bulk_written, sender=Student, dispatch_uid="roster-student-bulk")
+    post_save.connect(_user_saved, sender=AuthUser, dispatch_uid="roster-user-save")
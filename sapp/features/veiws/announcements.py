@@ -8,6 +8,9 @@ from features.models import Announcement
 from features.serializers import AnnouncementMainSerializer,AnnouncementDetailedSerializer
 
 from general.utils.permissions import IsFaculty,IsOfficeAdmin,IsStudent
+from general.utils.query_filter import SyncTokenMixin, delta_response
+from general.utils.streaming import get_stream_format, stream_queryset
+from general.utils.versioning import ResourceVersionMixin
 
 
 class AnnouncementMainDisplayView(APIView):
@@ -23,12 +26,13 @@ class AnnouncementMainDisplayView(APIView):
         return Response({"message": "No active announcements at the moment."}, status=status.HTTP_404_NOT_FOUND)
     
 
-class AnnouncementView(APIView):
+class AnnouncementView(ResourceVersionMixin, SyncTokenMixin, APIView):
     """
     POST: Create a new announcement (only office_admin role).
     GET: Fetch a detailed list of all announcements or an individual announcement by ID.
     DELETE: Delete an announcement by ID (only office_admin role).
     """
+    version_resources = ['features.announcement']
 
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
@@ -66,6 +70,15 @@ class AnnouncementView(APIView):
         else:
             # Fetch all announcements (list view)
             announcements = Announcement.objects.all()
+
+            delta = delta_response(request, announcements, AnnouncementDetailedSerializer)
+            if delta is not None:
+                return delta
+
+            stream_format = get_stream_format(request)
+            if stream_format:
+                return stream_queryset(announcements.order_by('-date', 'id'), AnnouncementDetailedSerializer, stream_format)
+
             serializer = AnnouncementDetailedSerializer(announcements, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -3,12 +3,15 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from general.utils.permissions import IsFaculty, IsStudent
+from general.utils.query_filter import DeltaSyncMixin
+from general.utils.streaming import StreamingListMixin
 from features.models import Assignment
 from features.serializers import AssignmentSerializer
 from accounts.models import Faculty
+from general.utils.versioning import ResourceVersionMixin
 
 
-class AssignmentViewSet(viewsets.ModelViewSet):
+class AssignmentViewSet(ResourceVersionMixin, DeltaSyncMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing assignments:
     - Faculty can **create, update, and delete** assignments.
@@ -20,6 +23,7 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = None
     lookup_field = "id"
+    version_resources = ['features.assignment']
 
     def get_permissions(self):
         """Set permissions dynamically for each action."""
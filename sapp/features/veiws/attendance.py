@@ -3,12 +3,21 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from datetime import date
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils.dateparse import parse_date
 from accounts.models import Student
-from features.models import Attendance,AttendanceLock
+from features.models import Attendance,AttendanceLock,AttendanceDailyRollup
 
 from features.serializers import AttendanceLockSerializer, AttendanceSerializer
+from features.utils.attendance import bulk_upsert_attendance
+from features.utils.roster import roster_resource
 
 from general.utils.permissions import IsFaculty,IsOfficeAdmin, IsStudent
+from general.utils.pagination import KeysetPagination
+from general.utils.query_filter import SyncTokenMixin, delta_response, student_scope
+from general.utils.streaming import get_stream_format, stream_queryset
+from general.utils.versioning import ResourceVersionMixin, class_scope, resource_key
 
 
 class AttendanceLockView(APIView):
@@ -91,7 +100,9 @@ class AttendanceLockView(APIView):
             return Response({"detail": "Attendance lock for this date does not exist."}, status=status.HTTP_404_NOT_FOUND)
         
 
-class AttendanceDaysView(APIView):
+class AttendanceDaysView(ResourceVersionMixin, APIView):
+    version_resources = ['features.attendancelock']
+
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
         return [IsAuthenticated(), permissions.OR(IsFaculty(), IsOfficeAdmin())]  # Only Faculty & Office Admin can access
@@ -116,7 +127,16 @@ class AttendanceDaysView(APIView):
     
     
 
-class AttendanceView(APIView):
+class AttendanceView(ResourceVersionMixin, SyncTokenMixin, APIView):
+    @classmethod
+    def get_version_resources(cls, request, kwargs):
+        """A class listing only changes with that class's attendance or its roster (students moving in or out)."""
+        params = request.GET
+        if params.get("standard") and params.get("section") and params.get("academic_year") and not params.get("email"):
+            student_class = (params["standard"], params["section"], params["academic_year"])
+            return [resource_key('features.attendance', class_scope(*student_class)), roster_resource(*student_class)]
+        return ['features.attendance', 'accounts.student']
+
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
         if self.request.method == "POST" or self.request.method == "PUT":
@@ -135,25 +155,13 @@ class AttendanceView(APIView):
                             status=status.HTTP_403_FORBIDDEN)
 
         if isinstance(request.data, list):
-            attendance_objects = []
-
-            for record in request.data:
-                student_code = record.get("student")
-                date = record.get("date")
-                status_value = record.get("status")
-
-                try:
-                    student = Student.objects.get(student_code=student_code)
-                except Student.DoesNotExist:
-                    return Response({"detail": f"Student with student_code {student_code} does not exist."}, 
-                                     status=status.HTTP_400_BAD_REQUEST)
+            results, errors = bulk_upsert_attendance(request.data)
+            if errors:
+                return Response({"detail": "Attendance records were not saved.", "errors": errors},
+                                status=status.HTTP_400_BAD_REQUEST)
 
-                attendance = Attendance(student=student, date=date, status=status_value)
-                attendance_objects.append(attendance)
-
-            Attendance.objects.bulk_create(attendance_objects)
-
-            return Response({"message": "Attendance records created successfully"}, status=status.HTTP_201_CREATED)
+            return Response({"message": "Attendance records created successfully", "results": results},
+                            status=status.HTTP_201_CREATED)
 
         return Response({"detail": "Invalid data format. Expected a list of attendance records."}, 
                         status=status.HTTP_400_BAD_REQUEST)
@@ -172,16 +180,58 @@ class AttendanceView(APIView):
         section = request.query_params.get("section")
         academic_year = request.query_params.get("academic_year")
 
+        date_from_param = request.query_params.get("date_from")
+        date_to_param = request.query_params.get("date_to")
+        try:
+            date_from = parse_date(date_from_param) if date_from_param else None
+            date_to = parse_date(date_to_param) if date_to_param else None
+            if (date_from_param and not date_from) or (date_to_param and not date_to):
+                raise ValueError
+        except ValueError:
+            return Response({"detail": "date_from and date_to must be valid dates in YYYY-MM-DD format."}, 
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if standard and not standard.isdigit():
+            return Response({"detail": "standard must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
         if email:
             if email != request.user.email:
                 return Response({"detail": "You are not authorized to access this student's attendance."}, 
                                 status=status.HTTP_403_FORBIDDEN)
 
-            attendance = Attendance.objects.filter(student__student_code__startswith=email)
+            attendance = Attendance.objects.filter(student__user=request.user)
+            student = getattr(request.user, "student_profile", None)
+            delta_scope = student_scope(student.student_code) if student else None
         elif standard and section and academic_year:
-            attendance = Attendance.objects.filter(student__student_code__endswith=f"-{standard}-{section}-{academic_year}")
+            attendance = Attendance.objects.filter(
+                student__standard=standard,
+                student__section=section,
+                student__academic_year=academic_year,
+            )
+            delta_scope = class_scope(standard, section, academic_year)
         else:
             attendance = Attendance.objects.all()
+            delta_scope = None
+
+        if date_from:
+            attendance = attendance.filter(date__gte=date_from)
+        if date_to:
+            attendance = attendance.filter(date__lte=date_to)
+
+        attendance = attendance.order_by('student', '-date')
+
+        delta = delta_response(request, attendance, AttendanceSerializer, scope=delta_scope)
+        if delta is not None:
+            return delta
+
+        stream_format = get_stream_format(request)
+        if stream_format:
+            return stream_queryset(attendance, AttendanceSerializer, stream_format)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(attendance, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(AttendanceSerializer(page, many=True).data)
 
         serializer = AttendanceSerializer(attendance, many=True)
         return Response(serializer.data)
@@ -195,33 +245,135 @@ class AttendanceView(APIView):
                             status=status.HTTP_403_FORBIDDEN)
 
         if isinstance(request.data, list):
-            updated_data = []
-            for record in request.data:
-                student_code = record.get("student_code")
-                date = record.get("date")
-                status = record.get("status")
-
-                try:
-                    student = Student.objects.get(student_code=student_code)
-                except Student.DoesNotExist:
-                    return Response({"detail": f"Student with student_code {student_code} does not exist."}, 
-                                    status=status.HTTP_400_BAD_REQUEST)
-
-                attendance = Attendance.objects.filter(student=student, date=date).first()
-                if attendance:
-                    attendance.status = status
-                    attendance.save()
-                    updated_data.append(AttendanceSerializer(attendance).data)
-                else:
-                    attendance_data = {"student": student.id, "date": date, "status": status}
-                    serializer = AttendanceSerializer(data=attendance_data)
-                    if serializer.is_valid():
-                        serializer.save()
-                        updated_data.append(serializer.data)
-                    else:
-                        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-            return Response(updated_data, status=status.HTTP_200_OK)
+            results, errors = bulk_upsert_attendance(request.data)
+            if errors:
+                return Response({"detail": "Attendance records were not saved.", "errors": errors},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            # Same shape as before the bulk path: the serialized record for every input row
+            written = {
+                (attendance.student_id, attendance.date.isoformat()): attendance
+                for attendance in Attendance.objects.filter(
+                    student_id__in={result["student"] for result in results},
+                    date__in={result["date"] for result in results},
+                )
+            }
+            serializer = AttendanceSerializer([written[result["student"], result["date"]] for result in results], many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response({"detail": "Invalid data format. Expected a list of attendance records."}, 
                         status=status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceAnalyticsView(ResourceVersionMixin, APIView):
+    """
+    Attendance summaries served from the daily rollup table.
+
+    Class summaries (faculty and office admins): filter with `standard`, `section` and
+    `academic_year` (any subset; each result row names its class), `date_from`/`date_to`,
+    and `group_by=day` (default) or `month`.
+
+    Student summaries: `student=<student_code>` returns that student's present/absent
+    totals over the date range. Students may only ask for their own.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @classmethod
+    def get_version_resources(cls, request, kwargs):
+        params = request.GET
+        if params.get("standard") and params.get("section") and params.get("academic_year") and not params.get("student"):
+            return [resource_key('features.attendance', class_scope(params["standard"], params["section"], params["academic_year"]))]
+        return ['features.attendance']
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            date_from = parse_date(params["date_from"]) if params.get("date_from") else None
+            date_to = parse_date(params["date_to"]) if params.get("date_to") else None
+            if (params.get("date_from") and not date_from) or (params.get("date_to") and not date_to):
+                raise ValueError
+        except ValueError:
+            return Response({"detail": "date_from and date_to must be valid dates in YYYY-MM-DD format."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if params.get("student"):
+            return self.student_summary(request, params["student"], date_from, date_to)
+
+        if request.user.role not in ("faculty", "so_admin"):
+            return Response({"detail": "Access denied. You do not have permission to view class attendance analytics."},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        group_by = params.get("group_by", "day")
+        if group_by not in ("day", "month"):
+            return Response({"detail": "group_by must be 'day' or 'month'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if params.get("standard") and not params["standard"].isdigit():
+            return Response({"detail": "standard must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = AttendanceDailyRollup.objects.all()
+        for field in ("standard", "section", "academic_year"):
+            if params.get(field):
+                rollups = rollups.filter(**{field: params[field]})
+        if date_from:
+            rollups = rollups.filter(date__gte=date_from)
+        if date_to:
+            rollups = rollups.filter(date__lte=date_to)
+
+        period = TruncMonth('date') if group_by == "month" else F('date')
+        rows = (
+            rollups.annotate(period=period)
+            .values('standard', 'section', 'academic_year', 'period')
+            .annotate(present=Sum('present_count'), absent=Sum('absent_count'), last_updated=Max('last_updated'))
+            .order_by('standard', 'section', 'academic_year', 'period')
+        )
+        return Response({
+            "group_by": group_by,
+            "results": [
+                {
+                    "standard": row["standard"],
+                    "section": row["section"],
+                    "academic_year": row["academic_year"],
+                    "period": row["period"].strftime("%Y-%m" if group_by == "month" else "%Y-%m-%d"),
+                    **self.totals(row["present"], row["absent"]),
+                    "last_updated": row["last_updated"],
+                }
+                for row in rows
+            ],
+        })
+
+    def student_summary(self, request, student_code, date_from, date_to):
+        if request.user.role == "student":
+            if not Student.objects.filter(student_code=student_code, user=request.user).exists():
+                return Response({"detail": "You are not authorized to access this student's attendance."},
+                                status=status.HTTP_403_FORBIDDEN)
+        elif request.user.role not in ("faculty", "so_admin"):
+            return Response({"detail": "Access denied."}, status=status.HTTP_403_FORBIDDEN)
+
+        # Served by the (student, -date) index
+        attendance = Attendance.objects.filter(student_id=student_code)
+        if date_from:
+            attendance = attendance.filter(date__gte=date_from)
+        if date_to:
+            attendance = attendance.filter(date__lte=date_to)
+        counts = attendance.aggregate(
+            present=Count('id', filter=Q(status='present')),
+            absent=Count('id', filter=Q(status='absent')),
+            last_updated=Max('last_updated'),
+        )
+        return Response({
+            "student": student_code,
+            "date_from": date_from,
+            "date_to": date_to,
+            **self.totals(counts["present"], counts["absent"]),
+            "last_updated": counts["last_updated"],
+        })
+
+    @staticmethod
+    def totals(present, absent):
+        total = present + absent
+        return {
+            "present": present,
+            "absent": absent,
+            "total": total,
+            "percent": round(present * 100 / total, 2) if total else 0,
+        }
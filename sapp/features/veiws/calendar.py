@@ -7,12 +7,16 @@ from features.models import CalendarEvent
 from features.serializers import CalendarEventSerializer
 
 from general.utils.permissions import IsFaculty,IsOfficeAdmin,IsStudent
+from general.utils.query_filter import SyncTokenMixin, delta_response
+from general.utils.streaming import get_stream_format, stream_queryset
+from general.utils.versioning import ResourceVersionMixin
 
 
 
 
-class CalendarEventView(APIView):
+class CalendarEventView(ResourceVersionMixin, SyncTokenMixin, APIView):
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    version_resources = ['features.calendarevent']
 
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
@@ -32,6 +36,15 @@ class CalendarEventView(APIView):
         """
         try:
             events = CalendarEvent.objects.all()
+
+            delta = delta_response(request, events, CalendarEventSerializer)
+            if delta is not None:
+                return delta
+
+            stream_format = get_stream_format(request)
+            if stream_format:
+                return stream_queryset(events.order_by('event_date', 'id'), CalendarEventSerializer, stream_format)
+
             serializer = CalendarEventSerializer(events, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
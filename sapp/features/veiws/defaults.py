@@ -3,48 +3,80 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from accounts.models import Student,Faculty, AuthUser
 from rest_framework import status
+from django.http import HttpResponseNotModified
+
+from features.utils.dashboard import get_dashboard_snapshot
+from features.utils.roster import get_rosters, parse_class, roster_resource
+from general.utils.pagination import CustomPagination
+from general.utils.versioning import ResourceVersionMixin
 
 class AdminDashboardAPIView(APIView):
+    """
+    Office dashboard served from a cached snapshot (see features/utils/dashboard.py):
+    totals, students and today's attendance per class, and today's attendance lock.
+    The response carries an ETag derived from the snapshot, so unchanged polls get a 304
+    without touching the database.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        total_students = Student.objects.count()
-        total_verified_accounts = AuthUser.objects.filter(is_verified=False).count()  # Assuming 'is_verified' field
-        total_teachers = Faculty.objects.count()
-        #total_complaints = Complaint.objects.count()
-
-        data = {
-            "total_students": total_students,
-            "total_unverified_accounts": total_verified_accounts,
-            "total_teachers": total_teachers,
-            #"total_complaints": total_complaints,
-        }
-
-        return Response(data)
+        data, etag = get_dashboard_snapshot()
+
+        client_etags = request.headers.get("If-None-Match", "")
+        if etag in [tag.strip().removeprefix("W/") for tag in client_etags.split(",")]:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+        response = Response(data)
+        response["ETag"] = etag
+        return response
     
     
-class FilterStudentsView(APIView):
+class FilterStudentsView(ResourceVersionMixin, APIView):
+    """
+    Class rosters (student_code and username) from the cached roster service.
+
+    `class` is `['7', 'C', '2024-2025']` or `7,C,2024-2025`. Repeat the parameter to fetch
+    several classes at once; the response is then a list of {"class", "students"} objects.
+    A single class returns the plain list, paginated when `page` is given.
+    """
     permission_classes = [IsAuthenticated]
+    version_resources = ['accounts.student', 'accounts.authuser']
+
+    @classmethod
+    def get_version_resources(cls, request, kwargs):
+        """Only the requested classes' rosters; malformed requests fall back to the global keys."""
+        try:
+            return [roster_resource(*parse_class(value)) for value in request.GET.getlist('class')] or cls.version_resources
+        except ValueError:
+            return cls.version_resources
 
     def get(self, request, *args, **kwargs):
-        """Filter students based on standard and section."""
-        # Get the standard and section from the request query parameters
-        standard_section_academicyear = request.query_params.get('class', None)
+        """Filter students based on standard, section and academic year."""
+        class_params = request.query_params.getlist('class')
 
         # Validate the input
-        if not standard_section_academicyear:
+        if not class_params:
             return Response({"error": "class parameter is required. Format: ['7', 'C', '2024-2025']"},
                             status=status.HTTP_400_BAD_REQUEST)
         try:
-            standard, section, academic_year = eval(standard_section_academicyear)  # Safely parse the input list
-            if not (isinstance(standard, str) and isinstance(section, str)):
-                raise ValueError
-        except (ValueError, SyntaxError):
-            return Response({"error": "Invalid format for class. Format should be ['standard', 'section']"},
+            classes = [parse_class(value) for value in class_params]
+        except ValueError:
+            return Response({"error": "Invalid format for class. Format should be ['standard', 'section', 'academic_year']"},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        # Query the students based on standard and section
-        students = Student.objects.filter(standard=standard, section=section,academic_year=academic_year).values('student_code', 'user__username')
-        
-        # Return the filtered students
-        return Response(list(students), status=status.HTTP_200_OK)
+        rosters = get_rosters(classes)
+        if len(classes) > 1:
+            return Response([
+                {"class": [str(standard), section, academic_year], "students": rosters[(standard, section, academic_year)]}
+                for standard, section, academic_year in dict.fromkeys(classes)
+            ], status=status.HTTP_200_OK)
+
+        students = rosters[classes[0]]
+        if 'page' in request.query_params:
+            paginator = CustomPagination()
+            page = paginator.paginate_queryset(students, request, view=self)
+            return paginator.get_paginated_response(page)
+
+        return Response(students, status=status.HTTP_200_OK)
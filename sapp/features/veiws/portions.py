@@ -1,12 +1,15 @@
 from rest_framework import viewsets,permissions
 from rest_framework.permissions import IsAuthenticated
 from general.utils.permissions import IsFaculty, IsStudent
+from general.utils.query_filter import DeltaSyncMixin
+from general.utils.streaming import StreamingListMixin
 
 from ..models import Portion
 from ..serializers import PortionSerializer
+from general.utils.versioning import ResourceVersionMixin
 
 
-class PortionViewSet(viewsets.ModelViewSet):
+class PortionViewSet(ResourceVersionMixin, DeltaSyncMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Portions:
     - Students **must** filter by both `standard` and `academic_year`.
@@ -16,6 +19,7 @@ class PortionViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = None
     lookup_field = "id"
+    version_resources = ['features.portion']
 
     def get_permissions(self):
         """Set permissions dynamically based on action."""
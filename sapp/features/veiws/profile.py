@@ -9,11 +9,13 @@ from accounts.models import Student, Faculty
 from features.serializers import StudentProfileSerializer,FacultyProfileSerializer, SOProfileSerializer
 
 from general.utils.permissions import IsFaculty,IsOfficeAdmin,IsStudent
+from general.utils.versioning import ResourceVersionMixin
 
 
 
-class StudentProfileView(APIView):
+class StudentProfileView(ResourceVersionMixin, APIView):
     permission_classes = [IsAuthenticated]
+    version_resources = ['accounts.student', 'accounts.authuser', 'features.attendance']  # attendance_percent
 
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
@@ -50,7 +52,7 @@ class StudentProfileView(APIView):
         except Student.DoesNotExist:
             return Response({"error": "Student not found."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = StudentProfileSerializer(student, data=request.data, partial=True)
+        serializer = StudentProfileSerializer(student, data=request.data, partial=True, context={"request": request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -68,9 +70,10 @@ class StudentProfileView(APIView):
         return Response(serializer.data)
 '''
 
-class FacultyProfileView(APIView):
+class FacultyProfileView(ResourceVersionMixin, APIView):
     
     permission_classes = [IsAuthenticated, IsFaculty]
+    version_resources = ['accounts.faculty', 'accounts.authuser']
         
 
     def get(self, request, *args, **kwargs):
@@ -82,7 +85,7 @@ class FacultyProfileView(APIView):
     def patch(self, request, *args, **kwargs):
         """Update the profile data for the logged-in faculty and user."""
         faculty = Faculty.objects.get(user=request.user)
-        serializer = FacultyProfileSerializer(faculty, data=request.data, partial=True)
+        serializer = FacultyProfileSerializer(faculty, data=request.data, partial=True, context={"request": request})
 
         if serializer.is_valid():
             # Save the updated data
@@ -94,8 +97,9 @@ class FacultyProfileView(APIView):
         # Return errors if any occur during validation
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class SOProfileView(APIView):
+class SOProfileView(ResourceVersionMixin, APIView):
     permission_classes = [IsAuthenticated,IsOfficeAdmin]
+    version_resources = ['accounts.soadmin', 'accounts.authuser']
 
     def get(self, request, *args, **kwargs):
         """Fetch the profile data for the logged-in faculty."""
@@ -106,7 +110,7 @@ class SOProfileView(APIView):
     def patch(self, request, *args, **kwargs):
         """Update the profile data for the logged-in faculty and user."""
         admin = request.user.office_admin_profile
-        serializer = SOProfileSerializer(admin, data=request.data, partial=True)
+        serializer = SOProfileSerializer(admin, data=request.data, partial=True, context={"request": request})
 
         if serializer.is_valid():
             # Save the updated data
@@ -8,11 +8,16 @@ from rest_framework import status
 from features.models import Result, ResultLock
 from features.serializers import ResultSerializer, ResultLockSerializer
 from general.utils.permissions import IsFaculty, IsStudent, IsOfficeAdmin
+from general.utils.pagination import KeysetPagination
+from general.utils.query_filter import DeltaSyncMixin, student_scope
+from general.utils.streaming import StreamingListMixin
+from general.utils.versioning import ResourceVersionMixin
 
-class ResultLockView(generics.ListCreateAPIView):
+class ResultLockView(ResourceVersionMixin, DeltaSyncMixin, generics.ListCreateAPIView):
     queryset = ResultLock.objects.all()
     serializer_class = ResultLockSerializer
     pagination_class = None
+    version_resources = ['features.resultlock']
 
     def get_permissions(self):
         if self.request.method == "POST":
@@ -21,11 +26,12 @@ class ResultLockView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """
-        Since ETag and If-Modified-Since are handled by middleware, we simply return the queryset.
+        ETag and 304 responses are handled by ResourceVersionMixin, and ?since= deltas by
+        DeltaSyncMixin, so we simply return the queryset.
         """
         return ResultLock.objects.all().order_by('last_updated')
 
-class ResultLockDetailView(generics.RetrieveUpdateDestroyAPIView):
+class ResultLockDetailView(ResourceVersionMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, and deleting a single result lock.
     - `GET` allowed for all authenticated users (`Faculty` & `Students`).
@@ -35,6 +41,7 @@ class ResultLockDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ResultLock.objects.all()
     serializer_class = ResultLockSerializer
     pagination_class = None
+    version_resources = ['features.resultlock']
 
     def get_permissions(self):
         """Restrict modification to `OfficeAdmin`, allow all authenticated users to view."""
@@ -43,19 +50,24 @@ class ResultLockDetailView(generics.RetrieveUpdateDestroyAPIView):
         return [permissions.IsAuthenticated()]
 
 
-class StudentResultAPIView(generics.ListAPIView):
+class StudentResultAPIView(ResourceVersionMixin, DeltaSyncMixin, generics.ListAPIView):
     """
     API for students to retrieve their own results.
     """
     serializer_class = ResultSerializer
     permission_classes = [IsAuthenticated, IsStudent]
-    pagination_class = None
+    pagination_class = KeysetPagination
+    version_resources = ['features.result']
 
     def get_queryset(self):
         return Result.objects.filter(student__user=self.request.user)
+
+    def get_delta_scope(self):
+        student = getattr(self.request.user, "student_profile", None)
+        return student_scope(student.student_code) if student else None
     
 
-class FacultyResultView(generics.ListCreateAPIView,generics.RetrieveUpdateDestroyAPIView):
+class FacultyResultView(ResourceVersionMixin, DeltaSyncMixin, StreamingListMixin, generics.ListCreateAPIView,generics.RetrieveUpdateDestroyAPIView):
     """
     API for faculty to manage results.
     - GET: Retrieve results (filtered dynamically by any field)
@@ -65,8 +77,9 @@ class FacultyResultView(generics.ListCreateAPIView,generics.RetrieveUpdateDestro
     """
     serializer_class = ResultSerializer
     permission_classes = [IsAuthenticated, IsFaculty]
-    pagination_class = None
+    pagination_class = KeysetPagination
     lookup_field = 'pk'
+    version_resources = ['features.result']
 
     def get_queryset(self):
         """Dynamically filters results based on any query parameter."""
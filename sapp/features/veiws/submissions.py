@@ -1,20 +1,31 @@
 from rest_framework import status, viewsets
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
 from features.models import Submission,Assignment
 from features.serializers import SubmissionSerializer
 from general.utils.permissions import IsFaculty, IsStudent
+from general.utils.pagination import KeysetPagination
+from general.utils.query_filter import SyncTokenMixin, delta_response, student_scope
+from general.utils.streaming import StreamingListMixin
 from accounts.models import Student
 from django.utils.timezone import now
+from django.db.models import FilteredRelation, Q
+from functools import reduce
+from operator import or_
+from features.utils.roster import class_filter
+from general.utils.versioning import ResourceVersionMixin
 
-class StudentSubmissionViewSet(viewsets.ModelViewSet):
+class StudentSubmissionViewSet(ResourceVersionMixin, SyncTokenMixin, StreamingListMixin, viewsets.ModelViewSet):
     """API for students to manage their own submissions."""
     
     permission_classes = [IsAuthenticated, IsStudent]
-    pagination_class = None
+    pagination_class = KeysetPagination
     lookup_field = "id"
     serializer_class = SubmissionSerializer
+    version_resources = ['features.submission']
 
     def get_queryset(self):
         """
@@ -30,6 +41,21 @@ class StudentSubmissionViewSet(viewsets.ModelViewSet):
         """Filter submissions by assignment ID."""
         assignment = request.query_params.get("assignment")
         queryset = self.get_queryset().filter(assignment=assignment) if assignment else self.get_queryset()
+
+        student = getattr(request.user, "student_profile", None)
+        delta = delta_response(request, queryset, self.get_serializer_class(), self, self.get_serializer_context(),
+                               scope=student_scope(student.student_code) if student else None)
+        if delta is not None:
+            return delta
+
+        streamed = self.stream_response(request, queryset)
+        if streamed is not None:
+            return streamed
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
         return Response(self.get_serializer(queryset, many=True).data or {"detail": "No submissions found."}, 
                         status=status.HTTP_200_OK if queryset else status.HTTP_404_NOT_FOUND)
 
@@ -59,7 +85,7 @@ class StudentSubmissionViewSet(viewsets.ModelViewSet):
                             status=status.HTTP_400_BAD_REQUEST)
         return super().update(request, *args, **kwargs)
 
-class FacultySubmissionViewSet(viewsets.ModelViewSet):
+class FacultySubmissionViewSet(ResourceVersionMixin, viewsets.ModelViewSet):
     """API for faculty to view all submissions for a specific assignment."""
 
     permission_classes = [IsAuthenticated, IsFaculty]
@@ -67,6 +93,7 @@ class FacultySubmissionViewSet(viewsets.ModelViewSet):
     serializer_class = SubmissionSerializer
     lookup_field = "id"
     http_method_names = ["get", "patch", "head", "options"]
+    version_resources = ['features.submission', 'features.assignment', 'accounts.student', 'accounts.authuser']
 
     def get_queryset(self):
         """
@@ -98,22 +125,23 @@ class FacultySubmissionViewSet(viewsets.ModelViewSet):
         if not assignment_id:
             return Response({"detail": "Assignment ID is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        submissions = self.get_queryset()
-        submitted_students_count = submissions.count()  # ✅ Get total submitted count
-
         assignment = get_object_or_404(Assignment, id=assignment_id)
-        total_students = Student.objects.filter(
+        # The serializer renders `student` by student_code, which needs the related row
+        submissions = self.get_queryset().select_related("student")
+
+        not_submitted_students = Student.objects.filter(
             standard=assignment.standard,
             section=assignment.section,
             academic_year=assignment.academic_year
-        )
-        not_submitted_students = total_students.exclude(student_code__in=submissions.values_list("student__student_code", flat=True))
+        ).exclude(
+            student_code__in=submissions.values_list("student__student_code", flat=True)
+        ).select_related("user").only("student_code", "user__username")
         
         last_updated = submissions.order_by('-last_updated').values_list('last_updated', flat=True).first() or now()
         
         return Response({
-            "total_students": total_students.count(),
-            "submitted_students_count": submitted_students_count,
+            "total_students": assignment.class_size,
+            "submitted_students_count": assignment.submitted_count,
             "not_submitted_students": [
                 {"name": s.user.username, "student_code": s.student_code} for s in not_submitted_students
             ],
@@ -139,3 +167,96 @@ class FacultySubmissionViewSet(viewsets.ModelViewSet):
             self.perform_update(serializer)
 
             return Response(serializer.data)
+
+
+class SubmissionBoardView(ResourceVersionMixin, APIView):
+    """
+    Submission status board: every student of each assignment's class with their status
+    (`graded`, `submitted` or `not_submitted`), latest submission id, mark and time.
+
+    Pass several assignments as `assignment=<id>&assignment=<id>` or `assignments=<id>,<id>`.
+    Students and their submissions for all requested assignments come from one query: the
+    class roster LEFT JOINed to the submissions of those assignments.
+    """
+    permission_classes = [IsAuthenticated, IsFaculty]
+    version_resources = ['features.submission', 'features.assignment', 'accounts.student', 'accounts.authuser']
+
+    def get(self, request):
+        ids = request.query_params.getlist("assignment")
+        for value in request.query_params.getlist("assignments"):
+            ids += [part.strip() for part in value.split(",") if part.strip()]
+        if not ids:
+            return Response({"detail": "At least one assignment ID is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            assignments = list(Assignment.objects.filter(id__in=ids).order_by("due_date", "created_at"))
+        except ValidationError:
+            return Response({"detail": "Invalid assignment ID."}, status=status.HTTP_400_BAD_REQUEST)
+        if not assignments:
+            return Response({"detail": "No assignments found."}, status=status.HTTP_404_NOT_FOUND)
+
+        classes = {
+            (int(assignment.standard), assignment.section, assignment.academic_year)
+            for assignment in assignments if assignment.standard.isdigit()
+        }
+        rows = []
+        if classes:
+            rows = (
+                Student.objects.filter(reduce(or_, (class_filter(*student_class) for student_class in classes)))
+                .annotate(board_submission=FilteredRelation(
+                    "submissions", condition=Q(submissions__assignment_id__in=[assignment.id for assignment in assignments]),
+                ))
+                .order_by("student_code", "board_submission__last_updated")
+                .values_list(
+                    "student_code", "user__username", "standard", "section", "academic_year",
+                    "board_submission__id", "board_submission__assignment_id", "board_submission__mark",
+                    "board_submission__last_updated",
+                )
+            )
+
+        # Roster per class and the latest submission per (assignment, student)
+        rosters, latest = {}, {}
+        for student_code, name, standard, section, academic_year, submission_id, assignment_id, mark, submitted_at in rows:
+            roster = rosters.setdefault((str(standard), section or "", academic_year), {})
+            roster[student_code] = name
+            if submission_id:
+                latest[(assignment_id, student_code)] = (submission_id, mark, submitted_at)
+
+        board, last_updated = [], None
+        for assignment in assignments:
+            students, counts = [], {"graded": 0, "submitted": 0, "not_submitted": 0}
+            roster = rosters.get((assignment.standard, assignment.section, assignment.academic_year), {})
+            for student_code, name in roster.items():
+                submission_id, mark, submitted_at = latest.get((assignment.id, student_code), (None, None, None))
+                state = "not_submitted" if submission_id is None else "submitted" if mark is None else "graded"
+                counts[state] += 1
+                if submitted_at and (last_updated is None or submitted_at > last_updated):
+                    last_updated = submitted_at
+                students.append({
+                    "student_code": student_code,
+                    "name": name,
+                    "status": state,
+                    "submission": submission_id,
+                    "mark": mark,
+                    "submitted_at": submitted_at,
+                })
+            board.append({
+                "id": assignment.id,
+                "title": assignment.title,
+                "subject": assignment.subject,
+                "standard": assignment.standard,
+                "section": assignment.section,
+                "academic_year": assignment.academic_year,
+                "due_date": assignment.due_date,
+                "total_mark": assignment.total_mark,
+                "total_students": len(roster),
+                "submitted_students_count": counts["submitted"] + counts["graded"],
+                "graded_count": counts["graded"],
+                "students": students,
+            })
+
+        return Response({
+            "assignments": board,
+            "last_updated": (last_updated or now()).isoformat(),
+        })
+
@@ -11,11 +11,15 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 
 from general.utils.permissions import IsFaculty, IsStudent, IsOfficeAdmin # Assuming you have these custom permissions
+from general.utils.streaming import get_stream_format, stream_queryset
+from general.utils.versioning import ResourceVersionMixin
 
-class TimetableView(APIView):
+class TimetableView(ResourceVersionMixin, APIView):
     """
     Handle GET, POST, PUT, and DELETE requests for Timetable objects.
     """
+    version_resources = ['features.timetable']
+
     def get_permissions(self):
         """Dynamically assign permissions based on request method."""
         if self.request.method in ["POST", "PUT"]:
@@ -39,6 +43,10 @@ class TimetableView(APIView):
             if section:
                 timetables = timetables.filter(section=section)
 
+            stream_format = get_stream_format(request)
+            if stream_format:
+                return stream_queryset(timetables.order_by('academic_year', 'standard', 'section', 'id'), TimetableSerializer, stream_format)
+
             serializer = TimetableSerializer(timetables, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
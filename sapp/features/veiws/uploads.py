@@ -0,0 +1,89 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from features.serializers import UploadSessionSerializer
+from general.models import UploadSession
+from general.utils.uploads import UploadError, append_chunk, cancel_session, complete_session, start_session
+
+
+def upload_error_response(error):
+    return Response({"detail": error.message, **error.extra}, status=error.status_code)
+
+
+class UploadSessionView(APIView):
+    """
+    Start a chunked upload.
+
+    POST {"kind": "image" | "document", "file_name", "total_size", "content_type" (optional)}.
+    Send the bytes with PUT to uploads/<id>/, then POST uploads/<id>/complete/. The returned
+    id goes into `<field>_upload` (e.g. `document_upload`) of the submission, assignment,
+    portion or profile instead of a multipart file.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            session = start_session(
+                request.user, request.data.get("kind"), request.data.get("file_name"),
+                request.data.get("total_size"), request.data.get("content_type"),
+            )
+        except UploadError as e:
+            return upload_error_response(e)
+        response = Response(UploadSessionSerializer(session, context={"request": request}).data, status=status.HTTP_201_CREATED)
+        response["Upload-Offset"] = session.received_size
+        return response
+
+
+class UploadChunkView(APIView):
+    """
+    GET: progress of an upload; resume by sending from `received_size` (also in Upload-Offset).
+    PUT: append the raw request body at the `Upload-Offset` header. The body is streamed to
+    disk, never parsed or held in memory.
+    DELETE: abandon the upload.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, session_id):
+        return get_object_or_404(UploadSession, pk=session_id, user=request.user)
+
+    def respond(self, request, session, status_code=status.HTTP_200_OK):
+        response = Response(UploadSessionSerializer(session, context={"request": request}).data, status=status_code)
+        response["Upload-Offset"] = session.received_size
+        return response
+
+    def get(self, request, session_id):
+        return self.respond(request, self.get_session(request, session_id))
+
+    def put(self, request, session_id):
+        session = self.get_session(request, session_id)
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers["Content-Length"]) if request.headers.get("Content-Length") else None
+        except ValueError:
+            return Response({"detail": "Upload-Offset and Content-Length must be numbers of bytes."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            session = append_chunk(session, offset, request.stream, length)
+        except UploadError as e:
+            return upload_error_response(e)
+        return self.respond(request, session)
+
+    def delete(self, request, session_id):
+        cancel_session(self.get_session(request, session_id))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadCompleteView(APIView):
+    """Assemble a fully received upload; identical content is stored only once."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        session = get_object_or_404(UploadSession, pk=session_id, user=request.user)
+        try:
+            session = complete_session(session)
+        except UploadError as e:
+            return upload_error_response(e)
+        return Response(UploadSessionSerializer(session, context={"request": request}).data)
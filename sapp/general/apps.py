@@ -0,0 +1,20 @@
+# File: sapp/general/apps.py
+
+from django.apps import AppConfig
+
+class GeneralConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'general'  # Using the direct app name without sapp prefix
+
+    def ready(self):
+        # Connect the post_save/post_delete receivers that keep resource versions current,
+        # record deletions for delta-sync clients, push change events to SSE subscribers and
+        # create thumbnails of uploaded images
+        from general.utils.versioning import connect_version_signals
+        from general.utils.query_filter import connect_tombstone_signals
+        from general.utils.change_events import connect_change_event_signals
+        from general.utils.thumbnails import connect_thumbnail_signals
+        connect_version_signals()
+        connect_tombstone_signals()
+        connect_change_event_signals()
+        connect_thumbnail_signals()
@@ -1,31 +1,200 @@
 # importer/csv_importer.py
 
 import csv
+import glob
+import itertools
+import json
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
 
-def import_csv_to_model(model, csv_file_path):
+from django.apps import apps
+from django.db import connections, transaction
+
+from general.importers.schemas import get_import_schema
+from general.signals import post_bulk_write
+
+def import_csv_to_model(model, csv_file_path, batch_size=500):
     """
     Imports data from a CSV file into the specified model.
+
+    Values are converted and foreign keys resolved through the model's import schema
+    (see importers/schemas.py), a batch of rows at a time.
     
     Args:
         model: The Django model class where data will be imported.
         csv_file_path: The path to the CSV file.
         
     Returns:
-        A summary of how many records were created and skipped.
+        A summary of how many records were created and skipped, and the rows that
+        could not be converted.
     """
     created_count = 0
     skipped_count = 0
+    errors = []
+    schema = get_import_schema(model)
 
     try:
         with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
-            for row in reader:
-                # Attempt to create a new object or skip if it already exists
-                obj, created = model.objects.get_or_create(**row)
-                if created:
-                    created_count += 1
+            row_number = 1
+            while True:
+                batch = list(itertools.islice(reader, batch_size))
+                if not batch:
+                    break
+                converted, batch_errors = schema.convert_batch(batch, first_row=row_number)
+                errors += batch_errors
+                row_number += len(batch)
+                for _, values in converted:
+                    # Attempt to create a new object or skip if it already exists
+                    obj, created = model.objects.get_or_create(**values)
+                    if created:
+                        created_count += 1
+                    else:
+                        skipped_count += 1
+
+    except FileNotFoundError:
+        raise FileNotFoundError(f'CSV file "{csv_file_path}" not found.')
+
+    except Exception as e:
+        raise Exception(f'Error while importing CSV: {str(e)}')
+
+    return created_count, skipped_count, errors
+
+
+def natural_key_fields(model, columns):
+    """
+    Names of the field(s) that identify an existing row, taken from the model's unique
+    fields and unique_together sets whose columns are all present in the CSV.
+    """
+    columns = set(columns)
+    opts = model._meta
+
+    def present(field_name):
+        field = opts.get_field(field_name)
+        return field.name in columns or field.attname in columns
+
+    for field in opts.concrete_fields:
+        if field.unique and (field.name in columns or field.attname in columns):
+            return (field.name,)
+    for fields in opts.unique_together:
+        if all(present(name) for name in fields):
+            return tuple(fields)
+    return ()
+
+
+def _build_instance(model, values, key_fields):
+    """Model instance for converted row values, and its natural key."""
+    instance = model(**values)
+    return instance, tuple(getattr(instance, model._meta.get_field(name).attname) for name in key_fields)
+
+
+def bulk_import_csv_to_model(model, csv_file_path, batch_size=1000, unique_fields=None, update_fields=None, dry_run=False,
+                             start_offset=0, start_row=0, on_batch=None):
+    """
+    High-throughput import of a CSV file into the specified model.
+
+    Rows are read in batches of `batch_size`. For each batch the existing natural keys
+    (`unique_fields`, by default the model's unique columns found in the CSV) are looked
+    up with one IN query, and the new rows are inserted with a single
+    bulk_create(ignore_conflicts=True) inside a transaction. With `update_fields`,
+    existing rows are upserted instead of skipped. With `dry_run`, nothing is written.
+
+    Values are converted and foreign keys resolved through the model's import schema,
+    with one IN query per foreign key per batch. Rows that cannot be converted are
+    skipped and reported.
+
+    `start_offset` resumes reading at a byte offset recorded earlier (`start_row` rows
+    into the file), and `on_batch`, if given, is called as on_batch(byte_offset, rows)
+    after each committed batch.
+
+    Returns:
+        (created_count, updated_count, skipped_count, errors)
+    """
+    from general.utils.versioning import bulk_version_keys, bump_versions
+
+    created_count = updated_count = skipped_count = 0
+    errors = []
+    schema = get_import_schema(model)
+    row_number = start_row + 1
+    update_fields = list(update_fields or [])
+    if update_fields and any(field.name == 'last_updated' for field in model._meta.fields) and 'last_updated' not in update_fields:
+        update_fields.append('last_updated')
+
+    try:
+        with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
+            # Lines are read with readline() so that tell() gives a resumable byte offset
+            fieldnames = next(csv.reader([csvfile.readline()]), [])
+            if start_offset:
+                csvfile.seek(start_offset)
+            reader = csv.DictReader(iter(csvfile.readline, ''), fieldnames=fieldnames)
+            key_fields = tuple(unique_fields or natural_key_fields(model, fieldnames))
+            if update_fields and not key_fields:
+                raise ValueError('Upserting needs unique fields present in the CSV.')
+            seen = set()
+
+            while True:
+                batch = list(itertools.islice(reader, batch_size))
+                if not batch:
+                    break
+
+                converted, batch_errors = schema.convert_batch(batch, first_row=row_number)
+                errors += batch_errors
+                row_number += len(batch)
+
+                instances = {}
+                for _, values in converted:
+                    instance, key = _build_instance(model, values, key_fields)
+                    if not key_fields:
+                        instances[len(instances)] = instance
+                    elif key in instances or (key in seen and not update_fields):
+                        # Repeated key in the file: the last row wins when upserting
+                        skipped_count += 1
+                        if update_fields:
+                            instances[key] = instance
+                    else:
+                        instances[key] = instance
+
+                schema.prepare_instances(list(instances.values()))
+
+                existing = set()
+                if key_fields and instances:
+                    # One IN query on the first key column; composite keys are matched in memory
+                    existing = set(
+                        model.objects.filter(**{f"{key_fields[0]}__in": {key[0] for key in instances}})
+                        .values_list(*key_fields)
+                    )
+
+                # Keys from earlier batches count as existing, even in a dry run
+                new = [instance for key, instance in instances.items() if key not in existing and key not in seen]
+                old = [instance for key, instance in instances.items() if key in existing or key in seen]
+                if key_fields:
+                    seen.update(instances)
+
+                if not dry_run:
+                    with transaction.atomic():
+                        if new:
+                            model.objects.bulk_create(new, batch_size=batch_size, ignore_conflicts=True)
+                        if update_fields and old:
+                            model.objects.bulk_create(
+                                old, batch_size=batch_size, update_conflicts=True,
+                                unique_fields=list(key_fields), update_fields=update_fields,
+                            )
+                        # bulk_create sends no post_save, so bump the resource versions explicitly
+                        written = new + (old if update_fields else [])
+                        bump_versions(bulk_version_keys(model, written))
+                        if written:
+                            post_bulk_write.send(sender=model, instances=written)
+
+                if on_batch and not dry_run:
+                    on_batch(csvfile.tell(), len(batch))
+
+                created_count += len(new)
+                if update_fields:
+                    updated_count += len(old)
                 else:
-                    skipped_count += 1
+                    skipped_count += len(old)
 
     except FileNotFoundError:
         raise FileNotFoundError(f'CSV file "{csv_file_path}" not found.')
@@ -33,4 +202,143 @@ def import_csv_to_model(model, csv_file_path):
     except Exception as e:
         raise Exception(f'Error while importing CSV: {str(e)}')
 
-    return created_count, skipped_count
+    return created_count, updated_count, skipped_count, errors
+
+
+def resolve_csv_paths(source):
+    """CSV files named by `source`: a file, a directory (its *.csv files) or a glob pattern."""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, '*.csv')))
+    if glob.has_magic(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+    return [source]
+
+
+class ImportCheckpoint:
+    """
+    JSON checkpoint of a multi-file import: for every file, its size and mtime, the byte
+    offset reached, the rows committed and whether it is done. A file whose size or mtime
+    changed since the checkpoint was written is imported again from the start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as checkpoint_file:
+                self.files = json.load(checkpoint_file)
+
+    @staticmethod
+    def _signature(csv_path):
+        stat = os.stat(csv_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def entry(self, csv_path):
+        """Checkpoint entry for `csv_path`, reset if the file changed."""
+        key = os.path.abspath(csv_path)
+        entry = self.files.get(key)
+        signature = self._signature(csv_path)
+        if entry is None or {field: entry.get(field) for field in signature} != signature:
+            entry = self.files[key] = {**signature, 'offset': 0, 'rows': 0, 'done': False}
+        return entry
+
+    def record(self, csv_path, offset=None, rows=0, done=False):
+        entry = self.entry(csv_path)
+        if offset is not None:
+            entry['offset'] = offset
+        entry['rows'] += rows
+        entry['done'] = entry['done'] or done
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        # Write then rename, so an interrupted write never leaves a corrupt checkpoint
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(self.files, checkpoint_file, indent=2)
+        os.replace(temporary, self.path)
+
+
+def _init_import_worker():
+    import django
+    django.setup()
+
+
+def _import_file_worker(model_label, csv_path, options, start_offset, start_row, progress):
+    """Worker process: import one file, reporting committed batches on the `progress` queue."""
+    model = apps.get_model(model_label)
+    try:
+        counts = bulk_import_csv_to_model(
+            model, csv_path, start_offset=start_offset, start_row=start_row,
+            on_batch=lambda offset, rows: progress.put((csv_path, offset, rows)),
+            **options,
+        )
+        return csv_path, counts, None
+    except Exception as e:
+        return csv_path, None, str(e)
+    finally:
+        connections.close_all()
+
+
+def import_csv_files(model, csv_paths, workers=1, checkpoint_path=None, **options):
+    """
+    Bulk-import several CSV files into `model`, `workers` files at a time in separate
+    processes (each with its own database connections). With `checkpoint_path`, progress
+    is recorded after every committed batch and a rerun skips finished files and resumes
+    the others at the byte offset they reached.
+
+    `options` are passed to bulk_import_csv_to_model. Returns a list of
+    (path, (created, updated, skipped, row errors) or None, error or None), with None
+    counts and no error for files skipped as already done.
+    """
+    checkpoint = ImportCheckpoint(None if options.get('dry_run') else checkpoint_path)
+    results, pending = [], []
+    for csv_path in csv_paths:
+        if not os.path.isfile(csv_path):
+            results.append((csv_path, None, f'CSV file "{csv_path}" not found.'))
+        elif checkpoint.entry(csv_path)['done']:
+            results.append((csv_path, None, None))
+        else:
+            entry = checkpoint.entry(csv_path)
+            pending.append((csv_path, entry['offset'], entry['rows']))
+
+    def finish(csv_path, counts, error):
+        if error is None:
+            checkpoint.record(csv_path, done=True)
+        results.append((csv_path, counts, error))
+
+    if workers <= 1 or len(pending) <= 1:
+        for csv_path, offset, rows in pending:
+            try:
+                counts = bulk_import_csv_to_model(
+                    model, csv_path, start_offset=offset, start_row=rows,
+                    on_batch=lambda offset, rows, csv_path=csv_path: checkpoint.record(csv_path, offset, rows),
+                    **options,
+                )
+                finish(csv_path, counts, None)
+            except Exception as e:
+                finish(csv_path, None, str(e))
+        return results
+
+    # Forked workers must not share the parent's open database connections
+    connections.close_all()
+    with Manager() as manager:
+        progress = manager.Queue()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_import_worker) as pool:
+            futures = {
+                pool.submit(_import_file_worker, model._meta.label, csv_path, options, offset, rows, progress)
+                for csv_path, offset, rows in pending
+            }
+            while futures:
+                done, futures = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+                # Drain progress before finishing files, so the last batch is recorded first
+                while True:
+                    try:
+                        csv_path, offset, rows = progress.get_nowait()
+                    except queue.Empty:
+                        break
+                    checkpoint.record(csv_path, offset, rows)
+                for future in done:
+                    finish(*future.result())
+    return results
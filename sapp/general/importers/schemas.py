@@ -0,0 +1,179 @@
+# importers/schemas.py
+
+import ast
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+
+
+def json_value(value):
+    """Parse a JSON cell. Python literals (single-quoted lists/dicts) are accepted too."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        raise ValidationError(f"{value!r} is not valid JSON.")
+
+
+def bool_value(value):
+    lowered = value.strip().lower()
+    if lowered in ('1', 'true', 't', 'yes', 'y'):
+        return True
+    if lowered in ('0', 'false', 'f', 'no', 'n'):
+        return False
+    raise ValidationError(f"{value!r} is not a boolean.")
+
+
+def student_codes(students):
+    """Fill the student_code Student.save() would generate, with one query for the batch."""
+    from accounts.models import AuthUser
+
+    missing = [student for student in students if not student.student_code]
+    emails = dict(AuthUser.objects.filter(pk__in={student.user_id for student in missing}).values_list('pk', 'email'))
+    for student in missing:
+        student.student_code = student.build_student_code(
+            emails.get(student.user_id), student.standard, student.section, student.academic_year
+        )
+
+
+# Per-model import schema, keyed by model label:
+#   converters: column -> function turning the CSV string into the field value
+#   related:    FK column -> field of the related model that the CSV values refer to
+#   prepare:    function(instances) setting fields the model's save() would derive, since
+#               bulk imports never call save()
+# Columns not listed get a converter from their field type, and FK columns are matched
+# against the field the foreign key points to.
+IMPORT_SCHEMAS = {
+    'accounts.student': {
+        'related': {'user': 'username'},
+        'prepare': student_codes,
+    },
+    'accounts.faculty': {
+        'related': {'user': 'username'},
+    },
+    'accounts.soadmin': {
+        'related': {'user': 'username'},
+    },
+    'features.attendance': {
+        'related': {'student': 'student_code'},
+    },
+    'features.result': {
+        'related': {'student': 'student_code', 'result_lock': 'title'},
+    },
+    'features.assignment': {
+        'related': {'faculty': 'faculty_id'},
+    },
+    'features.submission': {
+        'related': {'assignment': 'id', 'student': 'student_code'},
+    },
+}
+
+
+def get_import_schema(model):
+    return ImportSchema(model, **IMPORT_SCHEMAS.get(model._meta.label_lower, {}))
+
+
+class ImportSchema:
+    """
+    How CSV columns map onto a model: a converter per column and, for foreign keys, the
+    related field the CSV refers to. FK values are resolved for a whole batch with one
+    IN query per foreign key, then looked up per row in a dict.
+    """
+
+    def __init__(self, model, converters=None, related=None, prepare=None):
+        self.model = model
+        self.converters = converters or {}
+        self.related = related or {}
+        self.prepare = prepare
+
+    def field(self, column):
+        try:
+            return self.model._meta.get_field(column)
+        except FieldDoesNotExist:
+            raise ValueError(f'{self.model.__name__} has no field named "{column}".')
+
+    def converter(self, field):
+        if field.name in self.converters:
+            return self.converters[field.name]
+        if isinstance(field, models.JSONField):
+            return json_value
+        if isinstance(field, models.BooleanField):
+            return bool_value
+        return field.to_python
+
+    def prepare_instances(self, instances):
+        """Set the derived fields of unsaved instances before they are bulk-created."""
+        if self.prepare and instances:
+            self.prepare(instances)
+
+    def lookup_field(self, field):
+        """Field of the related model that CSV values of the FK `field` are matched against."""
+        return field.related_model._meta.get_field(self.related.get(field.name, field.target_field.name))
+
+    def resolve_related(self, field, values):
+        """{CSV value: FK target value} for the given values, in one query."""
+        lookup = self.lookup_field(field)
+        typed = {}
+        for value in values:
+            try:
+                typed[lookup.to_python(value)] = value
+            except ValidationError:
+                pass
+        if not typed:
+            return {}
+        return {
+            typed[key]: target
+            for key, target in field.related_model.objects.filter(**{f"{lookup.name}__in": list(typed)})
+            .values_list(lookup.name, field.target_field.attname)
+            if key in typed
+        }
+
+    def convert_batch(self, rows, first_row=1):
+        """
+        Convert a batch of CSV rows (dicts of strings) into model field values keyed by
+        attname. Returns (converted, errors): a list of (row number, values) and a list
+        of {"row", "field", "error"} for rows that could not be converted.
+        """
+        if not rows:
+            return [], []
+        fields = {column: self.field(column) for column in rows[0]}
+        related = {
+            column: self.resolve_related(field, {row[column] for row in rows if row.get(column)})
+            for column, field in fields.items() if field.is_relation
+        }
+
+        converted, errors = [], []
+        for row_number, row in enumerate(rows, start=first_row):
+            values, row_errors = {}, []
+            for column, field in fields.items():
+                value = row.get(column)
+                if value is None or value == '':
+                    if field.null:
+                        values[field.attname] = None
+                    elif not (field.has_default() or field.blank):
+                        row_errors.append({"row": row_number, "field": column, "error": "This field is required."})
+                    elif not field.has_default():
+                        values[field.attname] = ''
+                    continue
+                if field.is_relation:
+                    if value not in related[column]:
+                        lookup = self.lookup_field(field)
+                        row_errors.append({"row": row_number, "field": column,
+                                           "error": f"{field.related_model.__name__} with {lookup.name} {value!r} does not exist."})
+                    else:
+                        values[field.attname] = related[column][value]
+                    continue
+                try:
+                    values[field.attname] = self.converter(field)(value)
+                except (ValidationError, ValueError, TypeError) as e:
+                    message = e.messages[0] if isinstance(e, ValidationError) else str(e)
+                    row_errors.append({"row": row_number, "field": column, "error": message})
+            if row_errors:
+                errors += row_errors
+            else:
+                converted.append((row_number, values))
+        return converted, errors
@@ -0,0 +1,409 @@
+# importers/signup_importer.py
+
+import contextlib
+import itertools
+import os
+import pickle
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Student, Faculty, SOAdmin, SignupImportJob
+from general.signals import post_bulk_write
+from general.utils.versioning import bump_versions
+
+VALID_ROLES = ('student', 'faculty', 'so_admin')
+
+REQUIRED_FIELDS = {
+    'student': ('username', 'email', 'password', 'enrollment_number', 'standard', 'academic_year'),
+    'faculty': ('username', 'email', 'password', 'faculty_id', 'department'),
+    'so_admin': ('username', 'email', 'password', 'school_name'),
+}
+
+# Columns handed to write_rows, in SignupRow order
+ROW_COLUMNS = (
+    'role', 'username', 'email', 'password', 'enrollment_number', 'standard', 'section', 'subjects',
+    'attendance_percent', 'student_code', 'academic_year', 'faculty_id', 'department', 'specialization',
+    'coverage', 'class_teacher', 'employee_id', 'school_name',
+)
+
+# Module-level, so rows can be pickled when a streamed import stages them on disk
+SignupRow = namedtuple('SignupRow', ROW_COLUMNS)
+
+# Columns that are text in the models even when a spreadsheet stores them as numbers
+TEXT_FIELDS = ('username', 'email', 'password', 'enrollment_number', 'section', 'academic_year',
+               'faculty_id', 'department', 'specialization', 'employee_id', 'school_name')
+
+UNIQUE_FIELDS = ('username', 'email', 'enrollment_number', 'student_code', 'faculty_id')
+
+# Below this many passwords, hashing in-process is cheaper than starting a worker pool
+HASH_POOL_THRESHOLD = getattr(settings, 'SIGNUP_HASH_POOL_THRESHOLD', 50)
+BATCH_SIZE = getattr(settings, 'SIGNUP_BATCH_SIZE', 500)
+PROGRESS_EVERY = 25
+# Rows per chunk when streaming a large upload
+CHUNK_SIZE = getattr(settings, 'SIGNUP_CHUNK_SIZE', 2000)
+# openpyxl cannot read the legacy binary .xls format, so only .csv and .xlsx are accepted
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+UNSUPPORTED_FILE_MESSAGE = "Unsupported file type. Only CSV and .xlsx Excel files are allowed (save .xls files as .xlsx)."
+
+
+class SignupValidationError(Exception):
+    """Raised when an upload has invalid rows; `errors` is the per-row report."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+def _text(series):
+    """Column as text: numbers converted to str, surrounding blanks stripped, blank -> missing."""
+    series = series.astype(object)
+    series = series.where(series.isna(), series.astype(str)).str.strip()
+    return series.mask(series.eq(''))
+
+
+def _prepare_frame(df, offset=0):
+    """Normalize the upload column-wise and fill optional defaults."""
+    df = df.reindex(columns=df.columns.union(list(ROW_COLUMNS), sort=False))
+    df['_row'] = np.arange(offset + 1, offset + len(df) + 1)
+    df['role'] = _text(df['role'])
+    for field in TEXT_FIELDS:
+        df[field] = _text(df[field])
+    df['attendance_percent'] = pd.to_numeric(df['attendance_percent'], errors='coerce').fillna(0)
+    for field in ('section', 'specialization', 'employee_id'):
+        df[field] = df[field].fillna('')
+    return df
+
+
+def _errors(df, mask, field, message):
+    """Error dicts for the rows selected by `mask`; `message` formats the offending value."""
+    return [
+        {"row": int(row), "field": field, "error": message(value)}
+        for row, value in zip(df.loc[mask, '_row'], df.loc[mask, field])
+    ]
+
+
+def validate_rows(df, offset=0, seen=None):
+    """
+    Check the whole frame before anything is written: roles, required fields, the
+    standard, duplicates inside the file and clashes with existing records (one IN
+    query per unique column). All checks are column operations on the frame.
+
+    When a file is validated in chunks, `offset` is the number of rows before this chunk
+    and `seen` (a dict reused across calls) carries each unique value's first row, so
+    duplicates across chunks are found and earlier chunks are not looked up again.
+
+    Returns (rows, errors). Rows are SignupRow named tuples ready for write_rows; each
+    error is {"row", "field", "error"} with a 1-based row number.
+    """
+    seen = {} if seen is None else seen
+    df = _prepare_frame(df, offset)
+    errors = []
+
+    valid = df['role'].isin(VALID_ROLES)
+    errors += _errors(df, ~valid, 'role', lambda role: f"Invalid role {None if pd.isna(role) else role!r}")
+
+    complete = valid.copy()
+    for role, fields in REQUIRED_FIELDS.items():
+        of_role = valid & df['role'].eq(role)
+        for field in fields:
+            missing = of_role & df[field].isna()
+            errors += _errors(df, missing, field, lambda value: "This field is required.")
+            complete &= ~missing
+    valid = complete
+
+    students = valid & df['role'].eq('student')
+    standard = pd.to_numeric(df['standard'], errors='coerce')
+    bad_standard = students & ~(standard.ge(0) & standard.mod(1).eq(0))
+    errors += _errors(df, bad_standard, 'standard', lambda value: "Standard must be a positive integer.")
+    valid &= ~bad_standard
+    students &= valid
+
+    df['standard'] = standard.where(students).astype('Int64')
+    df['student_code'] = None
+    df.loc[students, 'student_code'] = (
+        df['email'] + '-' + df['standard'].astype(str) + '-' + df['section'] + '-' + df['academic_year']
+    )[students]
+
+    first_rows = {}
+    for field in UNIQUE_FIELDS:
+        present = df.loc[valid & df[field].notna(), [field, '_row']]
+        known = seen.setdefault(field, {})
+        first = present[field].map(known).fillna(present.groupby(field)['_row'].transform('min'))
+        duplicate = present['_row'].ne(first)
+        errors += [
+            {"row": int(row), "field": field, "error": f"Duplicate {field} {value!r} (also on row {int(first_row)})."}
+            for row, value, first_row in zip(present.loc[duplicate, '_row'], present.loc[duplicate, field], first[duplicate])
+        ]
+        first_rows[field] = dict(zip(present.loc[~duplicate, field], present.loc[~duplicate, '_row']))
+        known.update(first_rows[field])
+
+    User = get_user_model()
+    existing_lookups = [
+        ('username', User.objects.filter(username__in=list(first_rows['username'])).values_list('username', flat=True)),
+        ('email', User.objects.filter(email__in=list(first_rows['email'])).values_list('email', flat=True)),
+        ('enrollment_number', Student.objects.filter(enrollment_number__in=list(first_rows['enrollment_number'])).values_list('enrollment_number', flat=True)),
+        ('student_code', Student.objects.filter(student_code__in=list(first_rows['student_code'])).values_list('student_code', flat=True)),
+        ('faculty_id', Faculty.objects.filter(faculty_id__in=list(first_rows['faculty_id'])).values_list('faculty_id', flat=True)),
+    ]
+    for field, existing in existing_lookups:
+        for value in existing:
+            errors.append({"row": int(first_rows[field][value]), "field": field, "error": f"{field} {value!r} already exists."})
+
+    if errors:
+        return [], sorted(errors, key=lambda error: error["row"])
+
+    rows = df.loc[valid, list(ROW_COLUMNS)].astype(object)
+    rows = rows.where(rows.notna(), None)
+    return list(rows.itertuples(index=False, name='SignupRow')), []
+
+
+def _init_hash_worker():
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sapp.settings')
+    django.setup()
+
+
+def _hash_workers():
+    return min(os.cpu_count() or 1, 8)
+
+
+def hash_pool():
+    """A process pool for hash_passwords, or None on a single CPU. Close it when done."""
+    workers = _hash_workers()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker) if workers > 1 else None
+
+
+def hash_passwords(passwords, progress=None, pool=None):
+    """
+    Hash each password exactly once. Large uploads are spread over a process pool, since
+    the hasher is CPU bound; pass `pool` (see hash_pool) to reuse one across calls instead
+    of starting a new one. `progress(done)` is called as hashes complete.
+    """
+    workers = _hash_workers()
+    if len(passwords) < HASH_POOL_THRESHOLD or workers == 1:
+        hashed = []
+        for password in passwords:
+            hashed.append(make_password(password))
+            if progress and len(hashed) % PROGRESS_EVERY == 0:
+                progress(len(hashed))
+        return hashed
+
+    chunksize = max(1, min(50, len(passwords) // (workers * 4) or 1))
+    hashed = []
+    with contextlib.ExitStack() as stack:
+        if pool is None:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker))
+        for encoded in pool.map(make_password, passwords, chunksize=chunksize):
+            hashed.append(encoded)
+            if progress and len(hashed) % PROGRESS_EVERY == 0:
+                progress(len(hashed))
+    return hashed
+
+
+def _build_profile(row, user):
+    if row.role == 'student':
+        return Student(
+            user=user,
+            enrollment_number=row.enrollment_number,
+            standard=row.standard,
+            section=row.section,
+            subjects=row.subjects or [],
+            attendance_percent=int(row.attendance_percent),
+            student_code=row.student_code,
+            academic_year=row.academic_year,
+        )
+    if row.role == 'faculty':
+        return Faculty(
+            user=user,
+            faculty_id=row.faculty_id,
+            department=row.department,
+            specialization=row.specialization,
+            coverage=row.coverage or [],
+            class_teacher=row.class_teacher or {},
+        )
+    return SOAdmin(
+        user=user,
+        employee_id=row.employee_id,
+        school_name=row.school_name,
+    )
+
+
+def write_rows(rows, hashed_passwords, batch_size=BATCH_SIZE):
+    """Insert users and their profiles with batched bulk_create in one transaction."""
+    User = get_user_model()
+    users = [
+        User(username=row.username, email=row.email, role=row.role, password=encoded)
+        for row, encoded in zip(rows, hashed_passwords)
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        if any(user.pk is None for user in users):  # backends that do not return primary keys
+            ids = dict(User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        profiles = {Student: [], Faculty: [], SOAdmin: []}
+        for row, user in zip(rows, users):
+            profile = _build_profile(row, user)
+            profiles[type(profile)].append(profile)
+        for model, objects in profiles.items():
+            if objects:
+                model.objects.bulk_create(objects, batch_size=batch_size)
+
+        # bulk_create sends no post_save, so bump the resource versions explicitly
+        bump_versions(['accounts.authuser'] + [model._meta.label_lower for model, objects in profiles.items() if objects])
+        post_bulk_write.send(sender=User, instances=users)
+        for model, objects in profiles.items():
+            if objects:
+                post_bulk_write.send(sender=model, instances=objects)
+
+    return len(users)
+
+
+def _job_updater(job):
+    def update_job(**fields):
+        if job is not None:
+            for field, value in fields.items():
+                setattr(job, field, value)
+            job.save(update_fields=[*fields, 'last_updated'])
+    return update_job
+
+
+def fail_stale_jobs(older_than=None):
+    """
+    Mark unfinished import jobs with no progress for `older_than` (default
+    SIGNUP_JOB_STALE_MINUTES) as failed. Jobs run on in-process threads, so a restart
+    loses them; without this their status would stay 'pending' or 'writing' forever.
+    Returns the number of jobs marked.
+    """
+    if older_than is None:
+        older_than = timedelta(minutes=settings.SIGNUP_JOB_STALE_MINUTES)
+    cutoff = timezone.now() - older_than
+    return SignupImportJob.objects.exclude(status__in=('completed', 'failed')).filter(last_updated__lt=cutoff).update(
+        status='failed',
+        errors=[{"row": None, "field": None, "error": "The import was interrupted (server restart); upload the file again."}],
+        last_updated=timezone.now(),
+    )
+
+
+def import_signup_frame(df, job=None):
+    """
+    Validate, hash and insert a whole signup frame. Raises SignupValidationError (and
+    writes nothing) if any row is invalid; otherwise returns the number of users created.
+    `job`, if given, is a SignupImportJob whose progress is updated along the way.
+    """
+    update_job = _job_updater(job)
+
+    update_job(status='validating', total_rows=len(df))
+    rows, errors = validate_rows(df)
+    if errors:
+        raise SignupValidationError(errors)
+
+    update_job(status='hashing')
+    hashed = hash_passwords([row.password for row in rows],
+                            progress=lambda done: update_job(processed_rows=done))
+
+    update_job(status='writing', processed_rows=len(rows))
+    return write_rows(rows, hashed)
+
+
+def _xlsx_chunks(path, chunksize):
+    """Rows of the first worksheet as DataFrames, read with openpyxl's read_only streaming mode."""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else f"column_{index}" for index, cell in enumerate(next(rows, ()))]
+        while True:
+            batch = [row for row in itertools.islice(rows, chunksize) if any(cell is not None for cell in row)]
+            if not batch:
+                break
+            yield pd.DataFrame.from_records(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_signup_chunks(path, file_name, chunksize=CHUNK_SIZE):
+    """
+    Stream a CSV or Excel signup file as DataFrames of at most `chunksize` rows, so
+    memory stays bounded however large the upload is.
+    """
+    if file_name.endswith('.csv'):
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            yield from reader
+    elif file_name.endswith('.xlsx'):
+        yield from _xlsx_chunks(path, chunksize)
+    else:
+        raise ValueError(UNSUPPORTED_FILE_MESSAGE)
+
+
+def _staged_chunks(staging):
+    staging.seek(0)
+    while True:
+        try:
+            rows, hashed = pickle.load(staging)
+        except EOFError:
+            return
+        yield [SignupRow(*row) for row in rows], hashed
+
+
+def import_signup_file(path, file_name, job=None, chunksize=CHUNK_SIZE):
+    """
+    Streaming import of a signup file too large to load with pandas in one go; memory
+    stays bounded by one chunk.
+
+    A first pass reads the file chunk by chunk and validates every row (duplicates are
+    tracked across chunks); if anything is invalid, SignupValidationError is raised and
+    nothing is written. A second pass re-reads the file, hashes each chunk's passwords on
+    one shared worker pool and stages the rows (with the hash, never the plain password)
+    in a temporary file. The staged chunks are then inserted one at a time inside a
+    single transaction, so the import is all-or-nothing and no transaction stays open
+    while passwords are hashed. Returns the number of users created.
+    """
+    update_job = _job_updater(job)
+
+    update_job(status='validating')
+    seen, errors, total = {}, [], 0
+    for chunk in read_signup_chunks(path, file_name, chunksize):
+        _, chunk_errors = validate_rows(chunk, offset=total, seen=seen)
+        errors += chunk_errors
+        total += len(chunk)
+        update_job(total_rows=total)
+    if errors:
+        raise SignupValidationError(errors)
+
+    update_job(status='hashing')
+    with contextlib.ExitStack() as stack:
+        staging = stack.enter_context(tempfile.TemporaryFile())
+        pool = hash_pool() if total >= HASH_POOL_THRESHOLD else None
+        if pool is not None:
+            stack.enter_context(pool)
+
+        seen, offset = {}, 0
+        for chunk in read_signup_chunks(path, file_name, chunksize):
+            # Re-validating is cheap and catches accounts created since the first pass
+            rows, errors = validate_rows(chunk, offset=offset, seen=seen)
+            if errors:
+                raise SignupValidationError(errors)
+            hashed = hash_passwords([row.password for row in rows], pool=pool)
+            pickle.dump(([tuple(row._replace(password=None)) for row in rows], hashed), staging)
+            offset += len(chunk)
+            update_job(processed_rows=offset)
+
+        update_job(status='writing')
+        with transaction.atomic():
+            created = sum(write_rows(rows, hashed) for rows, hashed in _staged_chunks(staging))
+    update_job(created_count=created)
+    return created
@@ -0,0 +1,18 @@
+# management/commands/fail_stale_signup_imports.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from general.importers.signup_importer import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Mark background signup imports that stopped making progress (e.g. after a restart) as failed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, help='Minutes without progress before a job counts as stale (defaults to the setting)')
+
+    def handle(self, *args, **kwargs):
+        older_than = timedelta(minutes=kwargs['minutes']) if kwargs['minutes'] is not None else None
+        failed = fail_stale_jobs(older_than)
+        self.stdout.write(self.style.SUCCESS(f'Marked {failed} stale import jobs as failed.'))
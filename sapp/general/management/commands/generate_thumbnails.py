@@ -0,0 +1,44 @@
+# management/commands/generate_thumbnails.py
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from general.utils.thumbnails import IMAGE_FIELDS, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Create missing thumbnails and web-sized copies of uploaded images (safe to rerun)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='labels',
+                            help=f"Only this model (repeatable): {', '.join(IMAGE_FIELDS)}")
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that already exist')
+
+    def handle(self, *args, **kwargs):
+        labels = kwargs['labels'] or list(IMAGE_FIELDS)
+        unknown = set(labels) - set(IMAGE_FIELDS)
+        if unknown:
+            raise CommandError(f"No image fields configured for: {', '.join(sorted(unknown))}")
+
+        names = set()
+        for label in labels:
+            model = apps.get_model(label)
+            for field in IMAGE_FIELDS[label]:
+                names.update(model.objects.exclude(**{field: ''}).exclude(**{f"{field}__isnull": True})
+                             .values_list(field, flat=True).distinct())
+
+        written = skipped = failed = 0
+        for name in sorted(names):
+            try:
+                count = generate_derivatives(name, force=kwargs['force'])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+                continue
+            if count:
+                written += 1
+            else:
+                skipped += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} images processed, {skipped} already had derivatives, {failed} failed.'
+        ))
@@ -1,20 +1,37 @@
 # management/commands/import_data.py
-from general.importers.csv_importer import import_csv_to_model
+import time
+
+from general.importers.csv_importer import import_csv_files, import_csv_to_model, resolve_csv_paths
 from django.core.management.base import BaseCommand
 from django.apps import apps
 
 class Command(BaseCommand):
-    help = 'Import data from a CSV file into a specified model'
+    help = 'Import data from CSV files into a specified model'
 
     def add_arguments(self, parser):
         parser.add_argument('app_name', type=str, help='The app where the model is located')
         parser.add_argument('model_name', type=str, help='The model to import data into')
-        parser.add_argument('csv_file', type=str, help='The path to the CSV file')
+        parser.add_argument('csv_file', type=str,
+                            help='The path to the CSV file, a directory of CSV files or a quoted glob pattern')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Batched bulk_create import (implied by the options below)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch in bulk mode')
+        parser.add_argument('--unique-fields', type=str, default='',
+                            help='Comma separated natural key (default: unique columns found in the CSV)')
+        parser.add_argument('--upsert', type=str, default='',
+                            help='Comma separated fields to update on rows that already exist')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be imported without writing')
+        parser.add_argument('--workers', type=int, default=1, help='Files imported in parallel worker processes')
+        parser.add_argument('--checkpoint', type=str, default='',
+                            help='Checkpoint file recording progress; rerunning with it resumes an interrupted import')
 
     def handle(self, *args, **kwargs):
         app_name = kwargs['app_name']
         model_name = kwargs['model_name']
         csv_file = kwargs['csv_file']
+        upsert_fields = [field for field in kwargs['upsert'].split(',') if field]
+        unique_fields = [field for field in kwargs['unique_fields'].split(',') if field]
+        bulk = kwargs['bulk'] or kwargs['dry_run'] or bool(upsert_fields) or kwargs['workers'] > 1 or bool(kwargs['checkpoint'])
 
         # Dynamically load the model from the given app and model name
         try:
@@ -23,12 +40,64 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f'Model "{model_name}" not found in app "{app_name}".'))
             return
 
+        csv_files = resolve_csv_paths(csv_file)
+        if not csv_files:
+            self.stderr.write(self.style.ERROR(f'No CSV files match "{csv_file}".'))
+            return
+
         # Import CSV data using the csv_importer function
-        try:
-            created_count, skipped_count = import_csv_to_model(model, csv_file)
-            self.stdout.write(self.style.SUCCESS(f'Successfully created {created_count} records.'))
-            self.stdout.write(self.style.WARNING(f'Skipped {skipped_count} records (already existed).'))
-        except FileNotFoundError:
-            self.stderr.write(self.style.ERROR(f'File "{csv_file}" not found.'))
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f'Error during import: {str(e)}'))
+        if not bulk:
+            for path in csv_files:
+                try:
+                    created_count, skipped_count, errors = import_csv_to_model(model, path)
+                    self.stdout.write(self.style.SUCCESS(f'{path}: successfully created {created_count} records.'))
+                    self.stdout.write(self.style.WARNING(f'{path}: skipped {skipped_count} records (already existed).'))
+                    self.write_row_errors(path, errors)
+                except FileNotFoundError:
+                    self.stderr.write(self.style.ERROR(f'File "{path}" not found.'))
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f'{path}: error during import: {str(e)}'))
+            return
+
+        started = time.perf_counter()
+        results = import_csv_files(
+            model, csv_files,
+            workers=kwargs['workers'],
+            checkpoint_path=kwargs['checkpoint'] or None,
+            batch_size=kwargs['batch_size'],
+            unique_fields=unique_fields,
+            update_fields=upsert_fields,
+            dry_run=kwargs['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        totals = [0, 0, 0]
+        prefix = '[dry run] would have ' if kwargs['dry_run'] else ''
+        for path, counts, error in results:
+            if error:
+                self.stderr.write(self.style.ERROR(f'{path}: error during import: {error}'))
+            elif counts is None:
+                self.stdout.write(f'{path}: already imported (checkpoint), skipped.')
+            else:
+                created_count, updated_count, skipped_count, errors = counts
+                totals = [total + count for total, count in zip(totals, counts[:3])]
+                self.stdout.write(self.style.SUCCESS(
+                    f'{path}: {prefix}created {created_count}, updated {updated_count}, '
+                    f'skipped {skipped_count} (already existed or repeated).'
+                ))
+                self.write_row_errors(path, errors)
+
+        rows = sum(totals)  # rows with errors are reported per file and not counted
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}created {totals[0]} and updated {totals[1]} records; skipped {totals[2]}.'
+        ))
+        self.stdout.write(f'Processed {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else rows:.0f} rows/sec).')
+
+    def write_row_errors(self, path, errors, limit=20):
+        if not errors:
+            return
+        self.stderr.write(self.style.ERROR(f'{path}: {len(errors)} invalid value(s); those rows were not imported.'))
+        for error in errors[:limit]:
+            self.stderr.write(f'  row {error["row"]}, {error["field"]}: {error["error"]}')
+        if len(errors) > limit:
+            self.stderr.write(f'  ... and {len(errors) - limit} more.')
@@ -0,0 +1,12 @@
+# management/commands/prune_tombstones.py
+from django.core.management.base import BaseCommand
+
+from general.utils.query_filter import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete deletion tombstones older than TOMBSTONE_RETENTION_DAYS (delta-sync clients past that resync in full)"
+
+    def handle(self, *args, **kwargs):
+        pruned = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} tombstones.'))
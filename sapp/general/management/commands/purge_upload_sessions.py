@@ -0,0 +1,20 @@
+# management/commands/purge_upload_sessions.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from general.utils.uploads import purge_stale_sessions, purge_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    help = ("Delete chunked uploads idle for longer than UPLOAD_SESSION_TTL_HOURS, with their partial files, "
+            "then the stored blobs nothing references any more")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, help='Idle time after which an upload is purged (defaults to the setting)')
+
+    def handle(self, *args, **kwargs):
+        older_than = timedelta(hours=kwargs['hours']) if kwargs['hours'] is not None else None
+        purged = purge_stale_sessions(older_than)
+        blobs = purge_unreferenced_blobs()
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} upload sessions and {blobs} unreferenced blobs.'))
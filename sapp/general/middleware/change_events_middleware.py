@@ -0,0 +1,18 @@
+from general.utils.change_events import begin_request, end_request
+
+
+class ChangeEventMiddleware:
+    """
+    Collects the change events raised while a request runs and publishes them once it
+    finishes, coalesced per model and audience. A bulk operation then produces one
+    server-sent event per audience instead of one per row.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
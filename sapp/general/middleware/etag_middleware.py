@@ -1,52 +1,117 @@
-import math
 import logging
+import time
 from datetime import datetime, timezone
 from django.utils.http import http_date, parse_http_date_safe
 from django.http import HttpResponseNotModified
 from rest_framework.response import Response
 
+from general.utils.versioning import not_modified_response
+
+logger = logging.getLogger(__name__)
+
 class ETagIfModifiedSinceMiddleware:
     """
     Middleware to globally handle ETag and If-Modified-Since filtering for all API responses.
     Works for Django REST Framework & standard Django views.
+
+    Views using ResourceVersionMixin (general/utils/versioning.py) answer conditional GETs
+    from the resource version table once the request is authenticated and authorized; their
+    200 responses get the version ETag here. Other views fall back to deriving the ETag
+    from the `last_updated` values in the rendered response.
+
+    At DEBUG level on the `general.middleware.etag_middleware` logger, each request logs
+    its view (including serializer `.data`), render and ETag times; at other levels no
+    timing is taken.
     """
     def __init__(self, get_response):
         self.get_response = get_response
-        print("✅ ETagIfModifiedSinceMiddleware is loaded and active!")  # Confirms middleware is initialized
+        logger.debug("ETagIfModifiedSinceMiddleware loaded")
 
     def __call__(self, request):
-        print("\n")
-        print(f"🔄 Middleware triggered for: {request.path}")
+        timed = logger.isEnabledFor(logging.DEBUG)
+        request._etag_timings = {"start": time.perf_counter()} if timed else None
 
         # Extract If-Modified-Since header
         request.if_modified_since_dt = self.extract_if_modified_since(request)
+        request.resource_etag = None
+        request.resource_last_modified = None
 
         # Get response
         response = self.get_response(request)
+        if timed:
+            request._etag_timings["rendered"] = time.perf_counter()
 
+        response = self.process_conditional_response(request, response)
+
+        if timed:
+            self.log_timings(request, response)
+        return response
+
+    def process_conditional_response(self, request, response):
         # Check if response is valid for ETag processing
         if not isinstance(response, Response):
-            print(f"⏭️ Skipping middleware for {request.path} (Not a DRF Response)")
+            logger.debug("Skipping %s (not a DRF Response)", request.path)
             return response  
 
         if response.status_code not in [200, 201]:
-            print(f"⏭️ Skipping middleware for {request.path} (Response status: {response.status_code})")
+            logger.debug("Skipping %s (response status %s)", request.path, response.status_code)
             return response  
 
+        # Versioned views computed their validators before the handler ran
+        if request.resource_etag:
+            response["ETag"] = request.resource_etag
+            # Resources that have not changed since versioning began have no timestamp yet
+            last_modified = request.resource_last_modified or self.get_last_updated(response)
+            if last_modified:
+                if request.if_modified_since_dt and not request.headers.get("If-None-Match") and \
+                        last_modified <= request.if_modified_since_dt:
+                    return self.not_modified(request.resource_etag, last_modified)
+                response["Last-Modified"] = http_date(last_modified.timestamp())
+            return response
+
         # Apply ETag & Last-Modified headers
-        print(f"✅ Applying ETag & Last-Modified for: {request.path}")
         return self.apply_etag_and_last_modified(request, response)
 
+    def process_template_response(self, request, response):
+        """Called once the view has returned and before the response is rendered."""
+        if request._etag_timings is not None:
+            request._etag_timings["view_done"] = time.perf_counter()
+        return response
+
+    def log_timings(self, request, response):
+        timings = request._etag_timings
+        done = time.perf_counter()
+        view_started = timings.get("view_start", timings["start"])
+        view_done = timings.get("view_done", timings["rendered"])
+        fields = {
+            "path": request.path,
+            "status": response.status_code,
+            "view_ms": round((view_done - view_started) * 1000, 2),
+            "render_ms": round((timings["rendered"] - view_done) * 1000, 2),
+            "etag_ms": round((done - timings["rendered"]) * 1000, 2),
+            "total_ms": round((done - timings["start"]) * 1000, 2),
+        }
+        logger.debug(
+            "%(path)s status=%(status)s view_ms=%(view_ms)s render_ms=%(render_ms)s etag_ms=%(etag_ms)s total_ms=%(total_ms)s",
+            fields, extra=fields,
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request._etag_timings is not None:
+            request._etag_timings["view_start"] = time.perf_counter()
+        return None
+
+    def not_modified(self, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
     def extract_if_modified_since(self, request):
         """Extract If-Modified-Since header and convert to datetime."""
         if_modified_since = request.headers.get("If-Modified-Since")
         if if_modified_since:
             timestamp = parse_http_date_safe(if_modified_since)
             if timestamp:
-                print(f"📅 Parsed If-Modified-Since: {if_modified_since}")
-                return datetime.utcfromtimestamp(timestamp).replace(tzinfo=timezone.utc)
-            else:
-                print(f"⚠️ Failed to parse If-Modified-Since: {if_modified_since}")
+                return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+            logger.debug("Failed to parse If-Modified-Since: %r", if_modified_since)
         return None
 
     def apply_etag_and_last_modified(self, request, response):
@@ -54,12 +119,12 @@ class ETagIfModifiedSinceMiddleware:
         last_updated = self.get_last_updated(response)
 
         if not last_updated:
-            print(f"⚠️ No 'last_updated' found in response for {request.path}, skipping ETag.")
+            logger.debug("No 'last_updated' in response for %s, skipping ETag", request.path)
             return response
 
         # Check If-Modified-Since
         if request.if_modified_since_dt and last_updated <= request.if_modified_since_dt:
-            print(f"304 Not Modified: {request.path}")
+            logger.debug("304 Not Modified (If-Modified-Since) for %s", request.path)
             return HttpResponseNotModified()
 
         # Generate ETag (millisecond timestamp)
@@ -67,16 +132,13 @@ class ETagIfModifiedSinceMiddleware:
         client_etag = request.headers.get("If-None-Match")
 
         if client_etag == etag_value:
-            print(f"304 Not Modified (ETag match) for {request.path}")
+            logger.debug("304 Not Modified (ETag match) for %s", request.path)
             return HttpResponseNotModified()
 
-        # ✅ Set response headers
+        # Set response headers
         response["Last-Modified"] = http_date(last_updated.timestamp())
         response["ETag"] = etag_value
-        print(f"✅ ETag set: {etag_value} | Last-Modified: {response['Last-Modified']} for {request.path}")
-
         return response
-    print("\n")
 
     def get_last_updated(self, response):
         """
@@ -95,15 +157,11 @@ class ETagIfModifiedSinceMiddleware:
                     for obj in data if "last_updated" in obj
                 ]
                 if last_updated_list:
-                    last_updated = max(last_updated_list)
-                    print(f"📅 Extracted last_updated from list: {last_updated}")
-                    return last_updated
+                    return max(last_updated_list)
 
             elif isinstance(data, dict) and "last_updated" in data:
-                last_updated = datetime.fromisoformat(data["last_updated"]).replace(tzinfo=timezone.utc)
-                print(f"📅 Extracted last_updated from dict: {last_updated}")
-                return last_updated
+                return datetime.fromisoformat(data["last_updated"]).replace(tzinfo=timezone.utc)
 
-        except Exception as e:
-            print(f"❌ Error extracting last_updated: {e}")
+        except Exception:
+            logger.warning("Could not extract last_updated from response data", exc_info=True)
         return None
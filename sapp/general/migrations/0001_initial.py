@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('last_updated', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general', '0004_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tombstone',
+            name='scopes',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,98 @@
+import uuid
+from django.conf import settings
+from django.db import models
+
+
+class ResourceVersion(models.Model):
+    """
+    Monotonic version counter for a resource (a model, optionally narrowed to a scope such
+    as one class). Bumped whenever a row of the resource changes, so conditional GETs can
+    be answered from this table without running the view.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    last_updated = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so delta-sync clients can drop it from their local copy."""
+    model_label = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=64)
+    # '|'-delimited audiences the row was visible to (e.g. '|student:S1|7:A:2024-2025|'), empty if shared
+    scopes = models.CharField(max_length=255, blank=True, default='')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_label', 'deleted_at'], name='tombstone_model_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}:{self.object_id} deleted at {self.deleted_at}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Event log behind the database SSE broker. Every web process polls this table and fans
+    new events out to its own subscribers, so publishing works across processes. Only the
+    most recent events are kept, for Last-Event-ID replay.
+    """
+    channel = models.CharField(max_length=255, db_index=True)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.pk} {self.channel}"
+
+
+class StoredBlob(models.Model):
+    """
+    A stored file, kept once per distinct content. FileFields of uploaded documents and
+    images reference blob files, so the same worksheet uploaded by a whole class is stored
+    once.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='blobs/', max_length=255)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload: bytes are appended in order until `total_size` arrive."""
+    KIND_CHOICES = [
+        ('image', 'Image'),
+        ('document', 'Document'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    total_size = models.PositiveBigIntegerField()
+    received_size = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.CharField(max_length=255, blank=True)
+    blob = models.ForeignKey(StoredBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'last_updated'], name='upload_session_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.file_name} ({self.received_size}/{self.total_size})"
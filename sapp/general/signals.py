@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after rows are written with bulk_create/bulk_update, which send no post_save.
+# Arguments: sender (the model class) and instances (the objects written).
+post_bulk_write = Signal()
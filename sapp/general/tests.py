@@ -0,0 +1,319 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import AuthUser, Faculty, Student
+from accounts.tests import make_students, make_users
+from features.models import Announcement, Assignment, Result, ResultLock, Submission
+from general.importers.csv_importer import ImportCheckpoint, bulk_import_csv_to_model, import_csv_files
+from general.importers.schemas import get_import_schema
+from general.models import StoredBlob, UploadSession
+from general.utils.change_events import begin_request, end_request
+from general.utils.sse import BROADCAST_CHANNEL
+from general.utils.thumbnails import ImageDerivativeField, derivative_name, generate_derivatives
+from general.utils.uploads import purge_stale_sessions, purge_unreferenced_blobs
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 56
+
+
+class NotificationStreamTests(TestCase):
+
+    def test_wsgi_request_is_refused(self):
+        response = Client(SERVER_NAME='localhost').get('/notifications/stream/')
+        self.assertEqual(response.status_code, 501)
+
+    async def test_asgi_request_reaches_authentication(self):
+        response = await AsyncClient(SERVER_NAME='localhost').get('/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+
+
+class ChangeEventTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('general.utils.change_events.get_broker')
+        self.broker = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def announce(self, title):
+        return Announcement.objects.create(title=title, description='', date='2024-06-03', timings='9-10',
+                                           offline_or_online='Offline', till=timezone.now())
+
+    def test_changes_in_one_request_are_published_once(self):
+        token = begin_request()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                announcements = [self.announce(title) for title in ('Sports day', 'Exams', 'Holiday')]
+                ids = [str(announcement.pk) for announcement in announcements]
+                announcements[0].delete()
+        self.broker.publish.assert_not_called()
+        end_request(token)
+
+        self.broker.publish.assert_called_once()
+        channel, payload = self.broker.publish.call_args.args
+        self.assertEqual(channel, BROADCAST_CHANNEL)
+        self.assertEqual(payload['ids'], ids)
+        self.assertEqual(payload['actions'], ['created', 'deleted'])
+
+    def test_rolled_back_changes_are_not_published(self):
+        token = begin_request()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.announce('Cancelled')
+                raise RuntimeError
+        end_request(token)
+        self.assertEqual(callbacks, [])
+        self.broker.publish.assert_not_called()
+
+
+class CsvImportTestCase(TestCase):
+
+    def write_csv(self, text):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as csv_file:
+            csv_file.write(text)
+        self.addCleanup(os.remove, csv_file.name)
+        return csv_file.name
+
+
+class StudentCsvImportTests(CsvImportTestCase):
+
+    def test_bulk_import_generates_student_codes(self):
+        make_users('student', 2, 'pupil')
+        path = self.write_csv(
+            "user,enrollment_number,standard,section,academic_year\n"
+            "pupil0,EN0,7,A,2024-2025\n"
+            "pupil1,EN1,8,,2024-2025\n"
+        )
+        created, _, _, errors = bulk_import_csv_to_model(Student, path)
+        self.assertEqual((created, errors), (2, []))
+        self.assertEqual(
+            dict(Student.objects.values_list('enrollment_number', 'student_code')),
+            {
+                'EN0': Student.build_student_code('pupil0@example.com', 7, 'A', '2024-2025'),
+                'EN1': Student.build_student_code('pupil1@example.com', 8, None, '2024-2025'),
+            },
+        )
+
+
+class ImportSchemaTests(CsvImportTestCase):
+
+    def setUp(self):
+        self.students = make_students(3)
+        ResultLock.objects.create(title='Term 1', start_date='2024-06-01', end_date='2024-06-30')
+
+    def test_foreign_keys_and_json_are_converted_and_bad_rows_reported(self):
+        first, second, _ = self.students
+        path = self.write_csv(
+            "student,result_lock,subject,marks\n"
+            f'{first.student_code},Term 1,Maths,"{{""total"": 90}}"\n'
+            f"{second.student_code},Term 1,Maths,\"{{'total': 75}}\"\n"
+            "nobody,Term 1,Maths,{}\n"
+            f"{first.student_code},Term 2,Maths,not json\n"
+        )
+        created, _, _, errors = bulk_import_csv_to_model(Result, path)
+        self.assertEqual(created, 2)
+        self.assertEqual(
+            dict(Result.objects.values_list('student_id', 'marks')),
+            {first.student_code: {'total': 90}, second.student_code: {'total': 75}},
+        )
+        self.assertEqual([(error['row'], error['field']) for error in errors],
+                         [(3, 'student'), (4, 'result_lock'), (4, 'marks')])
+
+    def test_foreign_keys_are_resolved_once_per_batch(self):
+        schema = get_import_schema(Result)
+        counts = []
+        for students in (self.students[:1], self.students):
+            rows = [{'student': student.student_code, 'result_lock': 'Term 1', 'subject': 'Maths', 'marks': '{}'}
+                    for student in students]
+            with CaptureQueriesContext(connection) as queries:
+                converted, errors = schema.convert_batch(rows)
+            self.assertEqual((len(converted), errors), (len(students), []))
+            counts.append(len(queries))
+        self.assertEqual(counts, [2, 2])
+
+
+class CheckpointedImportTests(CsvImportTestCase):
+
+    def test_interrupted_import_resumes_without_duplicating_rows(self):
+        make_users('student', 3, 'pupil')
+        path = self.write_csv(
+            "user,enrollment_number,standard,section,academic_year\n"
+            + "".join(f"pupil{i},EN{i},7,A,2024-2025\n" for i in range(3))
+        )
+        checkpoint_path = self.write_csv('{}')
+        record = ImportCheckpoint.record
+
+        def interrupt_after_first_batch(checkpoint, *args, **kwargs):
+            record(checkpoint, *args, **kwargs)
+            raise KeyboardInterrupt
+
+        with mock.patch.object(ImportCheckpoint, 'record', interrupt_after_first_batch), self.assertRaises(KeyboardInterrupt):
+            import_csv_files(Student, [path], checkpoint_path=checkpoint_path, batch_size=1)
+        self.assertEqual(Student.objects.count(), 1)
+        self.assertEqual(ImportCheckpoint(checkpoint_path).entry(path)['rows'], 1)
+
+        [(_, (created, _, skipped, errors), error)] = import_csv_files(Student, [path], checkpoint_path=checkpoint_path, batch_size=1)
+        self.assertEqual((created, skipped, errors, error), (2, 0, [], None))
+        self.assertEqual(sorted(Student.objects.values_list('enrollment_number', flat=True)), ['EN0', 'EN1', 'EN2'])
+        self.assertEqual(import_csv_files(Student, [path], checkpoint_path=checkpoint_path), [(path, None, None)])
+
+
+class MediaTestCase(TestCase):
+    """Runs against a throwaway MEDIA_ROOT and upload directory."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, UPLOAD_SESSION_DIR=f"{media_root}/sessions", THUMBNAIL_ASYNC=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.teacher = AuthUser.objects.create(username='teacher', email='teacher@example.com', role='faculty', password='!')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.teacher)
+
+    def upload(self, content, file_name='sheet.png', kind='image'):
+        """Send `content` in two chunks and complete it; returns the completed session data."""
+        session = self.client.post('/uploads/', {'kind': kind, 'file_name': file_name, 'total_size': len(content)},
+                                   format='json').data
+        url = f"/uploads/{session['id']}/"
+        half = len(content) // 2
+        for offset, chunk in ((0, content[:half]), (half, content[half:])):
+            response = self.client.put(url, chunk, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(f"{url}complete/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+
+class UploadApiTests(MediaTestCase):
+
+    def test_chunked_upload_is_stored_once_per_content(self):
+        first, second = self.upload(PNG), self.upload(PNG, file_name='copy.png')
+        self.assertEqual(first['status'], 'completed')
+        self.assertEqual(first['sha256'], second['sha256'])
+        self.assertEqual(StoredBlob.objects.count(), 1)
+
+    def test_reassembled_upload_matches_its_sha256(self):
+        content = PNG + bytes(range(256)) * 4
+        first = self.upload(content)
+        second = self.upload(content, file_name='again.png')
+        sha256 = hashlib.sha256(content).hexdigest()
+        self.assertEqual((first['sha256'], second['sha256']), (sha256, sha256))
+
+        blob = StoredBlob.objects.get()
+        self.assertEqual(set(UploadSession.objects.values_list('blob', flat=True)), {blob.pk})
+        with blob.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertEqual(default_storage.listdir(f"blobs/{sha256[:2]}")[1], [f"{sha256}.png"])
+
+    def test_wrong_offset_is_a_conflict(self):
+        session = self.client.post('/uploads/', {'kind': 'image', 'file_name': 'a.png', 'total_size': len(PNG)},
+                                   format='json').data
+        response = self.client.put(f"/uploads/{session['id']}/", PNG[8:], content_type='application/octet-stream',
+                                   HTTP_UPLOAD_OFFSET='8')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received_size'], 0)
+
+    def test_content_must_match_the_declared_type(self):
+        session = self.client.post('/uploads/', {'kind': 'image', 'file_name': 'a.png', 'total_size': 4},
+                                   format='json').data
+        response = self.client.put(f"/uploads/{session['id']}/", b'%PDF', content_type='application/octet-stream',
+                                   HTTP_UPLOAD_OFFSET='0')
+        self.assertEqual(response.status_code, 415)
+
+    def test_purge_keeps_only_referenced_blobs(self):
+        kept = self.upload(PNG)
+        dropped = self.upload(b'%PDF-' + b'1' * 20, file_name='notes.pdf', kind='document')
+        faculty = Faculty.objects.create(user=self.teacher, faculty_id='F1')
+        Assignment.objects.create(title='Essay', subject='English', faculty=faculty, standard='7', section='A',
+                                  academic_year='2024-2025', image=StoredBlob.objects.get(sha256=kept['sha256']).file.name)
+
+        self.assertEqual(purge_stale_sessions(timedelta(0)), 2)
+        self.assertEqual(purge_unreferenced_blobs(), 1)
+        self.assertEqual(list(StoredBlob.objects.values_list('sha256', flat=True)), [kept['sha256']])
+        self.assertFalse(default_storage.exists(f"blobs/{dropped['sha256'][:2]}/{dropped['sha256']}.pdf"))
+        self.assertFalse(UploadSession.objects.exists())
+
+
+class MediaPathTests(MediaTestCase):
+
+    def test_protected_prefix_cannot_be_dodged_by_path_segments(self):
+        default_storage.save('submissions/docs/x.txt', ContentFile(b'answers'))
+        anonymous = Client(SERVER_NAME='localhost')
+        self.assertEqual(anonymous.get('/media/submissions/docs/x.txt').status_code, 401)
+        self.assertEqual(anonymous.get('/media/students/../submissions/docs/x.txt').status_code, 404)
+        self.assertEqual(anonymous.get('/media/./submissions/docs/x.txt').status_code, 401)
+        self.assertEqual(anonymous.get('/media/submissions//docs/x.txt').status_code, 401)
+
+
+class BlobAccessTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner, self.classmate = make_students(2)
+        faculty = Faculty.objects.create(user=self.teacher, faculty_id='F1')
+        self.assignment = Assignment.objects.create(title='Essay', subject='English', faculty=faculty, standard='7',
+                                                    section='A', academic_year='2024-2025')
+
+    def blob_name(self, content, user, file_name='sheet.png'):
+        self.client.force_authenticate(user)
+        return StoredBlob.objects.get(sha256=self.upload(content, file_name)['sha256']).file.name
+
+    def get_media(self, name, student):
+        token = RefreshToken.for_user(student.user).access_token
+        return Client(SERVER_NAME='localhost').get(f"/media/{name}", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_worksheet_stays_readable_after_a_student_submits_the_same_file(self):
+        worksheet = self.blob_name(PNG, self.teacher)
+        Assignment.objects.filter(pk=self.assignment.pk).update(document=worksheet)
+        Submission.objects.create(assignment=self.assignment, student=self.owner, document=self.blob_name(PNG, self.owner.user))
+        self.assertEqual(self.get_media(worksheet, self.classmate).status_code, 200)
+
+    def test_submission_only_blob_is_private_to_its_student(self):
+        name = self.blob_name(PNG, self.owner.user)
+        Submission.objects.create(assignment=self.assignment, student=self.owner, document=name)
+        self.assertEqual(self.get_media(name, self.owner).status_code, 200)
+        self.assertEqual(self.get_media(name, self.classmate).status_code, 403)
+
+    def test_unattached_blob_is_readable_by_its_uploader_only(self):
+        name = self.blob_name(PNG, self.owner.user)
+        self.assertEqual(self.get_media(name, self.owner).status_code, 200)
+        self.assertEqual(self.get_media(name, self.classmate).status_code, 403)
+
+    def test_derivatives_are_generated_and_served(self):
+        photo = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'teal').save(photo, 'PNG')
+        name = self.blob_name(photo.getvalue(), self.owner.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Submission.objects.create(assignment=self.assignment, student=self.owner, image=name)
+
+        for derivative, size in (('thumb', (256, 128)), ('web', (1280, 640))):
+            response = self.get_media(derivative_name(name, derivative), self.owner)
+            self.assertEqual(response.status_code, 200)
+            with Image.open(io.BytesIO(b''.join(response.streaming_content))) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', size))
+        self.assertEqual(generate_derivatives(name), 0)
+
+    def test_missing_derivative_redirects_to_the_original(self):
+        name = self.blob_name(PNG, self.owner.user)
+        self.assertEqual(ImageDerivativeField('thumb').to_representation(StoredBlob.objects.get(file=name).file),
+                         f"/media/{name}.thumb.webp")
+        response = self.get_media(f"{name}.thumb.webp", self.owner)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f"/media/{name}")
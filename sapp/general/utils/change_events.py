@@ -0,0 +1,116 @@
+import contextvars
+import logging
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from general.utils.sse import BROADCAST_CHANNEL, class_channel, get_broker, user_channel
+
+logger = logging.getLogger(__name__)
+
+# Pending events of the current request, keyed by (model label, audience channel).
+# None outside a request, where each change is published on its own after commit.
+_pending = contextvars.ContextVar("pending_change_events", default=None)
+
+
+def _broadcast(instance):
+    return [BROADCAST_CHANNEL]
+
+
+def _assignment_audience(instance):
+    return [class_channel(instance.standard, instance.section, instance.academic_year)]
+
+
+def _submission_audience(instance):
+    # Both relations are usually cached on the instance by the view that saved it
+    assignment, student = instance.assignment, instance.student
+    return [
+        class_channel(assignment.standard, assignment.section, assignment.academic_year),
+        user_channel(student.user_id),
+    ]
+
+
+# Model label -> function returning the channels that should hear about a change.
+CHANGE_EVENT_MODELS = {
+    'features.announcement': _broadcast,
+    'features.calendarevent': _broadcast,
+    'features.attendancelock': _broadcast,
+    'features.resultlock': _broadcast,
+    'features.assignment': _assignment_audience,
+    'features.submission': _submission_audience,
+}
+
+
+def _add(events, label, channel, object_id, last_updated, action):
+    # dicts keep ids and actions unique and in order
+    event = events.setdefault((label, channel), {"model": label, "ids": {}, "actions": {}, "last_updated": None})
+    event["ids"][object_id] = None
+    event["actions"][action] = None
+    if last_updated and (event["last_updated"] is None or last_updated > event["last_updated"]):
+        event["last_updated"] = last_updated
+
+
+def publish_events(events):
+    """Publish collected events: one per (model, audience channel), however many rows changed."""
+    broker = get_broker()
+    for (label, channel), event in events.items():
+        payload = {
+            "model": label,
+            "ids": list(event["ids"]),
+            "actions": list(event["actions"]),
+            "last_updated": event["last_updated"].isoformat() if event["last_updated"] else None,
+            "audience": channel,
+        }
+        try:
+            broker.publish(channel, payload)
+        except Exception:
+            logger.exception("Failed to publish change event for %s on %s", label, channel)
+
+
+def _record_change(sender, instance, action):
+    label = sender._meta.label_lower
+    channels = CHANGE_EVENT_MODELS[label](instance)
+    object_id = str(instance.pk)
+    last_updated = getattr(instance, "last_updated", None)
+
+    def collect():
+        pending = _pending.get()
+        if pending is not None:
+            for channel in channels:
+                _add(pending, label, channel, object_id, last_updated, action)
+        else:
+            events = {}
+            for channel in channels:
+                _add(events, label, channel, object_id, last_updated, action)
+            publish_events(events)
+
+    # Only changes that actually commit are announced.
+    transaction.on_commit(collect)
+
+
+def _on_save(sender, instance, created, **kwargs):
+    _record_change(sender, instance, "created" if created else "updated")
+
+
+def _on_delete(sender, instance, **kwargs):
+    _record_change(sender, instance, "deleted")
+
+
+def begin_request():
+    """Start collecting change events for the current request; returns a token for end_request."""
+    return _pending.set({})
+
+
+def end_request(token):
+    """Publish everything collected since begin_request and stop collecting."""
+    events = _pending.get() or {}
+    _pending.reset(token)
+    if events:
+        publish_events(events)
+
+
+def connect_change_event_signals():
+    for label in CHANGE_EVENT_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_on_save, sender=model, dispatch_uid=f"change-event-save-{label}")
+        post_delete.connect(_on_delete, sender=model, dispatch_uid=f"change-event-delete-{label}")
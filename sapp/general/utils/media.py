@@ -0,0 +1,195 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import Q
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_http_methods
+
+from general.utils.sse import authenticate_request
+from general.utils.thumbnails import source_name
+from general.utils.uploads import BLOB_FIELDS, blob_referenced
+
+READ_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _submission_file_access(user, name):
+    from features.models import Submission
+
+    if user.role in ('faculty', 'so_admin'):
+        return True
+    return Submission.objects.filter(Q(image=name) | Q(document=name), student__user=user).exists()
+
+
+def _blob_access(user, name):
+    """
+    Blobs are shared by content, so one file may be both a teacher's worksheet and a
+    student's submission. It is readable by staff, by anyone when an assignment, portion
+    or profile uses it, by the students whose submissions reference it and by whoever
+    uploaded it (before it is attached anywhere).
+    """
+    from general.models import UploadSession
+
+    if user.role in ('faculty', 'so_admin'):
+        return True
+    if blob_referenced(name, [label for label in BLOB_FIELDS if label != 'features.submission']):
+        return True
+    if _submission_file_access(user, name):
+        return True
+    return UploadSession.objects.filter(user=user, blob__file=name).exists()
+
+
+# Path prefix -> function(user, name) deciding whether an authenticated user may read the
+# file. Files under other prefixes (profile pictures, assignments, portions) are public.
+PROTECTED_MEDIA = {
+    'submissions/': _submission_file_access,
+    'blobs/': _blob_access,
+}
+
+
+def media_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_matches(header, etag):
+    return header.strip() == '*' or etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, None to serve the whole file, or
+    'unsatisfiable'. Multiple ranges are answered with the whole file."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            return 'unsatisfiable'
+    if start >= size:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            data = handle.read(min(READ_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+@require_http_methods(['GET', 'HEAD'])
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT after checking access.
+
+    With MEDIA_OFFLOAD set to `x-accel` (nginx) or `x-sendfile` (Apache, lighttpd) the
+    response only names the file and the front-end server sends the bytes. Otherwise the
+    file is sent from Python: conditional GETs (ETag / If-None-Match, If-Modified-Since)
+    get 304s, `Range` requests get 206 partial content, and full responses use
+    FileResponse so the WSGI server can use sendfile. A derivative (see thumbnails.py)
+    that has not been generated yet redirects to its original.
+    """
+    # The access check below matches prefixes, so it must see the same path the file is
+    # opened by: drop `.` and empty segments and refuse `..` outright.
+    if '..' in path.split('/'):
+        raise Http404
+    path = posixpath.normpath(path).lstrip('/')
+    if path in ('', '.'):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    prefix = next((prefix for prefix in PROTECTED_MEDIA if path.startswith(prefix)), None)
+    if prefix:
+        user = authenticate_request(request)
+        if user is None:
+            return HttpResponse(status=401)
+        # Thumbnails are readable by whoever may read their original
+        if not PROTECTED_MEDIA[prefix](user, source_name(path)):
+            return HttpResponse(status=403)
+
+    try:
+        stat = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        source = source_name(path)
+        if source == path:
+            raise Http404
+        # Derivatives are generated after the upload commits; until then send the original
+        query = request.META.get('QUERY_STRING')
+        return HttpResponseRedirect(settings.MEDIA_URL + quote(source) + (f"?{query}" if query else ''))
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = media_etag(stat)
+    cache_control = f"{'private' if prefix else 'public'}, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+    if path.startswith('blobs/'):
+        cache_control += ', immutable'  # blob names are content hashes
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Cache-Control'] = cache_control
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return finish(HttpResponseNotModified())
+    else:
+        modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        if modified_since is not None and int(stat.st_mtime) <= modified_since:
+            return finish(HttpResponseNotModified())
+
+    offload = settings.MEDIA_OFFLOAD
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + path
+        else:
+            response['X-Sendfile'] = full_path
+        return finish(response)
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and _etag_matches(request.headers.get('If-Range', etag), etag):
+        byte_range = parse_range(range_header, stat.st_size)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return finish(response)
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stat.st_size
+        return finish(response)
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_range(full_path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = end - start + 1
+        return finish(response)
+
+    return finish(FileResponse(open(full_path, 'rb'), content_type=content_type))
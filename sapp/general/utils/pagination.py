@@ -1,4 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class CustomPagination(PageNumberPagination):
     page_size = 12  # Adjust as needed
@@ -10,4 +18,90 @@ class StandardPagination(PageNumberPagination):
     page_size = 12 
     
 class SubjectPagination(PageNumberPagination):
-    page_size = 6     
\ No newline at end of file
+    page_size = 6     
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination ordered on (last_updated, id).
+
+    Each page is fetched with `WHERE (last_updated, id) > cursor ... LIMIT n`, so deep pages
+    cost the same as the first one, no COUNT(*) is issued, and rows inserted or updated while
+    a client is paging land after its cursor instead of shifting the pages it has not read yet.
+
+    Pagination is opt-in so existing clients keep receiving plain lists: it only applies when
+    the request carries `cursor` or `page_size`.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by('last_updated', 'pk')
+        if position:
+            last_updated, pk = position
+            queryset = queryset.filter(Q(last_updated__gt=last_updated) | Q(last_updated=last_updated, pk__gt=pk))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = (results[-1].last_updated, results[-1].pk) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            last_updated, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            last_updated = parse_datetime(last_updated)
+            pk = model._meta.pk.to_python(pk)
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if last_updated is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return last_updated, pk
+
+    def encode_cursor(self, position):
+        last_updated, pk = position
+        payload = json.dumps([last_updated.isoformat(), str(pk)])
+        return base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
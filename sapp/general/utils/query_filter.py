@@ -1,16 +1,194 @@
 # File: sapp/general/utils/query_filter.py
 
-from django.db.models.signals import pre_init
-from django.dispatch import receiver
-from django.db.models import QuerySet
-from datetime import datetime, timezone
-
-@receiver(pre_init)
-def filter_queryset_based_on_if_modified_since(sender, args, kwargs, **extras):
-    print("🔴 Signal triggered!")  # Debug print to confirm signal is fired
-
-    request = kwargs.get("request", None)
-    if request and hasattr(request, "if_modified_since_dt") and request.if_modified_since_dt:
-        if hasattr(sender, "last_updated") and isinstance(sender.objects, QuerySet):
-            print(f"🔍 Applying global filter: last_updated > {request.if_modified_since_dt}")
-            kwargs["queryset"] = sender.objects.filter(last_updated__gt=request.if_modified_since_dt)
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.response import Response
+
+
+def student_scope(student_code):
+    return f"student:{student_code}"
+
+
+def attendance_tombstone_scopes(instance):
+    """A deleted attendance row is visible to its student and to its class."""
+    from general.utils.versioning import attendance_scopes
+
+    return [student_scope(instance.student_id), *attendance_scopes(instance)]
+
+
+def student_tombstone_scopes(instance):
+    return [student_scope(instance.student_id)]
+
+
+# Models whose deletions are recorded for delta-sync clients -> function returning the
+# audiences a deleted row was visible to (or None when every reader of the model saw it)
+DELTA_SYNC_MODELS = {
+    'accounts.student': None,
+    'accounts.faculty': None,
+    'accounts.soadmin': None,
+    'features.attendance': attendance_tombstone_scopes,
+    'features.attendancelock': None,
+    'features.announcement': None,
+    'features.calendarevent': None,
+    'features.resultlock': None,
+    'features.result': student_tombstone_scopes,
+    'features.assignment': None,
+    'features.submission': student_tombstone_scopes,
+    'features.portion': None,
+}
+
+
+def tombstone_cutoff():
+    """Tombstones older than this are pruned, so deltas cannot reach further back."""
+    return timezone.now() - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+
+
+SYNC_TOKEN_SALT = "general.delta-sync"
+SYNC_TOKEN_HEADER = "X-Sync-Token"
+
+
+def make_sync_token(at=None):
+    """
+    An opaque, signed watermark for `?since=`. It is taken before the rows are read and
+    set back by DELTA_SYNC_OVERLAP_SECONDS, so rows whose last_updated was stamped before
+    the read but committed after it (and tombstones likewise) fall inside the next delta.
+    Clients may therefore see a row twice and must apply deltas idempotently.
+    """
+    at = (at or timezone.now()) - timedelta(seconds=settings.DELTA_SYNC_OVERLAP_SECONDS)
+    return signing.dumps(at.isoformat(), salt=SYNC_TOKEN_SALT, compress=True)
+
+
+def get_modified_since(request):
+    """
+    The watermark of an explicit delta-sync request (`?since=<sync token>`), or None.
+    Only tokens issued by this server are accepted, never a client-picked time, so client
+    clock skew cannot hide changes. An ordinary If-Modified-Since header keeps its
+    conditional-GET meaning and never switches a list to the delta body.
+    """
+    raw = request.query_params.get("since")
+    if not raw:
+        return None
+    try:
+        since = parse_datetime(signing.loads(raw, salt=SYNC_TOKEN_SALT))
+    except (signing.BadSignature, TypeError, ValueError):
+        since = None
+    if since is None:
+        raise ValidationError({"since": f"Send the sync_token (or {SYNC_TOKEN_HEADER} header) of a previous response."})
+    return since
+
+
+class ModifiedSinceFilter(BaseFilterBackend):
+    """Narrow a queryset to rows with last_updated after the request's `?since=`."""
+
+    def filter_queryset(self, request, queryset, view):
+        since = get_modified_since(request)
+        if since and any(field.name == "last_updated" for field in queryset.model._meta.get_fields()):
+            return queryset.filter(last_updated__gt=since)
+        return queryset
+
+
+def deleted_since(model, since, scope=None):
+    """
+    Primary keys (as strings) of rows of `model` deleted after `since`. With `scope`, only
+    rows that were visible to that audience (see DELTA_SYNC_MODELS) are reported.
+    """
+    from general.models import Tombstone
+
+    tombstones = Tombstone.objects.filter(model_label=model._meta.label_lower, deleted_at__gt=since)
+    if scope:
+        tombstones = tombstones.filter(scopes__contains=f"|{scope}|")
+    return list(tombstones.values_list('object_id', flat=True).distinct())
+
+
+def delta_response(request, queryset, serializer_class, view=None, context=None, scope=None):
+    """
+    For a request carrying `?since=`, return a Response with only the rows changed since
+    then plus the ids deleted since then (limited to `scope` when the caller reads one
+    student's or one class's rows) and the `sync_token` to send next time. Returns 410
+    when `since` predates the tombstone retention window so the client must resync in full.
+
+    For a regular request it returns None, and the token for the full list the caller is
+    about to read is sent in the X-Sync-Token header by SyncTokenMixin.
+    """
+    sync_token = make_sync_token()
+    since = get_modified_since(request)
+    if not since:
+        request.sync_token = sync_token
+        return None
+    if since < tombstone_cutoff():
+        return Response(
+            {"detail": "since is older than the deletion history; fetch the full list instead."},
+            status=status.HTTP_410_GONE,
+        )
+    changed = ModifiedSinceFilter().filter_queryset(request, queryset, view)
+    return Response({
+        "results": serializer_class(changed, many=True, context=context or {}).data,
+        "deleted": deleted_since(queryset.model, since, scope),
+        "sync_token": sync_token,
+    })
+
+
+class SyncTokenMixin:
+    """View mixin sending the sync token of a full list (see delta_response) as X-Sync-Token."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        sync_token = getattr(request, "sync_token", None)
+        if sync_token and response.status_code == status.HTTP_200_OK:
+            response[SYNC_TOKEN_HEADER] = sync_token
+        return response
+
+
+class DeltaSyncMixin(SyncTokenMixin):
+    """
+    Generic-view mixin: a list request with `?since=<sync token>` returns
+    {"results": <changed rows>, "deleted": <deleted ids>, "sync_token"} instead of the
+    whole collection; full lists carry their token in the X-Sync-Token header.
+    Views whose readers only see their own rows override get_delta_scope().
+    """
+
+    def get_delta_scope(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        response = delta_response(request, self.filter_queryset(self.get_queryset()),
+                                  self.get_serializer_class(), self, self.get_serializer_context(),
+                                  scope=self.get_delta_scope())
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    from general.models import Tombstone
+
+    label = sender._meta.label_lower
+    scopes_for = DELTA_SYNC_MODELS.get(label)
+    scopes = scopes_for(instance) if scopes_for else []
+    Tombstone.objects.create(
+        model_label=label,
+        object_id=str(instance.pk),
+        scopes=f"|{'|'.join(scopes)}|" if scopes else '',
+    )
+
+
+def prune_tombstones():
+    """Delete tombstones past TOMBSTONE_RETENTION_DAYS; returns how many were removed."""
+    from general.models import Tombstone
+
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=tombstone_cutoff()).delete()
+    return deleted
+
+
+def connect_tombstone_signals():
+    for label in DELTA_SYNC_MODELS:
+        post_delete.connect(record_tombstone, sender=apps.get_model(label), dispatch_uid=f"tombstone-{label}")
@@ -1,29 +1,293 @@
+import asyncio
+import collections
+import itertools
 import json
+import logging
+import threading
 import time
-import queue
-from django.http import StreamingHttpResponse
 
-# Queue to store notifications
-notification_queue = queue.Queue()
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_CHANNEL = "broadcast"
+KEEP_ALIVE_SECONDS = 15
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def class_channel(standard, section, academic_year):
+    return f"class:{standard}:{section}:{academic_year}"
+
+
+class InMemoryBroker:
+    """
+    Process-local pub/sub broker.
+
+    Every published event is appended to a bounded ring buffer (for Last-Event-ID replay)
+    and fanned out to every subscriber of its channel. Subscribers are asyncio queues
+    drained by async SSE responses, so an idle connection costs a queue, not a thread.
+    `publish` is thread-safe and may be called from sync views and signal handlers.
+    """
+
+    def __init__(self, buffer_size=1000, subscriber_queue_size=100):
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.subscriber_queue_size = subscriber_queue_size
+
+    def publish(self, channel, data):
+        """Publish `data` (a JSON-serializable dict) on `channel` and return the event."""
+        with self._lock:
+            event = {"id": next(self._ids), "channel": channel, "data": data}
+            self._buffer.append(event)
+        self._dispatch(event)
+        return event
+
+    def _dispatch(self, event):
+        with self._lock:
+            subscribers = [subscriber for subscriber in self._subscribers if event["channel"] in subscriber[2]]
+        for queue, loop, _ in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._enqueue, queue, event)
+            except RuntimeError:  # the subscriber's event loop has closed
+                self._discard(queue)
+
+    def _enqueue(self, queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A consumer that cannot keep up is dropped; it reconnects and replays.
+            self._discard(queue)
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def _discard(self, queue):
+        with self._lock:
+            self._subscribers = {subscriber for subscriber in self._subscribers if subscriber[0] is not queue}
+
+    async def replay(self, channels, last_event_id):
+        """Buffered events on `channels` newer than `last_event_id`."""
+        with self._lock:
+            return [event for event in self._buffer if event["id"] > last_event_id and event["channel"] in channels]
+
+    async def subscribe(self, channels, last_event_id=None):
+        """
+        Async iterator of events on `channels`, starting with any missed buffered events.
+        Yields None once the subscription is registered and whenever a keep-alive is due.
+        """
+        channels = frozenset(channels)
+        queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        subscriber = (queue, asyncio.get_running_loop(), channels)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        await self._on_subscribe()
 
-def event_stream():
-    """Generator function for SSE, listening to the queue."""
-    while True:
         try:
-            # Wait for a notification
-            notification = notification_queue.get(timeout=30)  # Blocks for 30 seconds
-            data = json.dumps(notification)
-            yield f"data: {data}\n\n"  # SSE format
-        except queue.Empty:
-            yield ": keep-alive\n\n"  # Prevents connection timeout
-
-def sse_notifications(request):
-    """SSE endpoint to stream real-time notifications."""
+            yield None
+            seen = last_event_id or 0
+            if last_event_id is not None:
+                for event in await self.replay(channels, last_event_id):
+                    seen = event["id"]
+                    yield event
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEP_ALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None  # lets the response send a keep-alive comment
+                    continue
+                if event is None:  # dropped as a slow consumer
+                    return
+                if event["id"] > seen:
+                    seen = event["id"]
+                    yield event
+        finally:
+            self._discard(queue)
+
+    async def _on_subscribe(self):
+        pass
+
+
+class DatabaseBroker(InMemoryBroker):
+    """
+    Broker for multi-process deployments backed by the NotificationEvent table.
+
+    `publish` inserts a row; each process runs one poller task that reads new rows every
+    `poll_interval` seconds and fans them out to its local subscribers, so database load
+    does not grow with the number of connected clients. Rows older than the last
+    `buffer_size` events are pruned and replay is served from the table.
+    """
+
+    def __init__(self, buffer_size=1000, subscriber_queue_size=100, poll_interval=1.0, prune_every=100):
+        super().__init__(buffer_size, subscriber_queue_size)
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        self.prune_every = prune_every
+        self._published = itertools.count(1)
+        self._pollers = {}
+
+    def publish(self, channel, data):
+        from general.models import NotificationEvent
+
+        row = NotificationEvent.objects.create(channel=channel, payload=data)
+        if next(self._published) % self.prune_every == 0:
+            NotificationEvent.objects.filter(id__lte=row.id - self.buffer_size).delete()
+        return {"id": row.id, "channel": channel, "data": data}
+
+    async def replay(self, channels, last_event_id):
+        return await sync_to_async(self._fetch, thread_sensitive=False)(last_event_id, channels)
+
+    def _fetch(self, after_id, channels=None):
+        from general.models import NotificationEvent
+
+        events = NotificationEvent.objects.filter(id__gt=after_id).order_by('id')
+        if channels is not None:
+            events = events.filter(channel__in=channels)
+        return [
+            {"id": event_id, "channel": channel, "data": payload}
+            for event_id, channel, payload in events.values_list('id', 'channel', 'payload')[:self.buffer_size]
+        ]
+
+    def _latest_id(self):
+        from general.models import NotificationEvent
+
+        return NotificationEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    async def _on_subscribe(self):
+        loop = asyncio.get_running_loop()
+        poller = self._pollers.get(loop)
+        if poller is None or poller.done():
+            self._pollers[loop] = loop.create_task(self._poll())
+
+    async def _poll(self):
+        last_id = await sync_to_async(self._latest_id, thread_sensitive=False)()
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    return
+            try:
+                for event in await sync_to_async(self._fetch, thread_sensitive=False)(last_id):
+                    last_id = event["id"]
+                    self._dispatch(event)
+            except Exception:
+                logger.exception("SSE database broker poll failed")
+            await asyncio.sleep(self.poll_interval)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by settings.SSE_BROKER."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(settings, "SSE_BROKER", "general.utils.sse.InMemoryBroker")
+                _broker = import_string(broker_path)(**getattr(settings, "SSE_BROKER_OPTIONS", {}))
+    return _broker
+
+
+def format_event(event):
+    """Serialize a broker event in SSE wire format."""
+    return f"id: {event['id']}\nevent: {event['channel']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def authenticate_request(request):
+    """Authenticate with the API's JWT, from the Authorization header or a `token` query parameter
+    (EventSource cannot send headers)."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    authenticator = JWTAuthentication()
+    try:
+        result = authenticator.authenticate(request)
+        if result is None and request.GET.get("token"):
+            token = authenticator.get_validated_token(request.GET["token"])
+            result = (authenticator.get_user(token), token)
+    except (InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+def _allowed_channels(user):
+    """Channels a user may subscribe to, and the default subscription."""
+    default = {BROADCAST_CHANNEL, user_channel(user.pk)}
+    student = getattr(user, "student_profile", None) if user.role == "student" else None
+    if student:
+        default.add(class_channel(student.standard, student.section, student.academic_year))
+    return default
+
+
+def _resolve_channels(request):
+    user = authenticate_request(request)
+    if user is None:
+        return None, None
+    allowed = _allowed_channels(user)
+    requested = {channel for channel in request.GET.get("channels", "").split(",") if channel}
+    if not requested:
+        return user, allowed
+    # Faculty and office admins may follow any class; students only their own channels.
+    permitted = {
+        channel for channel in requested
+        if channel in allowed or (user.role in ("faculty", "so_admin") and channel.startswith("class:"))
+    }
+    return user, permitted
+
+
+async def sse_notifications(request):
+    """
+    SSE endpoint streaming real-time notifications. Must be served through the ASGI
+    application so that idle connections do not each hold a worker thread.
+
+    Query parameters: `channels` (comma separated, defaults to broadcast, the user's own
+    channel and, for students, their class), `token` (JWT when no Authorization header),
+    and `last_event_id` (alternative to the Last-Event-ID header).
+
+    Under WSGI the endless stream would pin a worker for the life of each connection, so
+    such requests are refused with 501 instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Notifications are only streamed when the server runs the ASGI application (sapp.asgi)."},
+            status=501,
+        )
+    user, channels = await sync_to_async(_resolve_channels)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+    if not channels:
+        return JsonResponse({"detail": "You do not have permission to subscribe to these channels."}, status=403)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    async def event_stream():
+        keep_alive = "retry: 3000\n\n"  # the first chunk confirms the subscription is live
+        async for event in get_broker().subscribe(channels, last_event_id):
+            if event is None:
+                yield keep_alive
+                keep_alive = ": keep-alive\n\n"
+            else:
+                yield format_event(event)
+
     response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
     response['Cache-Control'] = 'no-cache'
-    response['Connection'] = 'keep-alive'
+    response['X-Accel-Buffering'] = 'no'
     return response
 
-def send_notification(message):
-    """Function to add a notification to the queue."""
-    notification_queue.put({"message": message, "timestamp": time.time()})
+
+def send_notification(message, channel=BROADCAST_CHANNEL):
+    """Publish a notification message to every subscriber of `channel`."""
+    return get_broker().publish(channel, {"message": message, "timestamp": time.time()})
@@ -0,0 +1,85 @@
+import json
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+# ?stream=<format> switches a list endpoint to a streamed response.
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+DEFAULT_CHUNK_SIZE = 500
+
+
+def get_stream_format(request):
+    """Return the requested stream format, or None for a regular response."""
+    stream_format = request.query_params.get('stream')
+    return stream_format if stream_format in STREAM_FORMATS else None
+
+
+def serialize_in_batches(queryset, serializer_class, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterate the queryset with a server-side cursor and yield serialized batches,
+    so only one batch of model instances is held in memory at a time.
+    """
+    batch = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            yield serializer_class(batch, many=True, context=context or {}).data
+            batch = []
+    if batch:
+        yield serializer_class(batch, many=True, context=context or {}).data
+
+
+def _json_array(batches):
+    yield '['
+    first = True
+    for rows in batches:
+        if not rows:
+            continue
+        body = json.dumps(rows, cls=JSONEncoder)[1:-1]  # drop the batch's own brackets
+        yield body if first else ',' + body
+        first = False
+    yield ']'
+
+
+def _ndjson(batches):
+    for rows in batches:
+        if rows:
+            yield ''.join(json.dumps(row, cls=JSONEncoder) + '\n' for row in rows)
+
+
+def stream_queryset(queryset, serializer_class, stream_format='json', context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Serialize a queryset batch by batch into a StreamingHttpResponse.
+    `stream_format` is 'json' (a single JSON array) or 'ndjson' (one object per line).
+    """
+    batches = serialize_in_batches(queryset, serializer_class, context, chunk_size)
+    content = _ndjson(batches) if stream_format == 'ndjson' else _json_array(batches)
+
+    response = StreamingHttpResponse(content, content_type=STREAM_FORMATS[stream_format])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+class StreamingListMixin:
+    """
+    Adds opt-in streaming to a generic view or viewset: `?stream=json` or
+    `?stream=ndjson` returns the filtered queryset as a streamed response
+    instead of a fully materialized list.
+    """
+    stream_chunk_size = DEFAULT_CHUNK_SIZE
+
+    def stream_response(self, request, queryset):
+        """Return a streamed response if the client asked for one, otherwise None."""
+        stream_format = get_stream_format(request)
+        if not stream_format:
+            return None
+        return stream_queryset(queryset, self.get_serializer_class(), stream_format,
+                               self.get_serializer_context(), self.stream_chunk_size)
+
+    def list(self, request, *args, **kwargs):
+        response = self.stream_response(request, self.filter_queryset(self.get_queryset()))
+        if response is not None:
+            return response
+        return super().list(request, *args, **kwargs)
@@ -0,0 +1,130 @@
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Derivative name -> longest side in pixels and encoder settings. Files are stored next to
+# the original as `<original name>.<derivative>.webp`.
+DERIVATIVES = {
+    'thumb': {'size': 256, 'quality': 70},
+    'web': {'size': 1280, 'quality': 80},
+}
+DERIVATIVE_RE = re.compile(rf"^(?P<source>.+)\.(?:{'|'.join(DERIVATIVES)})\.webp$")
+
+# Model label -> image fields that get derivatives.
+IMAGE_FIELDS = {
+    'accounts.student': ['image'],
+    'accounts.faculty': ['image'],
+    'accounts.soadmin': ['image'],
+    'features.assignment': ['image'],
+    'features.submission': ['image'],
+    'features.portion': ['image'],
+}
+
+_executor = None
+
+
+def derivative_name(name, derivative):
+    return f"{name}.{derivative}.webp"
+
+
+def source_name(name):
+    """The original file a derivative was made from (or `name` itself)."""
+    match = DERIVATIVE_RE.match(name)
+    return match.group('source') if match else name
+
+
+def generate_derivatives(name, force=False):
+    """
+    Create the missing derivatives of the stored image `name` (all of them with `force`).
+    Returns the number written; 0 when all exist already, so rerunning is cheap.
+    """
+    missing = [
+        derivative for derivative in DERIVATIVES
+        if force or not default_storage.exists(derivative_name(name, derivative))
+    ]
+    if not missing:
+        return 0
+    with default_storage.open(name, 'rb') as original:
+        image = Image.open(original)
+        image = ImageOps.exif_transpose(image)  # phone photos carry their rotation in EXIF
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    for derivative in missing:
+        options = DERIVATIVES[derivative]
+        resized = image.copy()
+        resized.thumbnail((options['size'], options['size']), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        resized.save(output, 'WEBP', quality=options['quality'], method=4)
+        target = derivative_name(name, derivative)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(output.getvalue()))
+    return len(missing)
+
+
+def _generate_quietly(name):
+    try:
+        generate_derivatives(name)
+    except Exception:
+        logger.exception("Could not create derivatives of %s", name)
+
+
+def schedule_derivatives(name):
+    """Create derivatives after the current transaction commits, on a background thread."""
+    def submit():
+        global _executor
+        if not settings.THUMBNAIL_ASYNC:
+            _generate_quietly(name)
+            return
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+        _executor.submit(_generate_quietly, name)
+
+    transaction.on_commit(submit)
+
+
+def _image_saved(sender, instance, update_fields=None, **kwargs):
+    for field in IMAGE_FIELDS[sender._meta.label_lower]:
+        if update_fields is not None and field not in update_fields:
+            continue
+        image = getattr(instance, field)
+        if image and not default_storage.exists(derivative_name(image.name, 'thumb')):
+            schedule_derivatives(image.name)
+
+
+def connect_thumbnail_signals():
+    for label in IMAGE_FIELDS:
+        post_save.connect(_image_saved, sender=apps.get_model(label), dispatch_uid=f"thumbnails-{label}")
+
+
+class ImageDerivativeField(serializers.ReadOnlyField):
+    """
+    URL of an image field's derivative. The URL is derived from the name alone, so
+    listing rows costs no storage lookups; until the derivative has been generated the
+    media view (serve_media) redirects it to the original.
+    """
+
+    def __init__(self, derivative, **kwargs):
+        self.derivative = derivative
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = default_storage.url(derivative_name(value.name, self.derivative))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,308 @@
+import hashlib
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from general.models import StoredBlob, UploadSession
+
+READ_SIZE = 64 * 1024
+
+# Accepted content types per upload kind, with the leading bytes each file must start with
+# (None: no signature to check).
+UPLOAD_TYPES = {
+    'image': {
+        'image/jpeg': (b'\xff\xd8\xff',),
+        'image/png': (b'\x89PNG\r\n\x1a\n',),
+        'image/gif': (b'GIF87a', b'GIF89a'),
+        'image/webp': (b'RIFF',),
+    },
+    'document': {
+        'application/pdf': (b'%PDF-',),
+        'application/msword': (b'\xd0\xcf\x11\xe0',),
+        'application/vnd.ms-excel': (b'\xd0\xcf\x11\xe0',),
+        'application/vnd.ms-powerpoint': (b'\xd0\xcf\x11\xe0',),
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': (b'PK\x03\x04',),
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': (b'PK\x03\x04',),
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation': (b'PK\x03\x04',),
+        'text/plain': None,
+        'text/csv': None,
+    },
+}
+# Documents may also be images (photographed worksheets)
+UPLOAD_TYPES['document'].update(UPLOAD_TYPES['image'])
+
+# Model label -> file fields that can reference a blob through `<field>_upload`
+BLOB_FIELDS = {
+    'accounts.student': ['image'],
+    'accounts.faculty': ['image'],
+    'accounts.soadmin': ['image'],
+    'features.assignment': ['image', 'document'],
+    'features.portion': ['image', 'document'],
+    'features.submission': ['image', 'document'],
+}
+
+
+class UploadError(Exception):
+    """An upload request that cannot be accepted; `status_code` is the HTTP status to answer with."""
+
+    def __init__(self, message, status_code=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.extra = extra
+
+
+def part_path(session):
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f"{session.pk}.part")
+
+
+def start_session(user, kind, file_name, total_size, content_type=None):
+    """Validate the declared file against the limits of `kind` and open an upload session."""
+    if kind not in UPLOAD_TYPES:
+        raise UploadError(f"kind must be one of: {', '.join(UPLOAD_TYPES)}.")
+    file_name = os.path.basename(file_name or '').strip()
+    if not file_name:
+        raise UploadError("file_name is required.")
+    content_type = (content_type or mimetypes.guess_type(file_name)[0] or '').lower()
+    if content_type not in UPLOAD_TYPES[kind]:
+        raise UploadError(f"{content_type or 'This file type'} is not allowed for {kind} uploads.", 415)
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadError("total_size must be a number of bytes.")
+    max_size = settings.UPLOAD_MAX_SIZE[kind]
+    if not 0 < total_size <= max_size:
+        raise UploadError(f"total_size must be between 1 and {max_size} bytes.", 413)
+
+    return UploadSession.objects.create(
+        user=user, kind=kind, file_name=file_name, content_type=content_type, total_size=total_size,
+    )
+
+
+def _check_signature(session, head):
+    signatures = UPLOAD_TYPES[session.kind][session.content_type]
+    if signatures and not head.startswith(signatures):
+        raise UploadError(f"The file content is not {session.content_type}.", 415)
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Append `length` bytes read from `stream` at `offset`, which must equal the bytes
+    received so far (clients resume from `received_size`). The chunk is streamed to its
+    own file first, so the session row is only locked while it is appended locally.
+    """
+    if session.status != 'pending':
+        raise UploadError("This upload is no longer accepting data.", 409)
+    if offset != session.received_size:
+        raise UploadError("Upload-Offset does not match the bytes received.", 409, received_size=session.received_size)
+    if length is None:
+        raise UploadError("Content-Length is required.", 411)
+    if not 0 < length <= settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f"Chunks must be between 1 and {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.", 413)
+    if offset + length > session.total_size:
+        raise UploadError("The chunk runs past the declared total_size.", 413)
+
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    # Unique per request: two threads of one process may race for the same offset
+    chunk_path = f"{part_path(session)}.{offset}.{uuid.uuid4().hex}"
+    written = 0
+    try:
+        with open(chunk_path, 'wb') as chunk:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                if offset == 0 and written == 0:
+                    _check_signature(session, data)
+                chunk.write(data)
+                written += len(data)
+        if written < length:
+            raise UploadError("The chunk ended before Content-Length bytes arrived.", received_size=session.received_size)
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            if session.status != 'pending' or session.received_size != offset:
+                raise UploadError("Another chunk was received for this offset.", 409, received_size=session.received_size)
+            with open(part_path(session), 'ab') as part, open(chunk_path, 'rb') as chunk:
+                # Drop anything a failed earlier append left past the committed size
+                part.truncate(offset)
+                part.seek(offset)
+                while data := chunk.read(READ_SIZE):
+                    part.write(data)
+            session.received_size = offset + written
+            session.save(update_fields=['received_size', 'last_updated'])
+    finally:
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+    return session
+
+
+def blob_name(sha256, file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    return f"blobs/{sha256[:2]}/{sha256}{extension}"
+
+
+def complete_session(session):
+    """
+    Assemble a fully received upload into a StoredBlob. Content already stored under the
+    same SHA-256 is reused instead of being stored again. Completing twice is harmless.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.status == 'completed':
+            return session
+        if session.status != 'pending' or session.received_size != session.total_size:
+            raise UploadError("The upload is not complete.", 409, received_size=session.received_size)
+
+        path = part_path(session)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as part:
+            while data := part.read(READ_SIZE):
+                digest.update(data)
+        sha256 = digest.hexdigest()
+
+        blob = StoredBlob.objects.filter(sha256=sha256).first()
+        if blob is None:
+            with open(path, 'rb') as part:
+                name = default_storage.save(blob_name(sha256, session.file_name), File(part))
+            try:
+                with transaction.atomic():
+                    blob = StoredBlob.objects.create(
+                        sha256=sha256, file=name, size=session.total_size, content_type=session.content_type,
+                    )
+            except IntegrityError:  # stored concurrently by another session
+                default_storage.delete(name)
+                blob = StoredBlob.objects.get(sha256=sha256)
+
+        session.blob = blob
+        session.status = 'completed'
+        session.save(update_fields=['blob', 'status', 'last_updated'])
+    os.remove(path)
+    return session
+
+
+def cancel_session(session):
+    UploadSession.objects.filter(pk=session.pk, status='pending').update(status='failed', error='Cancelled')
+    if os.path.exists(part_path(session)):
+        os.remove(part_path(session))
+
+
+def purge_stale_sessions(older_than=None):
+    """
+    Delete sessions idle for longer than UPLOAD_SESSION_TTL, with their partial files.
+    Completed sessions go too: their id was only needed to attach the blob, and the blob
+    itself is kept for as long as a file field references it (see purge_unreferenced_blobs).
+    """
+    if older_than is None:
+        older_than = timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    cutoff = timezone.now() - older_than
+    stale = UploadSession.objects.filter(last_updated__lt=cutoff)
+    count = 0
+    for session in stale.iterator():
+        if os.path.exists(part_path(session)):
+            os.remove(part_path(session))
+        session.delete()
+        count += 1
+    return count
+
+
+def blob_referenced(name, labels):
+    """Whether a row of any of the models `labels` has the blob `name` in a BLOB_FIELDS field."""
+    for label in labels:
+        query = Q()
+        for field in BLOB_FIELDS[label]:
+            query |= Q(**{field: name})
+        if apps.get_model(label).objects.filter(query).exists():
+            return True
+    return False
+
+
+def referenced_blob_names(labels=None):
+    """Blob file names used by the file fields of BLOB_FIELDS (optionally only `labels`)."""
+    names = set()
+    for label, fields in BLOB_FIELDS.items():
+        if labels is not None and label not in labels:
+            continue
+        model = apps.get_model(label)
+        for field in fields:
+            names.update(
+                model.objects.filter(**{f"{field}__startswith": 'blobs/'}).values_list(field, flat=True).distinct()
+            )
+    return names
+
+
+def purge_unreferenced_blobs():
+    """
+    Delete blobs that no upload session and no file field references any more, with
+    their image derivatives. Returns the number of blobs removed.
+    """
+    from general.utils.thumbnails import DERIVATIVES, derivative_name
+
+    referenced = referenced_blob_names()
+    count = 0
+    for blob in StoredBlob.objects.filter(sessions__isnull=True).iterator():
+        name = blob.file.name
+        if name in referenced:
+            continue
+        with transaction.atomic():
+            # A session may have reused the blob since the query above
+            StoredBlob.objects.select_for_update().filter(pk=blob.pk).first()
+            if UploadSession.objects.filter(blob=blob).exists():
+                continue
+            blob.delete()
+        for path in [name, *(derivative_name(name, derivative) for derivative in DERIVATIVES)]:
+            default_storage.delete(path)
+        count += 1
+    return count
+
+
+def resolve_upload(session_id, user, kind=None):
+    """Name of the stored file behind a completed upload of `user`, for assigning to a FileField."""
+    session = UploadSession.objects.select_related('blob').filter(pk=session_id, user=user, status='completed').first()
+    if session is None or session.blob is None:
+        raise serializers.ValidationError("No completed upload with this id.")
+    if kind and session.kind != kind:
+        raise serializers.ValidationError(f"This field needs an {kind} upload.")
+    return session.blob.file.name
+
+
+class BlobUploadMixin:
+    """
+    ModelSerializer mixin adding a write-only `<field>_upload` for each writable file field:
+    the id of a completed chunked upload, accepted instead of a multipart file. The field
+    then references the stored blob, so nothing is copied.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name, field in list(fields.items()):
+            if isinstance(field, serializers.FileField) and not field.read_only:
+                fields[f"{name}_upload"] = serializers.UUIDField(write_only=True, required=False, allow_null=True)
+        return fields
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        request = self.context.get('request')
+        for key in [key for key in attrs if key.endswith('_upload')]:
+            session_id = attrs.pop(key)
+            if session_id is None:
+                continue
+            if request is None:
+                raise serializers.ValidationError({key: "Uploads can only be attached within a request."})
+            field = key[:-len('_upload')]
+            kind = 'image' if isinstance(self.fields[field], serializers.ImageField) else None
+            try:
+                attrs[field] = resolve_upload(session_id, request.user, kind)
+            except serializers.ValidationError as e:
+                raise serializers.ValidationError({key: e.detail})
+        return attrs
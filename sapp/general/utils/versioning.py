@@ -0,0 +1,182 @@
+import hashlib
+from django.apps import apps
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+
+def attendance_scopes(instance):
+    """Attendance is also versioned per class, so polling one class is unaffected by writes to another."""
+    Student = apps.get_model('accounts', 'Student')
+    student_class = Student.objects.filter(student_code=instance.student_id).values_list(
+        'standard', 'section', 'academic_year'
+    ).first()
+    return [class_scope(*student_class)] if student_class else []
+
+
+# Model label -> function returning the extra scopes an instance belongs to (or None).
+VERSIONED_MODELS = {
+    'accounts.authuser': None,
+    'accounts.student': None,
+    'accounts.faculty': None,
+    'accounts.soadmin': None,
+    'features.attendance': attendance_scopes,
+    'features.attendancelock': None,
+    'features.announcement': None,
+    'features.calendarevent': None,
+    'features.timetable': None,
+    'features.resultlock': None,
+    'features.result': None,
+    'features.assignment': None,
+    'features.submission': None,
+    'features.portion': None,
+}
+
+
+def class_scope(standard, section, academic_year):
+    return f"{standard}:{section}:{academic_year}"
+
+
+def resource_key(label, scope=None):
+    """'features.attendance' or, for a scoped resource, 'features.attendance:7:A:2024-2025'."""
+    return f"{label}:{scope}" if scope else label
+
+
+def bump_versions(keys):
+    """Increment the version of every given resource key, creating missing keys."""
+    from general.models import ResourceVersion
+
+    keys = set(keys)
+    if not keys:
+        return
+    changed_at = timezone.now()
+    updated = ResourceVersion.objects.filter(key__in=keys).update(version=F('version') + 1, last_updated=changed_at)
+    if updated < len(keys):
+        existing = set(ResourceVersion.objects.filter(key__in=keys).values_list('key', flat=True))
+        ResourceVersion.objects.bulk_create(
+            [ResourceVersion(key=key, version=1, last_updated=changed_at) for key in keys - existing],
+            ignore_conflicts=True,
+        )
+
+
+def get_versions(keys):
+    """Return {key: (version, last_updated)} for the given keys in one query."""
+    from general.models import ResourceVersion
+
+    return {
+        key: (version, last_updated)
+        for key, version, last_updated in ResourceVersion.objects.filter(key__in=keys).values_list('key', 'version', 'last_updated')
+    }
+
+
+def compute_resource_etag(request, keys):
+    """
+    Build the ETag and Last-Modified for a request from the versions of the resources its
+    view reads. The path, query string and credentials are part of the hash, so the same
+    resource versions still give different ETags to different callers and filters.
+
+    Returns (etag, last_modified); last_modified is None if any resource has never changed.
+    """
+    versions = get_versions(keys)
+    digest = hashlib.sha256()
+    digest.update(request.get_full_path().encode())
+    digest.update(request.headers.get('Authorization', '').encode())
+    for key in sorted(keys):
+        version, _ = versions.get(key, (0, None))
+        digest.update(f"|{key}={version}".encode())
+
+    timestamps = [versions[key][1] for key in keys if key in versions]
+    last_modified = max(timestamps) if timestamps and len(timestamps) == len(keys) else None
+    return f'"v{digest.hexdigest()[:32]}"', last_modified
+
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def not_modified_response(etag, last_modified):
+    from django.http import HttpResponseNotModified
+    from django.utils.http import http_date
+
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+class ResourceVersionMixin:
+    """
+    DRF view mixin for views that declare the resources they read (a `version_resources`
+    attribute or a `get_version_resources(request, kwargs)` classmethod).
+
+    Conditional GETs are answered from the resource version table without running the
+    handler, but only after authentication, permissions and throttling have passed, so a
+    client whose access was revoked gets its 401/403 instead of a 304. The computed
+    validators are left on the request for ETagIfModifiedSinceMiddleware to set on 200s.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method not in ("GET", "HEAD"):
+            return
+        if hasattr(self, "get_version_resources"):
+            resources = self.get_version_resources(request, kwargs)
+        else:
+            resources = getattr(self, "version_resources", None)
+        if not resources:
+            return
+
+        django_request = request._request
+        etag, last_modified = compute_resource_etag(django_request, list(resources))
+        django_request.resource_etag = etag
+        django_request.resource_last_modified = last_modified
+
+        client_etags = request.headers.get("If-None-Match")
+        if client_etags:
+            if client_etags.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in client_etags.split(",")]:
+                raise _NotModified(not_modified_response(etag, last_modified))
+        else:
+            if_modified_since = getattr(django_request, "if_modified_since_dt", None)
+            if if_modified_since and last_modified and last_modified.replace(microsecond=0) <= if_modified_since:
+                raise _NotModified(not_modified_response(etag, last_modified))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+
+def bulk_version_keys(model, instances):
+    """
+    Resource keys to bump after writing `instances` without signals (bulk_create,
+    bulk_update). Class scopes of attendance are resolved with one query for the batch.
+    """
+    label = model._meta.label_lower
+    if label not in VERSIONED_MODELS:
+        return []
+    keys = [label]
+    if label == 'features.attendance':
+        Student = apps.get_model('accounts', 'Student')
+        student_classes = Student.objects.filter(
+            student_code__in={instance.student_id for instance in instances}
+        ).values_list('standard', 'section', 'academic_year').distinct()
+        keys += [resource_key(label, class_scope(*student_class)) for student_class in student_classes]
+    return keys
+
+
+def _bump_for_instance(sender, instance, **kwargs):
+    label = sender._meta.label_lower
+    keys = [label]
+    scopes = VERSIONED_MODELS.get(label)
+    if scopes:
+        keys += [resource_key(label, scope) for scope in scopes(instance)]
+    bump_versions(keys)
+
+
+def connect_version_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_bump_for_instance, sender=model, dispatch_uid=f"version-save-{label}")
+        post_delete.connect(_bump_for_instance, sender=model, dispatch_uid=f"version-delete-{label}")
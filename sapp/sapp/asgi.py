@@ -3,6 +3,10 @@ ASGI config for sapp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The server-sent events endpoint (notifications/stream/) is an async view and
+must be served through this application (e.g. uvicorn or daphne) so that
+idle event streams wait on the event loop instead of holding a thread each.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
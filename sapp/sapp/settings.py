@@ -100,6 +100,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
     'general.middleware.etag_middleware.ETagIfModifiedSinceMiddleware',
+    'general.middleware.change_events_middleware.ChangeEventMiddleware',
 ]
 
 ROOT_URLCONF = 'sapp.urls'
@@ -121,6 +122,32 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sapp.wsgi.application'
+ASGI_APPLICATION = 'sapp.asgi.application'
+
+# Server-sent events. InMemoryBroker fans out within one process; use
+# general.utils.sse.DatabaseBroker when running several ASGI worker processes.
+SSE_BROKER = env('SSE_BROKER', default='general.utils.sse.InMemoryBroker')
+SSE_BROKER_OPTIONS = {'buffer_size': env.int('SSE_BUFFER_SIZE', default=1000)}
+
+# Signup uploads with more rows than this are imported in a background job.
+SIGNUP_BACKGROUND_THRESHOLD = env.int('SIGNUP_BACKGROUND_THRESHOLD', default=200)
+# Uploads larger than this many bytes are streamed from disk in chunks instead of loaded whole.
+SIGNUP_STREAMING_THRESHOLD = env.int('SIGNUP_STREAMING_THRESHOLD', default=5 * 1024 * 1024)
+SIGNUP_CHUNK_SIZE = env.int('SIGNUP_CHUNK_SIZE', default=2000)
+# Background imports run on threads of the web process and are lost on restart; jobs with no
+# progress for this long are marked failed by fail_stale_signup_imports (run it from cron or on deploy).
+SIGNUP_JOB_STALE_MINUTES = env.int('SIGNUP_JOB_STALE_MINUTES', default=60)
+
+# Seconds before the office dashboard snapshot is recomputed from the database (the most it can lag).
+DASHBOARD_CACHE_TTL = env.int('DASHBOARD_CACHE_TTL', default=300)
+
+# Seconds a class roster stays cached; student and user writes change its key, so a stale copy is never read.
+ROSTER_CACHE_TTL = env.int('ROSTER_CACHE_TTL', default=3600)
+
+# Days deletion tombstones are kept for delta-sync clients; older ?since= values need a full resync.
+TOMBSTONE_RETENTION_DAYS = env.int('TOMBSTONE_RETENTION_DAYS', default=30)
+# Sync tokens are set back this far so rows committed shortly after a read are in the next delta.
+DELTA_SYNC_OVERLAP_SECONDS = env.int('DELTA_SYNC_OVERLAP_SECONDS', default=60)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [env('REST_FRAMEWORK_DEFAULT_AUTHENTICATION_CLASSES')],
@@ -155,6 +182,45 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL')
 
 
+# Logging
+# LOG_LEVEL=DEBUG turns on per-request timing lines (view, serialization and ETag times)
+# from the ETag middleware; at INFO and above these code paths log nothing.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'general': {
+            'handlers': ['console'],
+            'level': env('LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+        'features': {
+            'handlers': ['console'],
+            'level': env('LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+        'accounts': {
+            'handlers': ['console'],
+            'level': env('LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
@@ -208,4 +274,26 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 # For serving static files in development
 MEDIA_URL = env('MEDIA_URL')
+# Media is served by general.utils.media.serve_media. Set MEDIA_OFFLOAD to 'x-accel' (nginx)
+# or 'x-sendfile' (Apache/lighttpd) to let the front-end server send the bytes; nginx needs an
+# internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT.
+MEDIA_OFFLOAD = env('MEDIA_OFFLOAD', default='')
+MEDIA_ACCEL_REDIRECT_PREFIX = env('MEDIA_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+MEDIA_CACHE_MAX_AGE = env.int('MEDIA_CACHE_MAX_AGE', default=3600)
+
+# Thumbnails and web-sized copies of uploaded images (general/utils/thumbnails.py), created
+# after commit on a pool of background threads; set THUMBNAIL_ASYNC=False to create them inline.
+THUMBNAIL_ASYNC = env.bool('THUMBNAIL_ASYNC', default=True)
+THUMBNAIL_WORKERS = env.int('THUMBNAIL_WORKERS', default=2)
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+
+# Chunked uploads (general/utils/uploads.py): partial files live here until assembled
+UPLOAD_SESSION_DIR = env('UPLOAD_SESSION_DIR', default=os.path.join(BASE_DIR, 'upload_sessions'))
+UPLOAD_MAX_SIZE = {
+    'image': env.int('UPLOAD_MAX_IMAGE_SIZE', default=10 * 1024 * 1024),
+    'document': env.int('UPLOAD_MAX_DOCUMENT_SIZE', default=25 * 1024 * 1024),
+}
+UPLOAD_CHUNK_MAX_SIZE = env.int('UPLOAD_CHUNK_MAX_SIZE', default=4 * 1024 * 1024)
+# Upload sessions idle for longer than this are removed by purge_upload_sessions, which then
+# deletes the blobs no session or file field references
+UPLOAD_SESSION_TTL_HOURS = env.int('UPLOAD_SESSION_TTL_HOURS', default=24)
@@ -1,21 +1,25 @@
 from django.contrib import admin 
-from django.urls import path,  include
+from django.urls import path, re_path, include
 from django.conf import settings
-from django.conf.urls.static import static
+import re
+from urllib.parse import urlsplit
 
 from rest_framework import routers
-from accounts.views import ExcelUploadView, LoginView,StudentViewSet,FacultyViewSet,OfficeAdminViewSet
+from accounts.views import ExcelUploadView, SignupImportJobView, LoginView,StudentViewSet,FacultyViewSet,OfficeAdminViewSet
 
 from features.veiws.profile import StudentProfileView, SOProfileView, FacultyProfileView
-from features.veiws.attendance import AttendanceLockView,AttendanceDaysView, AttendanceView
+from features.veiws.attendance import AttendanceLockView,AttendanceDaysView, AttendanceView, AttendanceAnalyticsView
 from features.veiws.announcements import AnnouncementView,AnnouncementMainDisplayView
 from features.veiws.calendar import CalendarEventView
 from features.veiws.assignments import AssignmentViewSet
-from features.veiws.submissions import FacultySubmissionViewSet,StudentSubmissionViewSet
+from features.veiws.submissions import FacultySubmissionViewSet,StudentSubmissionViewSet, SubmissionBoardView
 from features.veiws.timetable import TimetableView
 from features.veiws.results import ResultLockView,ResultLockDetailView, StudentResultAPIView, FacultyResultView 
 from features.veiws.portions import PortionViewSet
 from features.veiws.defaults import AdminDashboardAPIView, FilterStudentsView
+from features.veiws.uploads import UploadSessionView, UploadChunkView, UploadCompleteView
+from general.utils.media import serve_media
+from general.utils.sse import sse_notifications
 
 
 
@@ -41,6 +45,7 @@ urlpatterns = [
     
     # Authentication
      path('upload-excel-signup/', ExcelUploadView.as_view(), name='upload-excel'),
+     path('upload-excel-signup/<uuid:job_id>/', SignupImportJobView.as_view(), name='upload-excel-status'),
      path('login/',LoginView.as_view(),name='login'),
     
      path('', include(router.urls)), 
@@ -52,6 +57,9 @@ urlpatterns = [
      path('soadmin/profile/',SOProfileView.as_view(),name='soadmin-profile'),
      
      
+    #notifications (server-sent events, served by the ASGI app)
+     path('notifications/stream/', sse_notifications, name='notifications-stream'),
+
     #default
      path("office/dashboard/", AdminDashboardAPIView.as_view(), name="dashboard-stats"),
      path('faculty/filter-students/', FilterStudentsView.as_view(), name ='filter-students'),
@@ -61,6 +69,7 @@ urlpatterns = [
      path('office/attendancelock/', AttendanceLockView.as_view(),name='attendancelock'),
      path('office/attendancedays/', AttendanceDaysView.as_view(), name='attendance-days'),
      path('class/attendance/', AttendanceView.as_view(), name='attendance-list'),
+     path('class/attendance/analytics/', AttendanceAnalyticsView.as_view(), name='attendance-analytics'),
      path('class/attendance/<str:student_code>/', AttendanceView.as_view(), name='attendance-detail'),
     
     #resultlock
@@ -91,11 +100,18 @@ urlpatterns = [
      #registered
     #submissions
      #registered
+     path('faculty/submission-board/', SubmissionBoardView.as_view(), name='submission-board'),
+
+    #chunked uploads
+     path('uploads/', UploadSessionView.as_view(), name='upload-sessions'),
+     path('uploads/<uuid:session_id>/', UploadChunkView.as_view(), name='upload-session'),
+     path('uploads/<uuid:session_id>/complete/', UploadCompleteView.as_view(), name='upload-complete'),
     
     #portions
      
      
      
 ]
-# Serving media files in development
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media files, with access checks and X-Accel-Redirect/X-Sendfile offload (see serve_media)
+if not urlsplit(settings.MEDIA_URL).netloc:
+    urlpatterns.append(re_path(rf"^{re.escape(settings.MEDIA_URL.lstrip('/'))}(?P<path>.*)$", serve_media, name='media'))
@@ -28,7 +28,7 @@ USERS["SO_Admin"]="admin1@example.com securepassword1 so_admin"
 # Function to clean migrations
 clean_migrations() {
     echo "🧹 Cleaning migrations..."
-    for folder in "accounts/migrations" "features/migrations"; do
+    for folder in "accounts/migrations" "features/migrations" "general/migrations"; do
         if [ -d "$folder" ]; then
             find "$folder" -type f ! -name "__init__.py" -delete
             find "$folder" -type d -name "__pycache__" -exec rm -rf {} +